@@ -1,12 +1,20 @@
 import os
 import json
-import re
 from typing import Dict, List, Tuple, Optional
-import openai
-from anthropic import Anthropic
 import asyncio
 from dataclasses import dataclass
 
+from .rule_engine import RuleEngine
+from .knowledge_base import KnowledgeBaseStore
+from .llm_client import LLMClientPool, LLMResponse
+from .llm_router import LLMRouter
+from .llm_cache import LLMResponseCache, canonical_key
+from .single_flight import SingleFlight
+from .prompt_packing import PromptPacker
+from .prompt_builder import PROMPT_VERSION, PromptBuilder
+from .metrics import timed_stage
+from .schemas import validate_ai_response
+
 @dataclass
 class IngredientAnalysis:
     name: str
@@ -14,385 +22,177 @@ class IngredientAnalysis:
     concerns: List[str]
     allergen_info: Optional[str] = None
 
-class AIRiskAnalyzer:
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        
-        # Known risk databases
-        self.allergen_database = {
-            "milk", "eggs", "fish", "shellfish", "tree nuts", "peanuts", 
-            "wheat", "soybeans", "sesame", "lactose", "gluten", "casein"
-        }
-        
-        self.harmful_additives = {
-            "monosodium glutamate": "May cause headaches and nausea in sensitive individuals",
-            "sodium nitrate": "Potential carcinogen, linked to cancer risk",
-            "high fructose corn syrup": "Linked to obesity and diabetes",
-            "trans fat": "Increases heart disease risk",
-            "aspartame": "May cause headaches in sensitive individuals",
-            "red dye 40": "Potential behavioral issues in children",
-            "bht": "Potential carcinogen",
-            "bha": "Potential carcinogen",
-            "sodium benzoate": "May form benzene when combined with vitamin C"
-        }
-        
-        self.nutrition_thresholds = {
-            "sodium": {"high": 600, "very_high": 1400},  # mg per serving
-            "sugar": {"high": 15, "very_high": 25},      # g per serving
-            "saturated_fat": {"high": 5, "very_high": 10}, # g per serving
-            "trans_fat": {"any": 0.5}                    # g per serving
-        }
-
-    async def analyze_product(self, product_data: Dict, health_profile: Optional[Dict] = None) -> Dict:
+class AIRiskAnalyzer(RuleEngine):
+    def __init__(self, llm_clients: Optional[LLMClientPool] = None,
+                 response_cache: Optional[LLMResponseCache] = None,
+                 knowledge_base_store: Optional[KnowledgeBaseStore] = None):
+        super().__init__(knowledge_base_store)
+        
+        # Async providers sharing one keep-alive connection pool
+        self.llm_clients = llm_clients or LLMClientPool()
+        # Hedging, per-provider circuit breakers and a total latency budget per call
+        self.llm_router = LLMRouter.from_env(self.llm_clients)
+        # Compact, versioned prompts within PROMPT_MAX_INPUT_TOKENS
+        self.prompt_builder = PromptBuilder.from_env()
+        self.response_cache = response_cache or LLMResponseCache.from_env()
+        # Identical analyses already waiting on the provider share one call
+        self.in_flight = SingleFlight()
+        # Concurrent batch analyses share one LLM request per LLM_PACK_SIZE products
+        self.packer = PromptPacker.from_env(self._call_ai_packed)
+        self.pack_max_tokens_per_item = int(os.getenv("LLM_PACK_MAX_TOKENS_PER_ITEM", "400"))
+
+    async def analyze_product(self, product_data: Dict, health_profile: Optional[Dict] = None,
+                              packed: bool = False) -> Dict:
         """
         Comprehensive AI-powered product risk analysis
+
+        With ``packed`` the AI call may be shared with other concurrent packed analyses.
         """
         try:
-            # Parse ingredients
-            ingredients = self._parse_ingredients(product_data.get("ingredients", ""))
-            
-            # Run parallel analysis
-            tasks = [
-                self._analyze_allergens(ingredients, health_profile),
-                self._analyze_additives(ingredients),
-                self._analyze_nutrition(product_data.get("nutrition_facts", {})),
-                self._ai_comprehensive_analysis(product_data, health_profile),
-                self._analyze_contamination_risk(product_data),
-                self._analyze_drug_interactions(ingredients, health_profile)
-            ]
-            
-            allergen_analysis, additive_analysis, nutrition_analysis, ai_analysis, contamination_analysis, interaction_analysis = await asyncio.gather(*tasks)
-            
-            # Calculate overall risk score
-            overall_score = self._calculate_overall_risk(
-                allergen_analysis, additive_analysis, nutrition_analysis, 
-                contamination_analysis, interaction_analysis
+            # Run rule-based and AI analysis in parallel
+            result, ai_analysis = await asyncio.gather(
+                self._rule_based_analysis(product_data, health_profile),
+                self._ai_comprehensive_analysis(product_data, health_profile, packed)
             )
             
-            # Determine risk level
-            risk_level = self._determine_risk_level(overall_score)
-            
-            return {
-                "overall_risk_score": overall_score,
-                "risk_level": risk_level,
-                "confidence_score": ai_analysis.get("confidence", 85),
-                "allergen_risk": allergen_analysis,
-                "nutritional_risk": nutrition_analysis,
-                "additive_risk": additive_analysis,
-                "contamination_risk": contamination_analysis,
-                "interaction_risk": interaction_analysis,
-                "identified_allergens": allergen_analysis.get("allergens", []),
-                "harmful_additives": additive_analysis.get("harmful", []),
-                "nutritional_concerns": nutrition_analysis.get("concerns", []),
-                "safety_warnings": self._generate_safety_warnings(allergen_analysis, additive_analysis, nutrition_analysis),
-                "ai_summary": ai_analysis.get("summary", ""),
-                "ai_recommendations": ai_analysis.get("recommendations", [])
-            }
+            result.update(self._ai_fields(ai_analysis))
+            return result
             
         except Exception as e:
             print(f"Error in product analysis: {e}")
             return self._get_error_response()
 
-    def _parse_ingredients(self, ingredients_text: str) -> List[str]:
-        """Parse ingredients from text"""
-        if not ingredients_text:
-            return []
-        
-        # Remove common prefixes and clean up
-        ingredients_text = re.sub(r'^ingredients?:?\s*', '', ingredients_text.lower())
-        
-        # Split by commas and clean
-        ingredients = [ing.strip() for ing in ingredients_text.split(',')]
-        ingredients = [ing for ing in ingredients if ing and len(ing) > 1]
-        
-        return ingredients
-
-    async def _analyze_allergens(self, ingredients: List[str], health_profile: Optional[Dict]) -> Dict:
-        """Analyze potential allergens"""
-        identified_allergens = []
-        risk_details = []
-        
-        for ingredient in ingredients:
-            for allergen in self.allergen_database:
-                if allergen.lower() in ingredient.lower():
-                    identified_allergens.append(allergen)
-                    
-                    # Check against user's allergies
-                    if health_profile and allergen in health_profile.get("allergies", []):
-                        risk_details.append(f"CRITICAL: Contains {allergen} - matches your allergy profile")
-                    else:
-                        risk_details.append(f"Contains {allergen}")
-        
-        # Calculate risk score
-        base_score = len(identified_allergens) * 15
-        personal_risk_multiplier = 3 if health_profile and any(
-            allergen in health_profile.get("allergies", []) for allergen in identified_allergens
-        ) else 1
-        
-        score = min(base_score * personal_risk_multiplier, 100)
-        severity = "CRITICAL" if score > 80 else "HIGH" if score > 50 else "MEDIUM" if score > 20 else "LOW"
-        
-        return {
-            "score": score,
-            "details": risk_details,
-            "severity": severity,
-            "allergens": identified_allergens
-        }
-
-    async def _analyze_additives(self, ingredients: List[str]) -> Dict:
-        """Analyze harmful additives"""
-        harmful_found = []
-        risk_details = []
-        
-        for ingredient in ingredients:
-            for additive, concern in self.harmful_additives.items():
-                if additive.lower() in ingredient.lower():
-                    harmful_found.append({"name": additive, "concern": concern})
-                    risk_details.append(f"Contains {additive}: {concern}")
-        
-        score = len(harmful_found) * 20
-        severity = "HIGH" if score > 60 else "MEDIUM" if score > 30 else "LOW"
-        
-        return {
-            "score": min(score, 100),
-            "details": risk_details,
-            "severity": severity,
-            "harmful": harmful_found
-        }
+    async def analyze_rules(self, product_data: Dict, health_profile: Optional[Dict] = None) -> Dict:
+        """
+        Rule-based analysis only - the AI fields are left as None until the AI phase completes
+        """
+        try:
+            return await self._rule_based_analysis(product_data, health_profile)
+            
+        except Exception as e:
+            print(f"Error in rule-based analysis: {e}")
+            return self._get_error_response()
 
-    async def _analyze_nutrition(self, nutrition_facts: Dict) -> Dict:
-        """Analyze nutritional risks"""
-        concerns = []
-        risk_details = []
-        score = 0
-        
-        if not nutrition_facts:
-            return {"score": 20, "details": ["Nutrition information not available"], "severity": "MEDIUM", "concerns": []}
-        
-        # Analyze sodium
-        sodium = nutrition_facts.get("sodium_mg", 0)
-        if sodium > self.nutrition_thresholds["sodium"]["very_high"]:
-            concerns.append({"type": "sodium", "level": "very_high", "value": sodium})
-            risk_details.append(f"Very high sodium content: {sodium}mg")
-            score += 25
-        elif sodium > self.nutrition_thresholds["sodium"]["high"]:
-            concerns.append({"type": "sodium", "level": "high", "value": sodium})
-            risk_details.append(f"High sodium content: {sodium}mg")
-            score += 15
-        
-        # Analyze sugar
-        sugar = nutrition_facts.get("sugar_g", 0)
-        if sugar > self.nutrition_thresholds["sugar"]["very_high"]:
-            concerns.append({"type": "sugar", "level": "very_high", "value": sugar})
-            risk_details.append(f"Very high sugar content: {sugar}g")
-            score += 20
-        elif sugar > self.nutrition_thresholds["sugar"]["high"]:
-            concerns.append({"type": "sugar", "level": "high", "value": sugar})
-            risk_details.append(f"High sugar content: {sugar}g")
-            score += 10
-        
-        # Analyze trans fat
-        trans_fat = nutrition_facts.get("trans_fat_g", 0)
-        if trans_fat > self.nutrition_thresholds["trans_fat"]["any"]:
-            concerns.append({"type": "trans_fat", "level": "any", "value": trans_fat})
-            risk_details.append(f"Contains trans fat: {trans_fat}g")
-            score += 30
-        
-        severity = "HIGH" if score > 50 else "MEDIUM" if score > 25 else "LOW"
-        
+    def _ai_fields(self, ai_analysis: Dict) -> Dict:
+        """Map an AI response onto the analysis result fields"""
         return {
-            "score": min(score, 100),
-            "details": risk_details,
-            "severity": severity,
-            "concerns": concerns
+            "confidence_score": ai_analysis.get("confidence", 85),
+            "ai_summary": ai_analysis.get("summary", ""),
+            "ai_recommendations": ai_analysis.get("recommendations", [])
         }
 
-    async def _ai_comprehensive_analysis(self, product_data: Dict, health_profile: Optional[Dict]) -> Dict:
+    @timed_stage("ai")
+    async def _ai_comprehensive_analysis(self, product_data: Dict, health_profile: Optional[Dict],
+                                         packed: bool = False) -> Dict:
         """Use AI for comprehensive analysis"""
         try:
-            prompt = f"""
-            Analyze this consumable product for health and safety risks:
-            
-            Product: {product_data.get('product_name', 'Unknown')}
-            Ingredients: {product_data.get('ingredients', 'Not provided')}
-            Nutrition: {json.dumps(product_data.get('nutrition_facts', {}), indent=2)}
-            Category: {product_data.get('category', 'Unknown')}
+            cache_key = self._ai_cache_key(product_data, health_profile)
+            cached = await self.response_cache.get(cache_key)
+            # Entries cached before replies were validated may not be usable
+            if cached is not None and validate_ai_response(cached) is not None:
+                return cached
             
-            User Health Profile: {json.dumps(health_profile or {}, indent=2)}
-            
-            Provide a comprehensive analysis including:
-            1. Overall safety assessment
-            2. Specific health concerns
-            3. Personalized recommendations based on health profile
-            4. Long-term consumption risks
-            5. Interactions with common medications
-            
-            Format your response as JSON with keys: summary, recommendations, confidence, concerns
-            """
-            
-            response = await self._call_ai_service(prompt)
-            
-            if response:
-                return response
-            else:
-                return self._get_default_ai_response()
+            return await self.in_flight.do(
+                cache_key, lambda: self._fetch_ai_analysis(cache_key, product_data, health_profile, packed)
+            )
                 
         except Exception as e:
             print(f"AI analysis error: {e}")
             return self._get_default_ai_response()
 
-    async def _call_ai_service(self, prompt: str) -> Optional[Dict]:
-        """Call AI service (OpenAI or Anthropic)"""
+    async def _fetch_ai_analysis(self, cache_key: str, product_data: Dict, health_profile: Optional[Dict],
+                                 packed: bool = False) -> Dict:
+        """
+        Call the provider and cache a successful response. Keys name the primary
+        provider's model, so a hedged or failover reply from another model is
+        served but not cached.
+        """
         try:
-            # Try OpenAI first
-            if os.getenv("OPENAI_API_KEY"):
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[
-                        {"role": "system", "content": "You are a food safety and nutrition expert. Provide accurate, evidence-based analysis."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3
-                )
-                
-                content = response.choices[0].message.content
-                # Try to parse as JSON
-                try:
-                    return json.loads(content)
-                except:
-                    return {"summary": content, "recommendations": [], "confidence": 80, "concerns": []}
+            if packed and self.packer.enabled and self.llm_clients.provider_names():
+                packed_result = await self.packer.submit(product_data, health_profile)
+                if packed_result is not None:
+                    response, model = packed_result
+                    if model == self._primary_model():
+                        await self.response_cache.set(cache_key, response)
+                    return response
+                # Missing or malformed in the packed reply: fall back to a call of its own
+            
+            prompt = self.prompt_builder.build(product_data, health_profile)
+            result = await self._call_ai_service(prompt.text)
             
-            # Fallback to Anthropic
-            elif os.getenv("ANTHROPIC_API_KEY"):
-                response = self.anthropic_client.messages.create(
-                    model="claude-3-sonnet-20240229",
-                    max_tokens=1000,
-                    messages=[{"role": "user", "content": prompt}]
-                )
+            if result:
+                response, model = result
+                if model == self._primary_model():
+                    await self.response_cache.set(cache_key, response)
+                return response
+            else:
+                return self._get_default_ai_response()
                 
-                content = response.content[0].text
-                try:
-                    return json.loads(content)
-                except:
-                    return {"summary": content, "recommendations": [], "confidence": 80, "concerns": []}
-                    
         except Exception as e:
-            print(f"AI service error: {e}")
-            return None
+            print(f"AI analysis error: {e}")
+            return self._get_default_ai_response()
 
-    async def _analyze_contamination_risk(self, product_data: Dict) -> Dict:
-        """Analyze contamination risks"""
-        risk_factors = []
-        score = 0
-        
-        category = product_data.get("category", "").lower()
-        
-        # High-risk categories
-        if any(cat in category for cat in ["seafood", "meat", "dairy", "eggs"]):
-            risk_factors.append("High-risk category for bacterial contamination")
-            score += 20
-        
-        if "raw" in category or "unpasteurized" in product_data.get("ingredients", "").lower():
-            risk_factors.append("Raw/unpasteurized product - higher contamination risk")
-            score += 30
-        
-        # Check for recall-prone ingredients
-        ingredients = product_data.get("ingredients", "").lower()
-        if any(ingredient in ingredients for ingredient in ["spinach", "lettuce", "sprouts"]):
-            risk_factors.append("Contains ingredients with history of contamination issues")
-            score += 15
-        
-        severity = "HIGH" if score > 40 else "MEDIUM" if score > 20 else "LOW"
-        
-        return {
-            "score": min(score, 100),
-            "details": risk_factors or ["Low contamination risk"],
-            "severity": severity
+    def _ai_cache_key(self, product_data: Dict, health_profile: Optional[Dict]) -> str:
+        """Cache key covering the prompt inputs, the active model and the prompt version"""
+        model = self._primary_model()
+        prompt_inputs = {
+            "product_name": product_data.get("product_name"),
+            "ingredients": product_data.get("ingredients"),
+            "nutrition_facts": product_data.get("nutrition_facts", {}),
+            "category": product_data.get("category"),
+            "product_description": product_data.get("product_description") or ""
         }
+        return canonical_key(prompt_inputs, health_profile, model, PROMPT_VERSION)
 
-    async def _analyze_drug_interactions(self, ingredients: List[str], health_profile: Optional[Dict]) -> Dict:
-        """Analyze potential drug interactions"""
-        interactions = []
-        score = 0
-        
-        if not health_profile or not health_profile.get("medical_conditions"):
-            return {"score": 0, "details": ["No medical conditions specified"], "severity": "LOW"}
-        
-        # Common interaction-prone ingredients
-        interaction_ingredients = {
-            "grapefruit": "Can interfere with many medications",
-            "caffeine": "Can interact with stimulants and blood thinners",
-            "alcohol": "Can interact with many medications",
-            "vitamin k": "Can interfere with blood thinners",
-            "tyramine": "Can interact with MAO inhibitors"
-        }
-        
-        for ingredient in ingredients:
-            for interaction_ingredient, warning in interaction_ingredients.items():
-                if interaction_ingredient in ingredient.lower():
-                    interactions.append(f"{interaction_ingredient}: {warning}")
-                    score += 25
-        
-        severity = "HIGH" if score > 50 else "MEDIUM" if score > 25 else "LOW"
-        
-        return {
-            "score": min(score, 100),
-            "details": interactions or ["No known drug interactions"],
-            "severity": severity
-        }
+    def _primary_model(self) -> str:
+        """Model of the preferred provider, the one cache keys are built for"""
+        provider_names = self.llm_clients.provider_names()
+        return self.llm_clients.settings[provider_names[0]].model if provider_names else "none"
 
-    def _calculate_overall_risk(self, allergen_analysis: Dict, additive_analysis: Dict, 
-                              nutrition_analysis: Dict, contamination_analysis: Dict, 
-                              interaction_analysis: Dict) -> float:
-        """Calculate weighted overall risk score"""
-        weights = {
-            "allergen": 0.3,
-            "additive": 0.25,
-            "nutrition": 0.2,
-            "contamination": 0.15,
-            "interaction": 0.1
-        }
+    async def _call_ai_service(self, prompt: str) -> Optional[Tuple[Dict, str]]:
+        """
+        Call the AI service through the latency-budget router; the validated reply
+        and the model that wrote it, or None when there is no reply or the reply
+        has fields of the wrong type or out of range
+        """
+        reply = await self._complete(prompt)
+        if reply is None:
+            return None
         
-        overall_score = (
-            allergen_analysis["score"] * weights["allergen"] +
-            additive_analysis["score"] * weights["additive"] +
-            nutrition_analysis["score"] * weights["nutrition"] +
-            contamination_analysis["score"] * weights["contamination"] +
-            interaction_analysis["score"] * weights["interaction"]
-        )
+        content = reply.text
+        # Try to parse as JSON, ignoring code fences or prose around the object
+        start, end = content.find("{"), content.rfind("}")
+        try:
+            response = json.loads(content[start:end + 1] if 0 <= start < end else content)
+        except:
+            response = {"summary": content, "recommendations": [], "confidence": 80, "concerns": []}
         
-        return round(overall_score, 1)
+        validated = validate_ai_response(response)
+        if validated is None:
+            print(f"AI service returned a malformed analysis: {content[:200]}")
+            return None
+        return validated, reply.model
 
-    def _determine_risk_level(self, score: float) -> str:
-        """Determine risk level based on score"""
-        if score >= 80:
-            return "CRITICAL"
-        elif score >= 60:
-            return "HIGH"
-        elif score >= 30:
-            return "MEDIUM"
-        else:
-            return "LOW"
+    async def _call_ai_packed(self, prompt: str, item_count: int) -> Optional[LLMResponse]:
+        """Reply to a packed prompt, with room for ``item_count`` analyses"""
+        return await self._complete(prompt, max_tokens=self.pack_max_tokens_per_item * item_count, scale=item_count)
 
-    def _generate_safety_warnings(self, allergen_analysis: Dict, additive_analysis: Dict, 
-                                nutrition_analysis: Dict) -> List[str]:
-        """Generate safety warnings"""
-        warnings = []
-        
-        if allergen_analysis["severity"] in ["HIGH", "CRITICAL"]:
-            warnings.append("⚠️ Contains known allergens - check ingredient list carefully")
-        
-        if additive_analysis["severity"] == "HIGH":
-            warnings.append("⚠️ Contains potentially harmful additives")
-        
-        if nutrition_analysis["severity"] == "HIGH":
-            warnings.append("⚠️ High in sodium, sugar, or unhealthy fats")
-        
-        if not warnings:
-            warnings.append("✅ No major safety concerns identified")
-        
-        return warnings
+    async def _complete(self, prompt: str, max_tokens: Optional[int] = None,
+                        scale: float = 1.0) -> Optional[LLMResponse]:
+        """
+        Reply from the first provider to answer within the latency budget, or None
+        when none is configured, every breaker is open, all calls failed or the budget ran out
+        """
+        try:
+            return await self.llm_router.complete(prompt, max_tokens=max_tokens, scale=scale)
+                    
+        except Exception as e:
+            print(f"AI service error: {e}")
+            return None
+
+    async def aclose(self):
+        """Release the shared LLM connection pool"""
+        await self.llm_clients.aclose()
 
     def _get_default_ai_response(self) -> Dict:
         """Default AI response when service is unavailable"""
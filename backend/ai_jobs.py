@@ -0,0 +1,88 @@
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class AIJob:
+    """State of one deferred AI analysis"""
+
+    def __init__(self, analysis_id: int):
+        self.analysis_id = analysis_id
+        self.status = "pending"
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.done = asyncio.Event()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "analysis_id": self.analysis_id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class AIJobRegistry:
+    """
+    Tracks AI analyses running after their rule-based result was returned.
+
+    Jobs run as event-loop tasks; completed jobs are kept for ``retention_seconds``
+    so pollers and SSE subscribers can pick up the result. Other processes, and
+    this one once a job is pruned, read the ``ai_status`` the job keeps on its
+    ``RiskAnalysis`` row. ``shutdown`` lets running jobs finish, then cancels
+    the rest.
+    """
+
+    def __init__(self, retention_seconds: float = 600):
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[int, AIJob] = {}
+
+    def start(self, analysis_id: int, run: Callable[[], Awaitable[Dict]]) -> AIJob:
+        self._prune()
+        job = AIJob(analysis_id)
+        self._jobs[analysis_id] = job
+        job.task = asyncio.create_task(self._run(job, run))
+        return job
+
+    async def _run(self, job: AIJob, run: Callable[[], Awaitable[Dict]]):
+        try:
+            job.result = await run()
+            job.status = "complete"
+        except asyncio.CancelledError:
+            job.error = "Cancelled at shutdown"
+            job.status = "failed"
+            raise
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            print(f"Deferred AI analysis {job.analysis_id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            job.task = None
+            job.done.set()
+
+    async def shutdown(self, timeout: float):
+        """Wait up to ``timeout`` seconds for running jobs, then cancel the rest"""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            print(f"Cancelling {len(pending)} deferred AI analyses still running at shutdown")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def get(self, analysis_id: int) -> Optional[AIJob]:
+        return self._jobs.get(analysis_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            analysis_id for analysis_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for analysis_id in expired:
+            del self._jobs[analysis_id]
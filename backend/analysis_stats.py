@@ -0,0 +1,141 @@
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, delete, func, select
+
+from .models import AnalysisStats, Product, RiskAnalysis
+
+RISK_LEVELS = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+COUNTER_COLUMNS = ["total", "low_count", "medium_count", "high_count", "critical_count", "score_sum", "score_count"]
+
+stats_table = AnalysisStats.__table__
+
+
+def _empty_counters() -> Dict:
+    return {column: 0 for column in COUNTER_COLUMNS}
+
+
+def _bucket_keys(created_at: Optional[datetime], category: Optional[str]):
+    yield "all", ""
+    if created_at is not None:
+        yield "day", created_at.date().isoformat()
+    yield "category", category or "Unknown"
+
+
+def _upsert_statement(dialect_name: str, values: Dict):
+    """INSERT ... ON CONFLICT DO UPDATE adding the deltas to the existing counters"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(stats_table).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=["bucket_type", "bucket_key"],
+        set_={column: stats_table.c[column] + statement.excluded[column] for column in COUNTER_COLUMNS}
+    )
+
+
+def record_analyses(db, entries: Iterable[Tuple[Optional[datetime], Optional[str], Optional[str], Optional[float]]],
+                    sign: int = 1):
+    """
+    Fold new analyses into the stats buckets inside the caller's transaction.
+
+    ``entries`` are (created_at, category, risk_level, overall_risk_score) tuples.
+    Deltas are aggregated per bucket first, so a batch costs one upsert per
+    touched bucket rather than one per row. ``sign=-1`` takes entries back out,
+    for rows that are rewritten in place.
+    """
+    deltas: Dict[Tuple[str, str], Dict] = {}
+    for created_at, category, risk_level, score in entries:
+        for bucket in _bucket_keys(created_at, category):
+            counters = deltas.setdefault(bucket, _empty_counters())
+            counters["total"] += sign
+            if risk_level in RISK_LEVELS:
+                counters[f"{risk_level.lower()}_count"] += sign
+            if score is not None:
+                counters["score_sum"] += sign * score
+                counters["score_count"] += sign
+
+    dialect_name = db.get_bind().dialect.name
+    for (bucket_type, bucket_key), counters in deltas.items():
+        db.execute(_upsert_statement(dialect_name, {"bucket_type": bucket_type, "bucket_key": bucket_key, **counters}))
+
+
+def _stats_dict(row: Optional[AnalysisStats]) -> Dict:
+    if row is None:
+        return {"total_analyses": 0, "risk_distribution": {level.lower(): 0 for level in RISK_LEVELS}, "average_risk_score": 0.0}
+
+    average = row.score_sum / row.score_count if row.score_count else 0
+    return {
+        "total_analyses": row.total,
+        "risk_distribution": {level.lower(): getattr(row, f"{level.lower()}_count") for level in RISK_LEVELS},
+        "average_risk_score": round(float(average), 1)
+    }
+
+
+def get_stats(db, breakdown: bool = False) -> Dict:
+    """Read the precomputed totals; per-day and per-category buckets on request"""
+    stats = _stats_dict(db.get(AnalysisStats, ("all", "")))
+
+    if breakdown:
+        rows = db.query(AnalysisStats).filter(AnalysisStats.bucket_type.in_(["day", "category"])).all()
+        stats["by_day"] = {row.bucket_key: _stats_dict(row) for row in rows if row.bucket_type == "day"}
+        stats["by_category"] = {row.bucket_key: _stats_dict(row) for row in rows if row.bucket_type == "category"}
+
+    return stats
+
+
+def rebuild_stats(conn) -> int:
+    """
+    Recompute every bucket from risk_analyses from scratch; returns the bucket count.
+
+    Works on a Connection or Session inside the caller's transaction.
+    """
+    score = RiskAnalysis.overall_risk_score
+    aggregates = [
+        func.count(RiskAnalysis.id),
+        *[func.sum(case((RiskAnalysis.risk_level == level, 1), else_=0)) for level in RISK_LEVELS],
+        func.coalesce(func.sum(score), 0),
+        func.count(score)
+    ]
+
+    day = func.date(RiskAnalysis.created_at)
+    category = func.coalesce(Product.category, "Unknown")
+    queries = [
+        ("all", select(*aggregates).select_from(RiskAnalysis)),
+        ("day", select(day, *aggregates).where(RiskAnalysis.created_at.isnot(None)).group_by(day)),
+        ("category", select(category, *aggregates)
+            .select_from(RiskAnalysis)
+            .outerjoin(Product, Product.id == RiskAnalysis.product_id)
+            .group_by(category))
+    ]
+
+    rows = []
+    for bucket_type, query in queries:
+        for result in conn.execute(query):
+            values = list(result)
+            bucket_key = "" if bucket_type == "all" else str(values.pop(0))
+            counters = dict(zip(COUNTER_COLUMNS, [value or 0 for value in values]))
+            if counters["total"]:
+                rows.append({"bucket_type": bucket_type, "bucket_key": bucket_key, **counters})
+
+    conn.execute(delete(stats_table))
+    if rows:
+        conn.execute(stats_table.insert(), rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    # python -m backend.analysis_stats rebuild
+    if sys.argv[1:] != ["rebuild"]:
+        print("usage: python -m backend.analysis_stats rebuild")
+        sys.exit(1)
+
+    from .database import engine
+    from .models import Base
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        print(f"Rebuilt {rebuild_stats(conn)} stats buckets")
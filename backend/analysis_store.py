@@ -0,0 +1,145 @@
+import time
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .database import AsyncSessionLocal
+from .models import Product, RiskAnalysis, UserSubmission
+from .analysis_stats import record_analyses
+from .metrics import observe_db_write
+from .product_cache import ProductCache
+
+# (product_data, analysis_result, session_id)
+AnalysisItem = Tuple[dict, dict, str]
+
+
+def product_row(product_data: dict) -> Product:
+    return Product(
+        name=product_data["product_name"],
+        category=product_data.get("category"),
+        ingredients=product_data["ingredients"],
+        nutrition_facts=product_data.get("nutrition_facts")
+    )
+
+
+AI_FIELDS = ("ai_summary", "ai_recommendations", "confidence_score")
+
+
+def risk_analysis_values(analysis_result: dict) -> dict:
+    """RiskAnalysis column values for an analysis result"""
+    return {
+        "overall_risk_score": analysis_result.get("overall_risk_score", 0),
+        "risk_level": analysis_result.get("risk_level", "UNKNOWN"),
+        "allergen_risk": analysis_result.get("allergen_risk", {}).get("score", 0),
+        "nutritional_risk": analysis_result.get("nutritional_risk", {}).get("score", 0),
+        "additive_risk": analysis_result.get("additive_risk", {}).get("score", 0),
+        "contamination_risk": analysis_result.get("contamination_risk", {}).get("score", 0),
+        "interaction_risk": analysis_result.get("interaction_risk", {}).get("score", 0),
+        "identified_allergens": analysis_result.get("identified_allergens", []),
+        "harmful_additives": analysis_result.get("harmful_additives", []),
+        "nutritional_concerns": analysis_result.get("nutritional_concerns", []),
+        "safety_warnings": analysis_result.get("safety_warnings", []),
+        "findings": analysis_result.get("findings"),
+        "health_profile": analysis_result.get("health_profile"),
+        "ai_summary": analysis_result.get("ai_summary", ""),
+        "ai_recommendations": analysis_result.get("ai_recommendations", []),
+        "confidence_score": analysis_result.get("confidence_score", 0),
+        "ai_status": analysis_result.get("ai_status"),
+        # None (error results) marks the row for the next re-analysis run
+        "analyzer_version": analysis_result.get("analyzer_version")
+    }
+
+
+def risk_analysis_row(product_id: int, analysis_result: dict) -> RiskAnalysis:
+    return RiskAnalysis(product_id=product_id, **risk_analysis_values(analysis_result))
+
+
+def submission_row(product_data: dict, session_id: str, analysis_id: int) -> UserSubmission:
+    return UserSubmission(
+        session_id=session_id,
+        product_name=product_data["product_name"],
+        product_description=product_data.get("product_description", ""),
+        ingredients_text=product_data["ingredients"],
+        analysis_id=analysis_id
+    )
+
+
+def write_analyses(db: Session, items: List[AnalysisItem]) -> List[int]:
+    """
+    Add Product, RiskAnalysis and UserSubmission rows for every item, plus the
+    stats deltas, in the caller's transaction. Returns the new analysis ids;
+    errors propagate so the caller decides whether to roll back. Async callers
+    run it with ``AsyncSession.run_sync``.
+    """
+    products = [product_row(product_data) for product_data, _, _ in items]
+    db.add_all(products)
+    db.flush()
+
+    analyses = [
+        risk_analysis_row(product.id, analysis_result)
+        for product, (_, analysis_result, _) in zip(products, items)
+    ]
+    db.add_all(analyses)
+    db.flush()
+
+    # Keep the stats read model in step with the new rows
+    record_analyses(db, [
+        (analysis.created_at, product_data.get("category"), analysis.risk_level, analysis.overall_risk_score)
+        for analysis, (product_data, _, _) in zip(analyses, items)
+    ])
+
+    db.add_all([
+        submission_row(product_data, session_id, analysis.id)
+        for analysis, (product_data, _, session_id) in zip(analyses, items)
+    ])
+
+    return [analysis.id for analysis in analyses]
+
+
+def products_added(product_cache: Optional[ProductCache], items: List[AnalysisItem]):
+    """Tell the product cache about the Product rows committed for ``items``"""
+    if product_cache is not None:
+        product_cache.products_added(product_data.get("category") for product_data, _, _ in items)
+
+
+async def commit_analyses(items: List[AnalysisItem], product_cache: Optional[ProductCache] = None,
+                          session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+                          operation: str = "batch"):
+    """
+    Write ``items`` in one transaction on a new session, then tell the product
+    cache about the committed rows. Errors roll back and propagate. ``operation``
+    labels the write in the db write metrics.
+    """
+    async with session_factory() as db:
+        start = time.perf_counter()
+        try:
+            await db.run_sync(write_analyses, items)
+            await db.commit()
+            observe_db_write(operation, time.perf_counter() - start)
+        except Exception:
+            await db.rollback()
+            raise
+    products_added(product_cache, items)
+
+
+async def save_analyses_batch(items: List[AnalysisItem], product_cache: Optional[ProductCache] = None) -> List[int]:
+    """
+    Save many analyses in one transaction using a dedicated session. When the
+    transaction fails, each analysis is retried on its own so one bad row does
+    not drop the rest. Returns the positions in ``items`` that were not saved.
+    """
+    try:
+        await commit_analyses(items, product_cache)
+        return []
+    except Exception as e:
+        print(f"Failed to save analysis batch of {len(items)}, retrying rows individually: {e}")
+
+    failed = []
+    for position, item in enumerate(items):
+        try:
+            await commit_analyses([item], product_cache)
+        except Exception as e:
+            print(f"Failed to save analysis to database: {e}")
+            failed.append(position)
+    return failed
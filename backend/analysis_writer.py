@@ -0,0 +1,129 @@
+import os
+import time
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .analysis_store import AnalysisItem, commit_analyses
+from .product_cache import ProductCache
+
+
+class AnalysisWriter:
+    """
+    Write-behind persistence for analysis results.
+
+    Request handlers ``submit`` results to an in-process queue; a single writer
+    task drains it and inserts Product, RiskAnalysis and UserSubmission rows in
+    one transaction per batch, on its own session. A batch is flushed when it
+    reaches ``max_batch_size`` items or ``max_batch_delay`` seconds after its
+    first item, whichever comes first. ``stop`` drains the queue before returning.
+    Committed categories are passed on to ``product_cache`` when one is given.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+                 max_batch_size: Optional[int] = None, max_batch_delay: Optional[float] = None,
+                 max_queue_size: Optional[int] = None, product_cache: Optional[ProductCache] = None):
+        self.session_factory = session_factory
+        self.product_cache = product_cache
+        self.max_batch_size = max_batch_size or int(os.getenv("ANALYSIS_WRITER_BATCH_SIZE", "200"))
+        self.max_batch_delay = max_batch_delay or float(os.getenv("ANALYSIS_WRITER_BATCH_DELAY", "0.5"))
+        self.max_queue_size = max_queue_size or int(os.getenv("ANALYSIS_WRITER_QUEUE_SIZE", "10000"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.batches_flushed = 0
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued, then stop the writer task"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, product_data: dict, analysis_result: dict, session_id: str):
+        """Queue an analysis for persistence; waits only when the queue is full"""
+        if self._task is None:
+            # Not running (e.g. outside the app lifespan) - write through
+            await self._write([(product_data, analysis_result, session_id)])
+            return
+        await self._queue.put((product_data, analysis_result, session_id))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.max_batch_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+
+    async def _write(self, batch: List[AnalysisItem]):
+        start = time.perf_counter()
+        try:
+            await self._commit(batch)
+            self.rows_written += len(batch)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Analysis writer batch of {len(batch)} failed, retrying rows individually: {e}")
+            # Isolate bad rows so one failure doesn't drop the whole batch
+            for item in batch:
+                try:
+                    await self._commit([item])
+                    self.rows_written += 1
+                except Exception as item_error:
+                    self.rows_failed += 1
+                    self.last_error = str(item_error)
+                    print(f"Failed to save analysis to database: {item_error}")
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.batches_flushed += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
+
+    async def _commit(self, items: List[AnalysisItem]):
+        await commit_analyses(items, self.product_cache, self.session_factory, "writer_batch")
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches_flushed": self.batches_flushed,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.batches_flushed, 2) if self.batches_flushed else 0.0,
+            "last_error": self.last_error
+        }
@@ -1,19 +1,144 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./product_analyzer.db")
+# Optional replica for read-heavy endpoints; SQLite reads use read-only connections to the same file
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or None
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+def async_database_url(url: str) -> str:
+    """The same database through its async driver: aiosqlite for SQLite, asyncpg for PostgreSQL"""
+    scheme, separator, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{separator}{rest}"
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{separator}{rest}"
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+ASYNC_DATABASE_READ_URL = os.getenv("ASYNC_DATABASE_READ_URL") or (
+    async_database_url(DATABASE_READ_URL) if DATABASE_READ_URL else None
 )
 
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+# Engine profile
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", "true")
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negative = KiB
+    "temp_store": "MEMORY"
+}
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def _is_sqlite_memory(url: str) -> bool:
+    path = url.partition("://")[2]
+    return path in ("", "/", "/:memory:") or "mode=memory" in path
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool and driver arguments for ``url`` under the configured profile"""
+    if _is_sqlite(url) and _is_sqlite_memory(url):
+        # In-memory databases live in a single connection; pooling does not apply
+        return {} if is_async else {"connect_args": {"check_same_thread": False}}
+
+    options = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING
+    }
+    if _is_sqlite(url):
+        if is_async:
+            # aiosqlite defaults to NullPool, which reopens the file (and re-runs pragmas) per session
+            options["poolclass"] = AsyncAdaptedQueuePool
+        else:
+            options["connect_args"] = {"check_same_thread": False}
+    return options
+
+def _apply_sqlite_pragmas(engine, read_only: bool = False):
+    """Set the SQLite pragmas on every new DBAPI connection"""
+    pragmas = dict(SQLITE_PRAGMAS)
+    if read_only:
+        pragmas["query_only"] = "ON"
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def _create_engine(url: str, read_only: bool = False):
+    engine = create_engine(url, **engine_options(url))
+    if _is_sqlite(url):
+        _apply_sqlite_pragmas(engine, read_only)
+    return engine
+
+def _create_async_engine(url: str, read_only: bool = False):
+    engine = create_async_engine(url, **engine_options(url, is_async=True))
+    if _is_sqlite(url):
+        _apply_sqlite_pragmas(engine.sync_engine, read_only)
+    return engine
+
+def _async_read_engine():
+    """The replica when configured, read-only connections for a SQLite file, otherwise the primary"""
+    if ASYNC_DATABASE_READ_URL:
+        return _create_async_engine(ASYNC_DATABASE_READ_URL, read_only=True)
+    if _is_sqlite(DATABASE_URL) and not _is_sqlite_memory(DATABASE_URL):
+        return _create_async_engine(ASYNC_DATABASE_URL, read_only=True)
+    return async_engine
+
+# Synchronous engine for migrations, create_all and command-line tools
+engine = _create_engine(DATABASE_URL)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
+# Request handlers and background tasks use the async engine so queries never block the event loop
+async_engine = _create_async_engine(ASYNC_DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Read-only endpoints go through this one; it may lag the primary when a replica is configured
+async_read_engine = _async_read_engine()
+
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    async with AsyncReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+def pool_status() -> dict:
+    """Checked-out and idle connections per engine"""
+    engines = {"write": async_engine, "read": async_read_engine}
+    return {
+        name: {"url": engine.url.render_as_string(hide_password=True), "pool": engine.pool.status()}
+        for name, engine in engines.items()
+    }
+
+async def dispose_engines():
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
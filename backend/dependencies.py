@@ -0,0 +1,28 @@
+from fastapi import Request
+
+from .ai_analyzer import AIRiskAnalyzer
+from .rule_engine import RuleEngine
+from .ai_jobs import AIJobRegistry
+from .analysis_writer import AnalysisWriter
+from .product_cache import ProductCache
+from .reanalysis import ReanalysisJob
+
+# Shared services are built once in the app lifespan (see main.py) and live on app.state
+
+def get_analyzer(request: Request) -> AIRiskAnalyzer:
+    return request.app.state.ai_analyzer
+
+def get_rule_engine(request: Request) -> RuleEngine:
+    return request.app.state.rule_engine
+
+def get_ai_jobs(request: Request) -> AIJobRegistry:
+    return request.app.state.ai_jobs
+
+def get_analysis_writer(request: Request) -> AnalysisWriter:
+    return request.app.state.analysis_writer
+
+def get_product_cache(request: Request) -> ProductCache:
+    return request.app.state.product_cache
+
+def get_reanalysis_job(request: Request) -> ReanalysisJob:
+    return request.app.state.reanalysis_job
@@ -0,0 +1,93 @@
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+class IngredientMatcher:
+    """
+    Aho-Corasick automaton over every rule dictionary used by the analyzer.
+
+    Patterns are grouped by category (allergen, additive, interaction, ...) and
+    compiled once. ``match`` walks each ingredient a single time and reports,
+    per category, every pattern that occurs as a substring of the ingredient -
+    the same result as ``pattern in ingredient.lower()`` for each entry.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.categories = list(categories)
+        # pattern id -> (category, pattern); ids follow dictionary order
+        self.patterns: List[Tuple[str, str]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for category, patterns in categories.items():
+            for pattern in patterns:
+                self._add_pattern(category, pattern)
+
+        self._build_failure_links()
+
+    def _add_pattern(self, category: str, pattern: str):
+        if not pattern:
+            return
+
+        state = 0
+        for char in pattern.lower():
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+
+        self._output[state] += (len(self.patterns),)
+        self.patterns.append((category, pattern))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+
+                # Inherit the matches of the longest proper suffix
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def _scan(self, text: str) -> List[int]:
+        """Return the distinct pattern ids found in text, in dictionary order"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        return sorted(found)
+
+    def match(self, ingredients: List[str], normalized: bool = False) -> Dict[str, List[str]]:
+        """
+        Find every dictionary hit across all categories in one pass per ingredient.
+
+        Each pattern is reported at most once per ingredient, so counts line up
+        with the per-ingredient nested loops the analyzers used before. Pass
+        ``normalized=True`` for names that are already lowercase (tokenizer output).
+        """
+        hits: Dict[str, List[str]] = {category: [] for category in self.categories}
+
+        for ingredient in ingredients:
+            for pattern_id in self._scan(ingredient if normalized else ingredient.lower()):
+                category, pattern = self.patterns[pattern_id]
+                hits[category].append(pattern)
+
+        return hits
@@ -0,0 +1,234 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+OPENERS = {"(": ")", "[": "]", "{": "}"}
+CLOSERS = set(OPENERS.values())
+
+# Common additive codes mapped onto the names the rule dictionaries use
+E_NUMBERS = {
+    "e102": "tartrazine",
+    "e110": "sunset yellow",
+    "e129": "red dye 40",
+    "e150d": "caramel color",
+    "e170": "calcium carbonate",
+    "e202": "potassium sorbate",
+    "e211": "sodium benzoate",
+    "e250": "sodium nitrite",
+    "e251": "sodium nitrate",
+    "e300": "ascorbic acid",
+    "e306": "tocopherols",
+    "e320": "bha",
+    "e321": "bht",
+    "e322": "lecithin",
+    "e330": "citric acid",
+    "e407": "carrageenan",
+    "e412": "guar gum",
+    "e415": "xanthan gum",
+    "e471": "mono- and diglycerides of fatty acids",
+    "e500": "sodium bicarbonate",
+    "e621": "monosodium glutamate",
+    "e951": "aspartame",
+    "e955": "sucralose"
+}
+
+# Separators and brackets
+_DELIMITER_RE = re.compile(r"([,;(){}\[\]])")
+_PREFIX_RE = re.compile(r"^\s*ingredients?\s*:?\s*", re.IGNORECASE)
+_PERCENT_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*%")
+_E_NUMBER_RE = re.compile(r"\be\s?-?(\d{3,4}[a-z]?)\b")
+_AND_OR_RE = re.compile(r"\s+and\s*/\s*or\s+")
+_STRIP_CHARS = " .*†‡\t\r\n"
+
+
+class ParsedIngredient(NamedTuple):
+    ingredient_id: int
+    name: str
+    parent: Optional[int]         # index of the enclosing ingredient in the parse, if nested
+    percentage: Optional[float]
+    e_number: Optional[str]
+
+
+class IngredientVocabulary:
+    """
+    Interned canonical ingredient names with stable integer ids.
+
+    Ids are handed out in first-seen order up to ``max_size``; names seen after
+    that get id -1 so user-supplied text cannot grow the table without bound.
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, name: str) -> Tuple[int, str]:
+        """Return (id, interned name) for a canonical name"""
+        ingredient_id = self._ids.get(name)
+        if ingredient_id is not None:
+            return ingredient_id, self._names[ingredient_id]
+
+        with self._lock:
+            ingredient_id = self._ids.get(name)
+            if ingredient_id is None:
+                if len(self._names) >= self.max_size:
+                    return -1, name
+                ingredient_id = len(self._names)
+                self._names.append(name)
+                self._ids[name] = ingredient_id
+        return ingredient_id, self._names[ingredient_id]
+
+    def name(self, ingredient_id: int) -> str:
+        return self._names[ingredient_id]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+class IngredientTokenizer:
+    """
+    Single-pass tokenizer for ingredient statements.
+
+    Handles nested sub-ingredient lists in (), [] and {}, "and/or" alternatives,
+    "contains 2% or less of:" style class prefixes, percentages and E-number
+    codes. Every token becomes a canonical lowercase name interned in the
+    vocabulary; nested tokens point at their parent. Parses are memoized per
+    raw statement in an LRU cache and returned as immutable tuples.
+    """
+
+    def __init__(self, vocabulary: Optional[IngredientVocabulary] = None, cache_size: int = 4096):
+        self.vocabulary = vocabulary or IngredientVocabulary()
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+        # Individual tokens ("sugar", "salt", ...) recur far more often than whole statements
+        self._token_entries = lru_cache(maxsize=cache_size * 8)(self._canonical_token)
+
+    def names(self, text: str) -> List[str]:
+        return [ingredient.name for ingredient in self.parse(text)]
+
+    def top_level(self, text: str) -> List[int]:
+        """For every ingredient in ``names(text)``, the index of its top-level ingredient"""
+        roots: List[int] = []
+        for index, ingredient in enumerate(self.parse(text)):
+            # Parents always precede their sub-ingredients
+            roots.append(index if ingredient.parent is None else roots[ingredient.parent])
+        return roots
+
+    def cache_info(self):
+        return self.parse.cache_info()
+
+    def _parse(self, text: str) -> Tuple[ParsedIngredient, ...]:
+        if not text:
+            return ()
+
+        # (raw token, parent index) in document order
+        raw_tokens: List[Tuple[str, Optional[int]]] = []
+        parent: Optional[int] = None
+        # (expected closer, parent outside the bracket) for every open bracket
+        open_brackets: List[Tuple[str, Optional[int]]] = []
+
+        # split() with a capturing group alternates token, delimiter, token, ...
+        parts = _DELIMITER_RE.split(_PREFIX_RE.sub("", text, count=1))
+        parts.append("")
+        for position in range(0, len(parts) - 1, 2):
+            raw, delimiter = parts[position], parts[position + 1]
+            if delimiter == "," and raw[-1:].isdigit() and parts[position + 2][:1].isdigit():
+                # Decimal comma, as in "milk (3,5%)": carry into the next token
+                parts[position + 2] = raw + delimiter + parts[position + 2]
+                continue
+
+            index = None
+            if raw.strip(_STRIP_CHARS):
+                raw_tokens.append((raw, parent))
+                index = len(raw_tokens) - 1
+
+            if delimiter in OPENERS:
+                if index is None:
+                    # "(...)" straight after a separator belongs to the previous sibling
+                    index = self._last_sibling(raw_tokens, parent)
+                open_brackets.append((OPENERS[delimiter], parent))
+                parent = index
+            elif delimiter in CLOSERS and open_brackets and open_brackets[-1][0] == delimiter:
+                parent = open_brackets.pop()[1]
+
+        return tuple(self._canonicalize(raw_tokens))
+
+    @staticmethod
+    def _last_sibling(raw_tokens: List[Tuple[str, Optional[int]]], parent: Optional[int]) -> Optional[int]:
+        for index in range(len(raw_tokens) - 1, -1, -1):
+            if raw_tokens[index][1] == parent:
+                return index
+        return parent
+
+    def _canonicalize(self, raw_tokens: List[Tuple[str, Optional[int]]]) -> List[ParsedIngredient]:
+        parsed: List[ParsedIngredient] = []
+        # raw token index -> parsed index of the token's (first) ingredient
+        positions: Dict[int, Optional[int]] = {}
+
+        for raw_index, (raw, raw_parent) in enumerate(raw_tokens):
+            parent = positions.get(raw_parent) if raw_parent is not None else None
+            entries, bare_percentage = self._token_entries(raw)
+
+            if not entries:
+                # A bare "(12%)" annotates the enclosing ingredient
+                if bare_percentage is not None and parent is not None and parsed[parent].percentage is None:
+                    parsed[parent] = parsed[parent]._replace(percentage=bare_percentage)
+                positions[raw_index] = parent
+                continue
+
+            positions[raw_index] = len(parsed)
+            for ingredient_id, name, percentage, e_number, nested in entries:
+                parsed.append(ParsedIngredient(
+                    ingredient_id, name, len(parsed) - 1 if nested else parent, percentage, e_number
+                ))
+
+        return parsed
+
+    def _canonical_token(self, raw: str) -> Tuple[Tuple, Optional[float]]:
+        """
+        Canonical entries for one raw token, independent of where it appears:
+        ((ingredient_id, name, percentage, e_number, nested_under_previous), ...)
+        plus the percentage when the token is nothing but a percentage
+        """
+        text = raw.lower()
+
+        # Functional class prefixes: "emulsifier: e322", "contains 2% or less of: salt"
+        if ":" in text:
+            text = text.rsplit(":", 1)[1]
+
+        percentage = None
+        percent_match = _PERCENT_RE.search(text) if "%" in text else None
+        if percent_match:
+            percentage = float(percent_match.group(1).replace(",", "."))
+            text = _PERCENT_RE.sub(" ", text)
+
+        text = " ".join(text.split()).strip(_STRIP_CHARS)
+        if not text:
+            return (), percentage
+
+        entries = []
+        for alternative in (_AND_OR_RE.split(text) if "/" in text else (text,)):
+            entries.extend(self._entries(alternative.strip(_STRIP_CHARS), percentage))
+        return tuple(entries), None
+
+    def _entries(self, text: str, percentage: Optional[float]) -> List[Tuple]:
+        if len(text) < 2:
+            return []
+
+        e_number = None
+        code_match = _E_NUMBER_RE.search(text)
+        if code_match:
+            e_number = f"e{code_match.group(1)}"
+            known_name = E_NUMBERS.get(e_number)
+            if code_match.group(0) == text:
+                # A bare code stands for the additive itself
+                text = known_name or e_number
+            elif known_name:
+                # "flavour enhancer e621": keep the token and add the named additive under it
+                return [
+                    (*self.vocabulary.intern(text), percentage, e_number, False),
+                    (*self.vocabulary.intern(known_name), None, e_number, True)
+                ]
+
+        return [(*self.vocabulary.intern(text), percentage, e_number, False)]
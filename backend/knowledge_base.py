@@ -0,0 +1,423 @@
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import hashlib
+import tempfile
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .ingredient_matcher import IngredientMatcher
+
+BUNDLED_SOURCE = os.path.join(os.path.dirname(__file__), "data", "knowledge_base.json")
+
+MAGIC = b"PRKB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sII")
+SECTION = struct.Struct("<II")
+
+# Section order in the compiled file
+(S_META, S_STRINGS, S_STRING_OFFSETS, S_ENTRIES, S_NAME_INDEX,
+ S_TRANS_START, S_TRANS_CHARS, S_TRANS_NEXT, S_FAIL, S_OUT_START, S_OUTPUTS) = range(11)
+SECTION_COUNT = 11
+
+# (match category, source list key, detail key)
+CATEGORY_SOURCES = [
+    ("allergen", "allergens", None),
+    ("additive", "additives", "concern"),
+    ("interaction", "interactions", "warning")
+]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def load_source(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compile_source(source: Dict) -> bytes:
+    """
+    Compile a knowledge base source document into the binary index format.
+
+    Every name, synonym and E-number becomes a pattern of one Aho-Corasick
+    automaton; patterns resolve to their canonical entry. The automaton,
+    entries and strings are stored as flat little-endian uint32 arrays so a
+    reader can memory-map the file and use it without building anything.
+    """
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def string_id(value: str) -> int:
+        sid = string_ids.get(value)
+        if sid is None:
+            sid = string_ids[value] = len(strings)
+            strings.append(value)
+        return sid
+
+    categories = [category for category, _, _ in CATEGORY_SOURCES]
+    entries: List[Tuple[int, int, int]] = []
+    patterns: Dict[str, List[str]] = {category: [] for category in categories}
+    pattern_entries: Dict[Tuple[str, str], int] = {}
+    names_seen = set()
+
+    for category_index, (category, key, detail_key) in enumerate(CATEGORY_SOURCES):
+        for item in source.get(key, []):
+            name = _normalize(item["name"])
+            if not name:
+                continue
+            if (category, name) in names_seen:
+                raise ValueError(f"Duplicate {category} entry: {name}")
+            names_seen.add((category, name))
+
+            entry_id = len(entries)
+            detail = item.get(detail_key, "") if detail_key else ""
+            entries.append((category_index, string_id(name), string_id(detail)))
+
+            for pattern in [name, *item.get("synonyms", []), *item.get("e_numbers", [])]:
+                pattern = _normalize(pattern)
+                if pattern and (category, pattern) not in pattern_entries:
+                    pattern_entries[(category, pattern)] = entry_id
+                    patterns[category].append(pattern)
+
+    matcher = IngredientMatcher(patterns)
+    pattern_to_entry = [pattern_entries[(category, _normalize(pattern))] for category, pattern in matcher.patterns]
+
+    trans_start, trans_chars, trans_next, out_start, outputs = [0], [], [], [0], []
+    for state, transitions in enumerate(matcher._goto):
+        for char, next_state in sorted(transitions.items(), key=lambda item: ord(item[0])):
+            trans_chars.append(ord(char))
+            trans_next.append(next_state)
+        trans_start.append(len(trans_chars))
+        outputs.extend(sorted({pattern_to_entry[pattern_id] for pattern_id in matcher._output[state]}))
+        out_start.append(len(outputs))
+
+    name_index = sorted(range(len(entries)), key=lambda entry_id: (entries[entry_id][0], strings[entries[entry_id][1]]))
+
+    encoded = [value.encode("utf-8") for value in strings]
+    string_offsets = [0]
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    contamination = source.get("contamination", {})
+    meta = {
+        "version": source.get("version", "unversioned"),
+        "source_sha256": hashlib.sha256(json.dumps(source, sort_keys=True).encode("utf-8")).hexdigest(),
+        "compiled_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "categories": categories,
+        "contamination": {key: [_normalize(value) for value in values] for key, values in contamination.items()},
+        "counts": {
+            "entries": len(entries),
+            "patterns": len(matcher.patterns),
+            "states": len(matcher._goto),
+            **{category: sum(1 for entry in entries if entry[0] == index) for index, category in enumerate(categories)}
+        }
+    }
+
+    def u32(values) -> bytes:
+        return struct.pack(f"<{len(values)}I", *values)
+
+    sections = [
+        json.dumps(meta).encode("utf-8"),
+        b"".join(encoded),
+        u32(string_offsets),
+        u32([value for entry in entries for value in entry]),
+        u32(name_index),
+        u32(trans_start),
+        u32(trans_chars),
+        u32(trans_next),
+        u32(matcher._fail),
+        u32(out_start),
+        u32(outputs)
+    ]
+
+    offset = HEADER.size + SECTION.size * SECTION_COUNT
+    table, body = [], []
+    for section in sections:
+        padding = -offset % 4  # keep every uint32 section aligned
+        body.append(b"\0" * padding)
+        offset += padding
+        table.append(SECTION.pack(offset, len(section)))
+        body.append(section)
+        offset += len(section)
+
+    return HEADER.pack(MAGIC, FORMAT_VERSION, SECTION_COUNT) + b"".join(table) + b"".join(body)
+
+
+def compile_file(source_path: str, output_path: str) -> Dict:
+    """Compile ``source_path`` and atomically replace ``output_path``; returns the index info"""
+    data = compile_source(load_source(source_path))
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(prefix=".kb-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # Readers see either the old file or the new one, never a partial write
+        os.replace(temp_path, output_path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    return KnowledgeBase(data, output_path).info()
+
+
+class KnowledgeBase:
+    """
+    Read-only view over a compiled knowledge base.
+
+    Works on any buffer; ``open`` memory-maps the file so every worker shares
+    the same physical pages and startup costs a header parse. Automaton states
+    are decoded into dicts lazily the first time a scan reaches them, and scan
+    results are memoized per ingredient name.
+    """
+
+    def __init__(self, buffer, path: Optional[str] = None, scan_cache_size: int = 65536):
+        if sys.byteorder != "little":
+            raise RuntimeError("Compiled knowledge bases are little-endian")
+
+        magic, format_version, section_count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION or section_count != SECTION_COUNT:
+            raise ValueError(f"Not a format {FORMAT_VERSION} knowledge base: {path or '<buffer>'}")
+
+        self.path = path
+        self.size = len(buffer)
+        self._buffer = buffer
+        view = memoryview(buffer)
+        sections = [SECTION.unpack_from(buffer, HEADER.size + SECTION.size * index) for index in range(SECTION_COUNT)]
+
+        def raw(index: int) -> memoryview:
+            offset, length = sections[index]
+            return view[offset:offset + length]
+
+        self.meta = json.loads(bytes(raw(S_META)).decode("utf-8"))
+        self.version = self.meta["version"]
+        self.categories: List[str] = self.meta["categories"]
+        self.contamination: Dict[str, List[str]] = self.meta["contamination"]
+
+        self._strings = raw(S_STRINGS)
+        self._string_offsets = raw(S_STRING_OFFSETS).cast("I")
+        self._entries = raw(S_ENTRIES).cast("I")
+        self._name_index = raw(S_NAME_INDEX).cast("I")
+        self._trans_start = raw(S_TRANS_START).cast("I")
+        self._trans_chars = raw(S_TRANS_CHARS).cast("I")
+        self._trans_next = raw(S_TRANS_NEXT).cast("I")
+        self._fail = raw(S_FAIL).cast("I")
+        self._out_start = raw(S_OUT_START).cast("I")
+        self._outputs = raw(S_OUTPUTS).cast("I")
+
+        self._goto: Dict[int, Dict[str, int]] = {}
+        self._entry_cache: Dict[int, Tuple[str, str]] = {}
+        self._scan = lru_cache(maxsize=scan_cache_size)(self._scan_entries)
+        self.detail = lru_cache(maxsize=scan_cache_size)(self._detail)
+
+    @classmethod
+    def open(cls, path: str) -> "KnowledgeBase":
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path)
+
+    @classmethod
+    def from_source(cls, source: Dict) -> "KnowledgeBase":
+        """Compile in memory - used for the small bundled source when no index is configured"""
+        return cls(compile_source(source))
+
+    def _string(self, string_id: int) -> str:
+        return str(self._strings[self._string_offsets[string_id]:self._string_offsets[string_id + 1]], "utf-8")
+
+    def _entry(self, entry_id: int) -> Tuple[str, str]:
+        """(category, canonical name) for an entry"""
+        entry = self._entry_cache.get(entry_id)
+        if entry is None:
+            base = entry_id * 3
+            entry = (self.categories[self._entries[base]], self._string(self._entries[base + 1]))
+            self._entry_cache[entry_id] = entry
+        return entry
+
+    def _transitions(self, state: int) -> Dict[str, int]:
+        transitions = self._goto.get(state)
+        if transitions is None:
+            start, end = self._trans_start[state], self._trans_start[state + 1]
+            transitions = {
+                chr(self._trans_chars[index]): self._trans_next[index] for index in range(start, end)
+            }
+            self._goto[state] = transitions
+        return transitions
+
+    def _scan_entries(self, text: str) -> Tuple[int, ...]:
+        """Distinct entry ids whose patterns occur in text, in entry order"""
+        fail, out_start, outputs = self._fail, self._out_start, self._outputs
+        goto = self._goto
+        found = set()
+        state = 0
+
+        for char in text:
+            while True:
+                transitions = goto.get(state)
+                if transitions is None:
+                    transitions = self._transitions(state)
+                next_state = transitions.get(char)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            start, end = out_start[state], out_start[state + 1]
+            if start != end:
+                found.update(outputs[start:end])
+
+        return tuple(sorted(found))
+
+    def match(self, ingredients: List[str], normalized: bool = False,
+              groups: Optional[Sequence[int]] = None) -> Dict[str, List[str]]:
+        """
+        Canonical entry names found in each ingredient, per category - the same
+        shape as ``IngredientMatcher.match``. Synonyms and E-numbers resolve to
+        their entry, which is reported at most once per ingredient, or with
+        ``groups`` (a group key per ingredient) at most once per group.
+        """
+        hits: Dict[str, List[str]] = {category: [] for category in self.categories}
+        seen = set()
+
+        for position, ingredient in enumerate(ingredients):
+            for entry_id in self._scan(ingredient if normalized else ingredient.lower()):
+                if groups is not None:
+                    key = (groups[position], entry_id)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                category, name = self._entry(entry_id)
+                hits[category].append(name)
+
+        return hits
+
+    def _detail(self, category: str, name: str) -> Optional[str]:
+        """The concern/warning text for an entry, found by binary search over the name index"""
+        category_index = self.categories.index(category)
+        name_index, entries = self._name_index, self._entries
+
+        def key(position: int) -> Tuple[int, str]:
+            entry_id = name_index[position]
+            return entries[entry_id * 3], self._string(entries[entry_id * 3 + 1])
+
+        low, high = 0, len(name_index)
+        while low < high:
+            middle = (low + high) // 2
+            if key(middle) < (category_index, name):
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < len(name_index) and key(low) == (category_index, name):
+            return self._string(entries[name_index[low] * 3 + 2])
+        return None
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "size_bytes": self.size,
+            "source_sha256": self.meta["source_sha256"],
+            "compiled_at": self.meta["compiled_at"],
+            "counts": self.meta["counts"]
+        }
+
+
+class KnowledgeBaseStore:
+    """
+    Holds the active KnowledgeBase and swaps in new index versions.
+
+    With ``path`` set, the file's identity is re-checked at most every
+    ``check_interval`` seconds when the knowledge base is accessed; a changed
+    file is opened and swapped in with a single reference assignment, so an
+    analysis in flight keeps the version it started with. Without a path the
+    bundled source is compiled in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._signature = None
+        self._next_check = time.monotonic() + check_interval
+        self._knowledge_base = self._load()
+
+    @classmethod
+    def from_env(cls) -> "KnowledgeBaseStore":
+        return cls(
+            path=os.getenv("KNOWLEDGE_BASE_PATH") or None,
+            check_interval=float(os.getenv("KNOWLEDGE_BASE_RELOAD_INTERVAL", "5"))
+        )
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> KnowledgeBase:
+        if self.path:
+            try:
+                self._signature = self._file_signature()
+                return KnowledgeBase.open(self.path)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Failed to open knowledge base {self.path}, using the bundled source: {e}")
+        return KnowledgeBase.from_source(load_source(BUNDLED_SOURCE))
+
+    @property
+    def knowledge_base(self) -> KnowledgeBase:
+        if self.path and self.check_interval > 0:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self.check_interval
+                self.reload(force=False)
+        return self._knowledge_base
+
+    def reload(self, force: bool = True) -> bool:
+        """Open the index again if it changed (or unconditionally with ``force``); True when swapped"""
+        if not self.path:
+            return False
+        try:
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return False
+            knowledge_base = KnowledgeBase.open(self.path)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Knowledge base reload failed, keeping version {self._knowledge_base.version}: {e}")
+            return False
+
+        # The previous mapping is released once the last analysis using it finishes
+        self._knowledge_base = knowledge_base
+        self._signature = signature
+        self.reloads += 1
+        self.last_error = None
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            **self._knowledge_base.info(),
+            "reloads": self.reloads,
+            "last_error": self.last_error
+        }
+
+
+if __name__ == "__main__":
+    # python -m backend.knowledge_base compile <source.json> <output.kb>
+    # python -m backend.knowledge_base info <index.kb>
+    if len(sys.argv) == 4 and sys.argv[1] == "compile":
+        start = time.perf_counter()
+        info = compile_file(sys.argv[2], sys.argv[3])
+        print(json.dumps(info, indent=2))
+        print(f"Compiled in {time.perf_counter() - start:.2f}s")
+    elif len(sys.argv) == 3 and sys.argv[1] == "info":
+        print(json.dumps(KnowledgeBase.open(sys.argv[2]).info(), indent=2))
+    else:
+        print("usage: python -m backend.knowledge_base compile <source.json> <output.kb>")
+        print("       python -m backend.knowledge_base info <index.kb>")
+        sys.exit(1)
@@ -0,0 +1,216 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+def _normalize(value):
+    """Canonical form: trimmed lowercase strings, float numbers, sorted keys and string lists"""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value.strip().lower())
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k).strip().lower(): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [_normalize(v) for v in value]
+        if all(isinstance(v, str) for v in items):
+            items = sorted(items)
+        return items
+    return str(value)
+
+
+def canonical_key(product_data: Dict, health_profile: Optional[Dict], model: str, prompt_version: str) -> str:
+    """
+    Content-addressed cache key for an AI analysis.
+
+    Keys look like ``<prompt_version>:<model>:<sha256>`` so stale entries can be
+    purged by prefix when the prompt or model changes.
+    """
+    payload = json.dumps(
+        {"product": _normalize(product_data or {}), "profile": _normalize(health_profile or {})},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{prompt_version}:{model}:{digest}"
+
+
+class MemoryLRUCache:
+    """
+    Bounded in-memory LRU tier with per-entry TTL, counted from when an entry was
+    stored here. ``purge(older_than=...)`` goes by the entry's original creation
+    time, which for entries promoted from disk is their disk timestamp.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (stored_at, created_at, value)
+        self._entries: "OrderedDict[str, Tuple[float, float, Dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry[0] > self.ttl_seconds:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, key: str, value: Dict, created_at: Optional[float] = None):
+        now = time.time()
+        self._entries[key] = (now, created_at if created_at is not None else now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        return self._entries.pop(key, None) is not None
+
+    def purge(self, prefix: Optional[str] = None, older_than: Optional[float] = None) -> int:
+        cutoff = time.time() - older_than if older_than is not None else None
+        doomed = [
+            key for key, (_, created_at, _) in self._entries.items()
+            if (prefix is None or key.startswith(prefix)) and (cutoff is None or created_at < cutoff)
+        ]
+        for key in doomed:
+            del self._entries[key]
+        return len(doomed)
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class SQLiteCache:
+    """Persistent tier backed by a single SQLite table; survives restarts"""
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_created_at ON llm_cache (created_at)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[float, Dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return row[1], json.loads(row[0])
+
+    def set(self, key: str, value: Dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time())
+            )
+            self._conn.commit()
+
+    def purge(self, prefix: Optional[str] = None, older_than: Optional[float] = None) -> int:
+        clauses, params = [], []
+        if prefix is not None:
+            # substr() rather than LIKE so '_' and '%' in a prefix are literal
+            clauses.append("substr(key, 1, ?) = ?")
+            params.extend([len(prefix), prefix])
+        if older_than is not None:
+            clauses.append("created_at < ?")
+            params.append(time.time() - older_than)
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM llm_cache{where}", params)
+            self._conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache for AI analysis responses: memory LRU in front of SQLite.
+
+    Disk hits are promoted into memory, keeping their disk timestamp. Disk access,
+    including purges and stats, runs in a worker thread so it never blocks the
+    event loop.
+    """
+
+    def __init__(self, memory: Optional[MemoryLRUCache] = None, disk: Optional[SQLiteCache] = None):
+        self.memory = memory or MemoryLRUCache()
+        self.disk = disk
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        if os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+            return cls(memory=MemoryLRUCache(max_entries=0))
+
+        memory = MemoryLRUCache(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "3600"))
+        )
+        disk_path = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+        disk = SQLiteCache(disk_path, ttl_seconds=float(os.getenv("LLM_CACHE_DISK_TTL", str(7 * 24 * 3600)))) if disk_path else None
+        return cls(memory=memory, disk=disk)
+
+    async def get(self, key: str) -> Optional[Dict]:
+        value = self.memory.get(key)
+        if value is not None or self.disk is None:
+            return value
+
+        entry = await asyncio.to_thread(self.disk.get, key)
+        if entry is None:
+            return None
+
+        created_at, value = entry
+        self.memory.set(key, value, created_at)
+        return value
+
+    async def set(self, key: str, value: Dict):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    async def purge(self, prefix: Optional[str] = None, older_than: Optional[float] = None) -> Dict:
+        return {
+            "memory": self.memory.purge(prefix, older_than),
+            "disk": await asyncio.to_thread(self.disk.purge, prefix, older_than) if self.disk is not None else 0
+        }
+
+    async def stats(self) -> Dict:
+        return {
+            "memory": self.memory.stats(),
+            "disk": await asyncio.to_thread(self.disk.stats) if self.disk is not None else None
+        }
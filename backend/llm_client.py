@@ -0,0 +1,244 @@
+import os
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import httpx
+
+from .metrics import observe_llm_request
+from .prompt_builder import count_tokens
+
+SYSTEM_PROMPT = "You are a food safety and nutrition expert. Provide accurate, evidence-based analysis."
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    provider: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_ms: float = 0.0
+
+
+@dataclass
+class ProviderSettings:
+    api_key: str
+    model: str
+    base_url: Optional[str] = None
+    max_concurrency: int = 8
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    max_tokens: Optional[int] = None
+
+
+class LLMProviderError(Exception):
+    """Raised when a provider returns a non-success response"""
+
+
+class LLMProvider:
+    """
+    Base class for an async LLM vendor.
+
+    Every provider sends through the pool's shared keep-alive ``httpx.AsyncClient``,
+    applies per-call connect/read timeouts and never has more than
+    ``max_concurrency`` requests in flight.
+    """
+
+    name = "base"
+    default_base_url = ""
+
+    def __init__(self, settings: ProviderSettings, http_client: httpx.AsyncClient):
+        self.settings = settings
+        self.http_client = http_client
+        self.base_url = (settings.base_url or self.default_base_url).rstrip("/")
+        self._semaphore = asyncio.Semaphore(settings.max_concurrency)
+        self.in_flight = 0
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.settings.read_timeout, connect=self.settings.connect_timeout)
+
+    async def complete(self, prompt: str, system: str = SYSTEM_PROMPT,
+                       max_tokens: Optional[int] = None) -> LLMResponse:
+        """``max_tokens`` overrides the provider setting for this call"""
+        async with self._semaphore:
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                response = await self._send(prompt, system, max_tokens or self.settings.max_tokens)
+            except Exception:
+                observe_llm_request(self.name, self.settings.model, time.perf_counter() - start, "error")
+                raise
+            finally:
+                self.in_flight -= 1
+            elapsed = time.perf_counter() - start
+            response.latency_ms = elapsed * 1000
+            # Count locally when the provider reports no usage
+            if not response.input_tokens:
+                response.input_tokens = count_tokens(system) + count_tokens(prompt)
+            if not response.output_tokens:
+                response.output_tokens = count_tokens(response.text)
+            observe_llm_request(self.name, self.settings.model, elapsed, "success",
+                                response.input_tokens, response.output_tokens)
+            return response
+
+    async def _post(self, path: str, headers: Dict[str, str], payload: Dict) -> Dict:
+        response = await self.http_client.post(
+            f"{self.base_url}{path}", headers=headers, json=payload, timeout=self.timeout
+        )
+        if response.status_code >= 400:
+            raise LLMProviderError(f"{self.name} returned {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    async def _send(self, prompt: str, system: str, max_tokens: Optional[int]) -> LLMResponse:
+        raise NotImplementedError
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+    default_base_url = "https://api.openai.com/v1"
+
+    async def _send(self, prompt: str, system: str, max_tokens: Optional[int]) -> LLMResponse:
+        payload = {
+            "model": self.settings.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3
+        }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+
+        data = await self._post(
+            "/chat/completions",
+            {"Authorization": f"Bearer {self.settings.api_key}"},
+            payload
+        )
+
+        usage = data.get("usage") or {}
+        return LLMResponse(
+            text=data["choices"][0]["message"]["content"],
+            provider=self.name,
+            model=self.settings.model,
+            input_tokens=usage.get("prompt_tokens", 0),
+            output_tokens=usage.get("completion_tokens", 0)
+        )
+
+
+class AnthropicProvider(LLMProvider):
+    name = "anthropic"
+    default_base_url = "https://api.anthropic.com/v1"
+
+    async def _send(self, prompt: str, system: str, max_tokens: Optional[int]) -> LLMResponse:
+        data = await self._post(
+            "/messages",
+            {"x-api-key": self.settings.api_key, "anthropic-version": "2023-06-01"},
+            {
+                "model": self.settings.model,
+                "max_tokens": max_tokens or 1000,
+                "system": system,
+                "messages": [{"role": "user", "content": prompt}]
+            }
+        )
+
+        usage = data.get("usage") or {}
+        return LLMResponse(
+            text=data["content"][0]["text"],
+            provider=self.name,
+            model=self.settings.model,
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0)
+        )
+
+
+PROVIDER_CLASSES = {
+    OpenAIProvider.name: OpenAIProvider,
+    AnthropicProvider.name: AnthropicProvider
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def provider_settings_from_env() -> Dict[str, ProviderSettings]:
+    """Build settings for every provider that has an API key configured, in preference order"""
+    connect_timeout = _env_float("LLM_CONNECT_TIMEOUT", 5.0)
+    read_timeout = _env_float("LLM_READ_TIMEOUT", 30.0)
+    max_concurrency = _env_int("LLM_MAX_CONCURRENCY", 8)
+    max_output_tokens = _env_int("LLM_MAX_OUTPUT_TOKENS", 400)
+
+    defaults = {
+        "openai": "gpt-4",
+        "anthropic": "claude-3-sonnet-20240229"
+    }
+
+    settings = {}
+    for name, default_model in defaults.items():
+        prefix = name.upper()
+        api_key = os.getenv(f"{prefix}_API_KEY")
+        if not api_key:
+            continue
+        settings[name] = ProviderSettings(
+            api_key=api_key,
+            model=os.getenv(f"{prefix}_MODEL", default_model),
+            base_url=os.getenv(f"{prefix}_BASE_URL") or None,
+            max_concurrency=_env_int(f"{prefix}_MAX_CONCURRENCY", max_concurrency),
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            max_tokens=_env_int(f"{prefix}_MAX_TOKENS", max_output_tokens)
+        )
+    return settings
+
+
+class LLMClientPool:
+    """
+    Owns the shared HTTP connection pool and the configured providers.
+
+    Pass ``transport`` (e.g. ``httpx.MockTransport`` or ``httpx.ASGITransport``)
+    to route every vendor call to a local stub instead of the network.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, ProviderSettings]] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.settings = provider_settings_from_env() if settings is None else settings
+        self.transport = transport
+        self.limits = httpx.Limits(
+            max_connections=_env_int("LLM_MAX_CONNECTIONS", 50),
+            max_keepalive_connections=_env_int("LLM_MAX_KEEPALIVE", 20),
+            keepalive_expiry=_env_float("LLM_KEEPALIVE_EXPIRY", 30.0)
+        )
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._providers: Optional[Dict[str, LLMProvider]] = None
+
+    @property
+    def providers(self) -> Dict[str, LLMProvider]:
+        # Built lazily so the AsyncClient is created inside the running event loop
+        if self._providers is None:
+            self._http_client = httpx.AsyncClient(limits=self.limits, transport=self.transport)
+            self._providers = {
+                name: PROVIDER_CLASSES[name](settings, self._http_client)
+                for name, settings in self.settings.items()
+            }
+        return self._providers
+
+    def provider_names(self) -> List[str]:
+        return list(self.settings)
+
+    def get(self, name: str) -> Optional[LLMProvider]:
+        return self.providers.get(name)
+
+    async def aclose(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._providers = None
@@ -0,0 +1,245 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional
+
+from .llm_client import LLMClientPool, LLMResponse
+from .metrics import observe_llm_routing
+
+
+class LatencyTracker:
+    """Rolling window of one provider's successful call latencies"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The ``q`` quantile (0-1), or None until ``min_samples`` calls have been seen"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Per-provider breaker.
+
+    Closed until ``failure_threshold`` consecutive failures - errors, or calls
+    slower than ``slow_seconds`` whether they finished or were abandoned. Open
+    for ``cooldown_seconds``, then half-open: a single probe goes through and
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 5, slow_seconds: float = 15, cooldown_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.slow_seconds = slow_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Whether a call may start now; in half-open state this claims the single probe"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self, seconds: float, scale: float = 1.0):
+        if seconds > self.slow_seconds * scale:
+            self.record_failure()
+            return
+        self.probing = False
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.probing = False
+        self.consecutive_failures += 1
+        if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+
+    def record_abandoned(self, seconds: float, scale: float = 1.0):
+        """A call cancelled because another provider answered first or the budget ran out"""
+        if seconds > self.slow_seconds * scale:
+            self.record_failure()
+        else:
+            self.probing = False
+
+
+class LLMRouter:
+    """
+    Latency-budgeted routing over the configured providers, in preference order.
+
+    The first provider whose breaker allows it gets the call. If it has not
+    answered within its ``hedge_percentile`` latency (``hedge_delay`` until
+    enough calls have been seen), a hedged request goes to the next provider and
+    whichever answers first wins; the other is cancelled. A failed call moves on
+    to the next provider straight away. Once ``budget_seconds`` have passed,
+    everything still running is cancelled and ``complete`` returns None, so the
+    caller degrades to its default response.
+
+    ``scale`` on a call stretches its budget, hedge delay and slow threshold, for
+    requests expected to take longer than a single analysis (packed prompts).
+    """
+
+    def __init__(self, clients: LLMClientPool, budget_seconds: float = 20, hedge_percentile: float = 0.95,
+                 hedge_delay: float = 3.0, hedge_min_delay: float = 0.5, failure_threshold: int = 5,
+                 slow_seconds: float = 15, cooldown_seconds: float = 30):
+        self.clients = clients
+        self.budget_seconds = budget_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.latency = {name: LatencyTracker() for name in clients.provider_names()}
+        self.breakers = {
+            name: CircuitBreaker(failure_threshold, slow_seconds, cooldown_seconds)
+            for name in clients.provider_names()
+        }
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+        self.unavailable = 0
+
+    @classmethod
+    def from_env(cls, clients: LLMClientPool) -> "LLMRouter":
+        return cls(
+            clients,
+            budget_seconds=float(os.getenv("LLM_REQUEST_BUDGET", "20")),
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")) / 100,
+            hedge_delay=float(os.getenv("LLM_HEDGE_DELAY", "3")),
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5")),
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            slow_seconds=float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "15")),
+            cooldown_seconds=float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+        )
+
+    def hedge_after(self, name: str, scale: float = 1.0) -> float:
+        """Seconds to wait on ``name`` before hedging to the next provider"""
+        observed = self.latency[name].percentile(self.hedge_percentile)
+        delay = self.hedge_delay if observed is None else observed
+        return max(delay, self.hedge_min_delay) * scale
+
+    async def complete(self, prompt: str, max_tokens: Optional[int] = None,
+                       scale: float = 1.0) -> Optional[LLMResponse]:
+        """The first successful response within the budget, or None"""
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.budget_seconds * scale
+        remaining: List[str] = self.clients.provider_names()
+        running: Dict[asyncio.Task, str] = {}
+        last_launch = {"name": None, "at": 0.0}
+
+        def launch() -> bool:
+            while remaining:
+                name = remaining.pop(0)
+                if self.breakers[name].allow():
+                    running[asyncio.create_task(self._attempt(name, prompt, max_tokens, scale))] = name
+                    last_launch.update(name=name, at=loop.time())
+                    return True
+            return False
+
+        if not launch():
+            self.unavailable += 1
+            observe_llm_routing("all", "unavailable")
+            return None
+
+        first = last_launch["name"]
+        try:
+            while running:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                timeout = deadline - now
+                hedge_at = None
+                if remaining:
+                    hedge_at = last_launch["at"] + self.hedge_after(last_launch["name"], scale)
+                    timeout = min(timeout, max(hedge_at - now, 0))
+
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is None:
+                        if name != first:
+                            self.hedge_wins += 1
+                            observe_llm_routing(name, "hedge_won")
+                        return task.result()
+                    print(f"AI service error ({name}): {task.exception()}")
+
+                if not running:
+                    # Everything in flight failed: move on without waiting for the hedge point
+                    if not launch():
+                        break
+                elif not done and hedge_at is not None and loop.time() >= hedge_at:
+                    hedged_from = last_launch["name"]
+                    if launch():
+                        self.hedged += 1
+                        observe_llm_routing(hedged_from, "hedged")
+
+            if running:
+                self.budget_exhausted += 1
+                observe_llm_routing(first, "budget_exhausted")
+            else:
+                self.unavailable += 1
+                observe_llm_routing("all", "unavailable")
+            return None
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _attempt(self, name: str, prompt: str, max_tokens: Optional[int], scale: float) -> LLMResponse:
+        breaker = self.breakers[name]
+        start = time.perf_counter()
+        try:
+            response = await self.clients.get(name).complete(prompt, max_tokens=max_tokens)
+        except asyncio.CancelledError:
+            breaker.record_abandoned(time.perf_counter() - start, scale)
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        elapsed = time.perf_counter() - start
+        self.latency[name].record(elapsed / scale)
+        breaker.record_success(elapsed, scale)
+        return response
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "unavailable": self.unavailable,
+            "budget_seconds": self.budget_seconds,
+            "providers": {
+                name: {
+                    "state": breaker.state,
+                    "consecutive_failures": breaker.consecutive_failures,
+                    "trips": breaker.trips,
+                    "hedge_after_seconds": round(self.hedge_after(name), 3),
+                    "latency_samples": len(self.latency[name].samples)
+                }
+                for name, breaker in self.breakers.items()
+            }
+        }
@@ -1,25 +1,58 @@
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
+from contextlib import asynccontextmanager
 import uvicorn
 import os
 from dotenv import load_dotenv
 
-from .database import engine, SessionLocal
+from .database import engine, dispose_engines
 from .models import Base
-from .routers import products, analysis
+from .migrations import run_migrations
+from .routers import products, analysis, admin
 from .ai_analyzer import AIRiskAnalyzer
+from .rule_engine import RuleEngine
+from .knowledge_base import KnowledgeBaseStore
+from .ai_jobs import AIJobRegistry
+from .analysis_writer import AnalysisWriter
+from .product_cache import ProductCache
+from .reanalysis import ReanalysisJob
+from .metrics import MetricsMiddleware, registry as metrics_registry
 
 load_dotenv()
 
-# Create database tables
+# Create database tables and bring existing ones up to date
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared services, built once per process and injected via backend.dependencies
+    knowledge_base_store = KnowledgeBaseStore.from_env()
+    app.state.ai_analyzer = AIRiskAnalyzer(knowledge_base_store=knowledge_base_store)
+    app.state.rule_engine = RuleEngine(knowledge_base_store)
+    app.state.ai_jobs = AIJobRegistry()
+    app.state.product_cache = ProductCache.from_env()
+    app.state.analysis_writer = AnalysisWriter(product_cache=app.state.product_cache)
+    app.state.reanalysis_job = ReanalysisJob(app.state.ai_analyzer)
+    app.state.analysis_writer.start()
+    if os.getenv("REANALYSIS_AUTO_RESUME", "true").lower() in ("1", "true", "yes"):
+        await app.state.reanalysis_job.resume_interrupted()
+    
+    yield
+    
+    await app.state.reanalysis_job.shutdown()
+    await app.state.ai_jobs.shutdown(float(os.getenv("AI_JOBS_SHUTDOWN_TIMEOUT", "10")))
+    await app.state.analysis_writer.stop()
+    await app.state.ai_analyzer.aclose()
+    await dispose_engines()
 
 app = FastAPI(
     title="Consumable Product Risk Analyzer",
     description="AI-powered analysis of consumable products for health and safety risks",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -29,11 +62,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Per-route request counts and durations for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(products.router, prefix="/api/products", tags=["products"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 # Serve static files (React build)
 if os.path.exists("../frontend/build"):
@@ -43,6 +81,11 @@ if os.path.exists("../frontend/build"):
     async def serve_frontend():
         return FileResponse("../frontend/build/index.html")
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "message": "Consumable Product Risk Analyzer API"}
@@ -0,0 +1,230 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans sub-millisecond rule stages up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, one series per label-value tuple"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram. ``observe`` only bumps one bucket counter;
+    the cumulative sums Prometheus expects are built at scrape time.
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+
+        lines = []
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+ANALYZER_STAGE_SECONDS = registry.histogram(
+    "analyzer_stage_duration_seconds", "Time spent in each analyzer stage", ["stage"]
+)
+LLM_REQUEST_SECONDS = registry.histogram(
+    "llm_request_duration_seconds", "LLM provider request latency", ["provider", "model"]
+)
+LLM_REQUESTS = registry.counter(
+    "llm_requests_total", "LLM provider requests by outcome", ["provider", "outcome"]
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "LLM tokens used", ["provider", "direction"]
+)
+LLM_CALL_TOKENS = registry.histogram(
+    "llm_call_tokens", "Tokens per LLM call", ["provider", "direction"],
+    buckets=(50, 100, 200, 400, 800, 1600, 3200, 6400, 12800)
+)
+LLM_ROUTING_EVENTS = registry.counter(
+    "llm_routing_events_total", "Hedged requests, hedge wins, exhausted budgets and unavailable providers",
+    ["provider", "event"]
+)
+DB_WRITE_SECONDS = registry.histogram(
+    "db_write_duration_seconds", "Analysis persistence latency per transaction", ["operation"]
+)
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route template, method and status", ["route", "method", "status"]
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request duration by route template", ["route", "method"]
+)
+
+
+def timed_stage(stage: str):
+    """Record an async analyzer stage's duration in ANALYZER_STAGE_SECONDS"""
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                ANALYZER_STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorator
+
+
+def observe_db_write(operation: str, seconds: float):
+    if METRICS_ENABLED:
+        DB_WRITE_SECONDS.observe(seconds, operation)
+
+
+def observe_llm_request(provider: str, model: str, seconds: float, outcome: str,
+                        input_tokens: int = 0, output_tokens: int = 0):
+    if not METRICS_ENABLED:
+        return
+    LLM_REQUEST_SECONDS.observe(seconds, provider, model)
+    LLM_REQUESTS.inc(provider, outcome)
+    if input_tokens:
+        LLM_TOKENS.inc(provider, "input", amount=input_tokens)
+        LLM_CALL_TOKENS.observe(input_tokens, provider, "input")
+    if output_tokens:
+        LLM_TOKENS.inc(provider, "output", amount=output_tokens)
+        LLM_CALL_TOKENS.observe(output_tokens, provider, "output")
+
+
+def observe_llm_routing(provider: str, event: str):
+    if METRICS_ENABLED:
+        LLM_ROUTING_EVENTS.inc(provider, event)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware counting requests and durations per route template
+    (e.g. ``/api/analysis/analysis/{analysis_id}``), so label cardinality stays
+    bounded. Streaming responses are timed until their last body chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status: Optional[int] = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, route_path, method)
+            HTTP_REQUESTS.inc(route_path, method, str(status or 500))
@@ -0,0 +1,90 @@
+from datetime import datetime
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .analysis_stats import rebuild_stats
+from .product_search import create_search_index
+
+# (version, description, steps) - append new steps, never edit applied ones.
+# Base.metadata.create_all() builds fresh databases with the current schema; these
+# steps bring databases created by older releases up to date and must be idempotent.
+# A step is either a SQL string or a callable taking the migration connection.
+MIGRATIONS = [
+    (1, "Add lookup and keyset pagination indexes", [
+        "CREATE INDEX IF NOT EXISTS ix_user_submissions_analysis_id ON user_submissions (analysis_id)",
+        "CREATE INDEX IF NOT EXISTS ix_risk_analyses_created_at_id ON risk_analyses (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_risk_analyses_risk_level ON risk_analyses (risk_level)",
+        "CREATE INDEX IF NOT EXISTS ix_risk_analyses_product_id ON risk_analyses (product_id)",
+        "CREATE INDEX IF NOT EXISTS ix_products_barcode ON products (barcode)",
+    ]),
+    (2, "Backfill analysis statistics", [
+        rebuild_stats,
+    ]),
+    (3, "Add full-text product search index", [
+        create_search_index,
+    ]),
+    (4, "Add profile-independent findings to risk analyses", [
+        lambda conn: _add_column(conn, "risk_analyses", "findings", "JSON"),
+    ]),
+    (5, "Make product barcodes unique", [
+        "UPDATE products SET barcode = NULL WHERE barcode = ''",
+        lambda conn: _clear_duplicate_barcodes(conn),
+        "DROP INDEX IF EXISTS ix_products_barcode",
+        "CREATE UNIQUE INDEX ix_products_barcode ON products (barcode)",
+    ]),
+    (6, "Store the health profile with each analysis for re-analysis", [
+        lambda conn: _add_column(conn, "risk_analyses", "health_profile", "JSON"),
+    ]),
+    (7, "Track the deferred AI phase status of two-phase analyses", [
+        lambda conn: _add_column(conn, "risk_analyses", "ai_status", "VARCHAR(20)"),
+    ]),
+    (8, "Count re-analysis rows skipped for lack of a stored health profile", [
+        lambda conn: _add_column(conn, "reanalysis_checkpoints", "skipped", "INTEGER NOT NULL DEFAULT 0"),
+    ]),
+]
+
+def _add_column(conn, table: str, column: str, column_type: str):
+    """ALTER TABLE ... ADD COLUMN unless create_all() already built it"""
+    if column not in {existing["name"] for existing in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+
+def _clear_duplicate_barcodes(conn):
+    """Keep each barcode on its oldest product - the row barcode lookups returned so far"""
+    duplicates = conn.execute(text(
+        "SELECT id, barcode FROM products p WHERE barcode IS NOT NULL AND EXISTS "
+        "(SELECT 1 FROM products q WHERE q.barcode = p.barcode AND q.id < p.id)"
+    )).all()
+    for product_id, barcode in duplicates:
+        print(f"Clearing duplicate barcode {barcode} from product {product_id}")
+    if duplicates:
+        conn.execute(
+            text("UPDATE products SET barcode = NULL WHERE id = :id"),
+            [{"id": product_id} for product_id, _ in duplicates]
+        )
+
+def run_migrations(engine: Engine):
+    """
+    Apply pending schema migrations, recording each version in schema_migrations
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, description VARCHAR(255), applied_at TIMESTAMP)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+    
+    for version, description, steps in MIGRATIONS:
+        if version in applied:
+            continue
+        
+        with engine.begin() as conn:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow()}
+            )
+        print(f"Applied migration {version}: {description}")
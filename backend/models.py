@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -13,17 +13,21 @@ class Product(Base):
     category = Column(String(100))
     ingredients = Column(Text)
     nutrition_facts = Column(JSON)
-    barcode = Column(String(50))
+    barcode = Column(String(50), unique=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class RiskAnalysis(Base):
     __tablename__ = "risk_analyses"
+    __table_args__ = (
+        # Keyset pagination over (created_at, id)
+        Index("ix_risk_analyses_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, nullable=False)
+    product_id = Column(Integer, nullable=False, index=True)
     overall_risk_score = Column(Float)  # 0-100 scale
-    risk_level = Column(String(20))  # LOW, MEDIUM, HIGH, CRITICAL
+    risk_level = Column(String(20), index=True)  # LOW, MEDIUM, HIGH, CRITICAL
     
     # Risk categories
     allergen_risk = Column(Float)
@@ -38,10 +42,17 @@ class RiskAnalysis(Base):
     nutritional_concerns = Column(JSON)
     safety_warnings = Column(JSON)
     
+    # Profile-independent matches and stage scores, for re-scoring under another profile
+    findings = Column(JSON)
+    # Profile the analysis was personalized for, so re-analysis can reproduce it
+    health_profile = Column(JSON)
+    
     # AI analysis
     ai_summary = Column(Text)
     ai_recommendations = Column(JSON)
     confidence_score = Column(Float)
+    # Deferred AI phase of a two-phase analysis: pending, complete or failed (NULL otherwise)
+    ai_status = Column(String(20))
     
     created_at = Column(DateTime, default=datetime.utcnow)
     analyzer_version = Column(String(50))
@@ -55,5 +66,39 @@ class UserSubmission(Base):
     product_description = Column(Text)
     ingredients_text = Column(Text)
     image_path = Column(String(500))
-    analysis_id = Column(Integer)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    analysis_id = Column(Integer, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class AnalysisStats(Base):
+    """Incrementally maintained analysis counters, one row per bucket"""
+    __tablename__ = "analysis_stats"
+    
+    bucket_type = Column(String(20), primary_key=True)  # all, day, category
+    bucket_key = Column(String(100), primary_key=True)  # "" for all, ISO date, category name
+    total = Column(Integer, nullable=False, default=0)
+    low_count = Column(Integer, nullable=False, default=0)
+    medium_count = Column(Integer, nullable=False, default=0)
+    high_count = Column(Integer, nullable=False, default=0)
+    critical_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_count = Column(Integer, nullable=False, default=0)
+
+class ReanalysisCheckpoint(Base):
+    """Progress of a re-analysis run, committed with every chunk so runs resume where they stopped"""
+    __tablename__ = "reanalysis_checkpoints"
+    
+    name = Column(String(50), primary_key=True)
+    target_version = Column(String(50), nullable=False)
+    refresh_ai = Column(Boolean, nullable=False, default=False)
+    status = Column(String(20), nullable=False)  # running, paused, interrupted, complete
+    last_id = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    scanned = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)  # stale rows stored without their health profile
+    last_error = Column(Text)
+    owner = Column(String(100))  # worker holding the lease while running
+    heartbeat_at = Column(DateTime)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
\ No newline at end of file
@@ -0,0 +1,106 @@
+import os
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .llm_cache import MemoryLRUCache
+from .models import Product
+
+PRODUCT_COLUMNS = [column.name for column in Product.__table__.columns]
+
+
+def product_dict(product: Optional[Product]) -> Optional[Dict]:
+    """Detached copy of a product row, safe to share across sessions"""
+    if product is None:
+        return None
+    return {name: getattr(product, name) for name in PRODUCT_COLUMNS}
+
+
+class ProductCache:
+    """
+    Read-through cache for product lookups by id and barcode and the category list.
+
+    Found products live in a bounded LRU with ``ttl_seconds``; "not found" answers
+    are cached separately with the shorter ``negative_ttl_seconds``. Writers call
+    ``invalidate`` with the affected ids, barcodes and categories; paths that only
+    insert products (analysis persistence) call ``products_added``. Every
+    invalidation bumps a generation counter, and a load that started before an
+    invalidation is returned but not stored, so a concurrent read cannot re-cache
+    a row that was just changed. The TTL bounds staleness across worker processes.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 300, negative_ttl_seconds: float = 30):
+        self.found = MemoryLRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.not_found = MemoryLRUCache(max_entries=max_entries, ttl_seconds=negative_ttl_seconds)
+        self.generation = 0
+        self.invalidations = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ProductCache":
+        return cls(
+            max_entries=int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", "10000")),
+            ttl_seconds=float(os.getenv("PRODUCT_CACHE_TTL", "300")),
+            negative_ttl_seconds=float(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL", "30"))
+        )
+
+    async def get_product(self, product_id: int, load: Callable[[], Awaitable[Optional[Dict]]]) -> Optional[Dict]:
+        return await self._read_through(f"id:{product_id}", load)
+
+    async def get_by_barcode(self, barcode: str, load: Callable[[], Awaitable[Optional[Dict]]]) -> Optional[Dict]:
+        return await self._read_through(f"barcode:{barcode}", load)
+
+    async def get_categories(self, load: Callable[[], Awaitable[List[str]]]) -> List[str]:
+        return await self._read_through("categories", load)
+
+    async def _read_through(self, key: str, load: Callable[[], Awaitable]):
+        value = self.found.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self.not_found.get(key) is not None:
+            self.hits += 1
+            return None
+
+        self.misses += 1
+        generation = self.generation
+        value = await load()
+        if generation == self.generation:
+            if value is None:
+                self.not_found.set(key, {})
+            else:
+                self.found.set(key, value)
+        return value
+
+    def invalidate(self, product_ids: Iterable[int] = (), barcodes: Iterable[Optional[str]] = (),
+                   categories: bool = False):
+        """Drop the entries a product write affects"""
+        self.generation += 1
+        self.invalidations += 1
+        keys = [f"id:{product_id}" for product_id in product_ids]
+        keys += [f"barcode:{barcode}" for barcode in barcodes if barcode]
+        if categories:
+            keys.append("categories")
+        for key in keys:
+            self.found.delete(key)
+            self.not_found.delete(key)
+
+    def products_added(self, categories: Iterable[Optional[str]]):
+        """Drop the category list when newly inserted products may bring a category it lacks"""
+        added = {category for category in categories if category}
+        if not added:
+            return
+        cached = self.found.get("categories")
+        # Nothing cached means a load may be in flight; invalidating keeps it from being stored
+        if cached is None or not added.issubset(cached):
+            self.invalidate(categories=True)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.found.stats()["entries"],
+            "negative_entries": self.not_found.stats()["entries"],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,109 @@
+import re
+from typing import List
+
+from sqlalchemy import text
+
+# Column weights for ranking: name, brand, category, ingredients
+SQLITE_BM25_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+SQLITE_SEARCH_INDEX = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, brand, category, ingredients, "
+    "content='products', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    # Triggers keep the index in step with every write to products, ORM or not
+    "CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, brand, category, ingredients) "
+    "VALUES (new.id, new.name, new.brand, new.category, new.ingredients); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, brand, category, ingredients) "
+    "VALUES ('delete', old.id, old.name, old.brand, old.category, old.ingredients); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, brand, category, ingredients) "
+    "VALUES ('delete', old.id, old.name, old.brand, old.category, old.ingredients); "
+    "INSERT INTO products_fts(rowid, name, brand, category, ingredients) "
+    "VALUES (new.id, new.name, new.brand, new.category, new.ingredients); END",
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_SEARCH_INDEX = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # A generated column is maintained by PostgreSQL on every insert and update
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(brand, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(ingredients, '')), 'D')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING GIN (name gin_trgm_ops)",
+]
+
+
+def create_search_index(conn):
+    """Create the full-text index for the connection's dialect (migration step)"""
+    dialect_name = conn.dialect.name
+    if dialect_name == "sqlite":
+        statements = SQLITE_SEARCH_INDEX
+    elif dialect_name == "postgresql":
+        statements = POSTGRES_SEARCH_INDEX
+    else:
+        print(f"Full-text product search is not supported on {dialect_name}; search falls back to ILIKE")
+        return
+
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+def _search_terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())
+
+
+def build_fts5_query(query: str) -> str:
+    """Quote every term (no FTS syntax injection); the last term matches as a prefix for search-as-you-type"""
+    terms = [f'"{term}"' for term in _search_terms(query)]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def build_tsquery(query: str) -> str:
+    terms = _search_terms(query)
+    if terms:
+        terms[-1] += ":*"
+    return " & ".join(terms)
+
+
+def search_product_ids(db, query: str, limit: int, offset: int) -> List[int]:
+    """
+    Product ids matching ``query`` across name, brand, category and ingredients, best match first
+    """
+    dialect_name = db.get_bind().dialect.name
+
+    if dialect_name == "sqlite":
+        match = build_fts5_query(query)
+        if not match:
+            return []
+        weights = ", ".join(str(weight) for weight in SQLITE_BM25_WEIGHTS)
+        rows = db.execute(text(
+            f"SELECT rowid FROM products_fts WHERE products_fts MATCH :match "
+            f"ORDER BY bm25(products_fts, {weights}) LIMIT :limit OFFSET :offset"
+        ), {"match": match, "limit": limit, "offset": offset})
+
+    elif dialect_name == "postgresql":
+        tsquery = build_tsquery(query)
+        if not tsquery:
+            return []
+        rows = db.execute(text(
+            "SELECT id FROM products "
+            "WHERE search_vector @@ to_tsquery('simple', :tsquery) OR name % :raw "
+            "ORDER BY ts_rank(search_vector, to_tsquery('simple', :tsquery)) DESC, similarity(name, :raw) DESC, id "
+            "LIMIT :limit OFFSET :offset"
+        ), {"tsquery": tsquery, "raw": query, "limit": limit, "offset": offset})
+
+    else:
+        pattern = f"%{query}%"
+        rows = db.execute(text(
+            "SELECT id FROM products WHERE name ILIKE :pattern OR brand ILIKE :pattern "
+            "OR category ILIKE :pattern OR ingredients ILIKE :pattern ORDER BY id LIMIT :limit OFFSET :offset"
+        ), {"pattern": pattern, "limit": limit, "offset": offset})
+
+    return [row[0] for row in rows]
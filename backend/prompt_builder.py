@@ -0,0 +1,183 @@
+import os
+import re
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .ingredient_tokenizer import CLOSERS, OPENERS
+
+# Bump whenever the prompt template changes so cached responses are not reused
+PROMPT_VERSION = "3"
+
+ANALYSIS_TEMPLATE = (
+    "Assess this consumable product's health and safety risks for the user.\n"
+    "Product: {product_name}\n"
+    "Category: {category}\n"
+    "Ingredients: {ingredients}\n"
+    "{description}"
+    "Nutrition: {nutrition}\n"
+    "User profile: {profile}\n"
+    "Cover overall safety, specific concerns, personalized advice, long-term risks and medication interactions.\n"
+    "Reply with JSON only: {{\"summary\": str (max 80 words), \"recommendations\": [str] (max 5), "
+    "\"confidence\": 0-100, \"concerns\": [str] (max 5)}}"
+)
+
+# Word pieces of up to 8 characters, punctuation marks and line breaks with their indentation
+_TOKEN_PATTERN = re.compile(r"\w{1,8}|[^\w\s]|\n\s*")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Input token count for ``text``: exact with tiktoken installed, otherwise an
+    estimate from word pieces, punctuation and line breaks that tracks BPE counts
+    for label text
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def compact_json(value) -> str:
+    """JSON without indentation or spaces, skipping empty values"""
+    if isinstance(value, dict):
+        value = {key: item for key, item in value.items() if item not in (None, "", [], {})}
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+_SEPARATOR_RE = re.compile(r"([,;(){}\[\]])")
+
+
+def split_top_level(ingredients: str) -> List[str]:
+    """
+    Top-level entries of an ingredient statement. Separators inside brackets,
+    e.g. "chocolate (sugar, cocoa butter)", and decimal commas stay in their entry.
+    """
+    items, current, open_brackets = [], "", []
+    parts = _SEPARATOR_RE.split(ingredients)
+    for position, part in enumerate(parts):
+        if part in (",", ";") and not open_brackets:
+            if part == "," and current[-1:].isdigit() and parts[position + 1][:1].isdigit():
+                current += part
+                continue
+            items.append(current)
+            current = ""
+            continue
+        if part in OPENERS:
+            open_brackets.append(OPENERS[part])
+        elif part in CLOSERS and open_brackets and open_brackets[-1] == part:
+            open_brackets.pop()
+        current += part
+    items.append(current)
+    return [item.strip() for item in items if item.strip()]
+
+
+def fit_ingredients(ingredients: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    The leading ingredients (labels list them by weight) that fit in ``max_tokens``,
+    with a count of the ones left out. Sub-ingredient lists in brackets stay with
+    their ingredient; repeated ingredients are listed once.
+    """
+    items = list(dict.fromkeys(split_top_level(ingredients)))
+    compacted = ", ".join(items)
+    if count_tokens(compacted) <= max_tokens:
+        return compacted, False
+    kept, used = [], 0
+    for item in items:
+        cost = count_tokens(item) + 1
+        if used + cost > max_tokens - 6:
+            break
+        kept.append(item)
+        used += cost
+    return f"{', '.join(kept)} (+{len(items) - len(kept)} more)", True
+
+
+def fit_text(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """``text`` cut at a word boundary to about ``max_tokens``"""
+    if count_tokens(text) <= max_tokens:
+        return text, False
+    words, kept = text.split(), []
+    used = 0
+    for word in words:
+        cost = count_tokens(word)
+        if used + cost > max_tokens - 1:
+            break
+        kept.append(word)
+        used += cost
+    return " ".join(kept) + "...", True
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    input_tokens: int
+    truncated: bool
+
+
+class PromptBuilder:
+    """
+    Compact analysis prompts within an input token budget.
+
+    Ingredient lists and descriptions are trimmed, in that order of priority,
+    to what is left of ``max_input_tokens`` after the template and the other
+    fields; the description gets at most ``description_share`` of it.
+    """
+
+    def __init__(self, max_input_tokens: int = 600, description_share: float = 0.25):
+        self.max_input_tokens = max_input_tokens
+        self.description_share = description_share
+        self.prompts = 0
+        self.truncated = 0
+        self.input_tokens = 0
+
+    @classmethod
+    def from_env(cls) -> "PromptBuilder":
+        return cls(max_input_tokens=int(os.getenv("PROMPT_MAX_INPUT_TOKENS", "600")))
+
+    def build(self, product_data: Dict, health_profile: Optional[Dict]) -> BuiltPrompt:
+        fields = self._fields(product_data, health_profile)
+        text = ANALYSIS_TEMPLATE.format(**fields["values"])
+        tokens = count_tokens(text)
+        self.prompts += 1
+        self.truncated += fields["truncated"]
+        self.input_tokens += tokens
+        return BuiltPrompt(text=text, input_tokens=tokens, truncated=fields["truncated"])
+
+    def _fields(self, product_data: Dict, health_profile: Optional[Dict]) -> Dict:
+        """Template values for one product, with long fields trimmed to the budget"""
+        values = {
+            "product_name": product_data.get("product_name") or "Unknown",
+            "category": product_data.get("category") or "Unknown",
+            "nutrition": compact_json(product_data.get("nutrition_facts") or {}),
+            "profile": compact_json(health_profile or {}),
+            "ingredients": "",
+            "description": ""
+        }
+        available = self.max_input_tokens - count_tokens(ANALYSIS_TEMPLATE.format(**values))
+
+        description, description_cut = fit_text(
+            product_data.get("product_description") or "", max(int(available * self.description_share), 0)
+        )
+        if description:
+            values["description"] = f"Description: {description}\n"
+            available -= count_tokens(values["description"])
+        values["ingredients"], ingredients_cut = fit_ingredients(
+            product_data.get("ingredients") or "Not provided", max(available, 16)
+        )
+        return {"values": values, "truncated": description_cut or ingredients_cut}
+
+    def stats(self) -> Dict:
+        return {
+            "prompt_version": PROMPT_VERSION,
+            "max_input_tokens": self.max_input_tokens,
+            "prompts": self.prompts,
+            "truncated": self.truncated,
+            "avg_input_tokens": round(self.input_tokens / self.prompts, 1) if self.prompts else 0.0
+        }
@@ -0,0 +1,161 @@
+import os
+import json
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .llm_client import LLMResponse
+from .prompt_builder import compact_json, fit_ingredients, fit_text
+from .schemas import validate_ai_response
+
+PACKED_PROMPT_TEMPLATE = (
+    "Assess each consumable product's health and safety risks for its user. One product per line, "
+    "each with an id and its own user profile:\n"
+    "{items}\n"
+    "For each, cover overall safety, specific concerns, personalized advice, long-term risks and "
+    "medication interactions.\n"
+    "Reply with only a JSON array, one object per product: {{\"id\": str, \"summary\": str (max 80 words), "
+    "\"recommendations\": [str] (max 5), \"confidence\": 0-100, \"concerns\": [str] (max 5)}}"
+)
+
+
+def build_packed_prompt(items: List[Tuple[str, Dict, Optional[Dict]]], max_item_tokens: int = 400) -> str:
+    """
+    One prompt for several (item id, product data, health profile) entries, with
+    each entry's ingredients and description trimmed to about ``max_item_tokens``
+    """
+    entries = []
+    for item_id, product_data, health_profile in items:
+        description, _ = fit_text(product_data.get("product_description") or "", max_item_tokens // 4)
+        ingredients, _ = fit_ingredients(product_data.get("ingredients") or "Not provided", max_item_tokens // 2)
+        entries.append(compact_json({
+            "id": item_id,
+            "product": product_data.get("product_name") or "Unknown",
+            "category": product_data.get("category") or "Unknown",
+            "ingredients": ingredients,
+            "description": description,
+            "nutrition": product_data.get("nutrition_facts") or {},
+            "profile": {key: value for key, value in (health_profile or {}).items() if value not in (None, "", [], {})}
+        }))
+    return PACKED_PROMPT_TEMPLATE.format(items="\n".join(entries))
+
+
+def parse_packed_response(text: str, item_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Per-item results from a packed response, keyed by item id.
+
+    Tolerates prose or code fences around the array. Entries with an unknown or
+    repeated id, or missing/invalid fields, are dropped, so their items can be
+    retried on their own.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        entries = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    expected = set(item_ids)
+    results = {}
+    for entry in entries:
+        item_id = str(entry.get("id")) if isinstance(entry, dict) else None
+        if item_id not in expected or item_id in results:
+            continue
+        result = validate_ai_response(entry)
+        if result is not None:
+            results[item_id] = result
+    return results
+
+
+class PromptPacker:
+    """
+    Packs concurrent AI analyses into shared LLM requests.
+
+    Submissions are collected until ``pack_size`` are waiting or the oldest has
+    waited ``max_wait_ms``, then sent as one prompt through ``send`` (prompt and
+    item count in, LLM response or None out). Each submitter gets its own
+    validated result and the model that wrote it, or None when its entry was
+    missing or malformed, in which case the caller falls back to a single-item call. Only useful when enough
+    callers run at once, e.g. batch workers.
+    """
+
+    def __init__(self, send: Callable[[str, int], Awaitable[Optional[LLMResponse]]],
+                 pack_size: int = 8, max_wait_ms: float = 20):
+        self.send = send
+        self.pack_size = pack_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[Dict, Optional[Dict], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references to in-flight sends; the event loop only keeps weak ones
+        self._sending: Set[asyncio.Task] = set()
+        self.calls = 0
+        self.items = 0
+        self.packed_items = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_env(cls, send: Callable[[str, int], Awaitable[Optional[LLMResponse]]]) -> "PromptPacker":
+        return cls(
+            send,
+            pack_size=int(os.getenv("LLM_PACK_SIZE", "8")),
+            max_wait_ms=float(os.getenv("LLM_PACK_MAX_WAIT_MS", "20"))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.pack_size > 1
+
+    async def submit(self, product_data: Dict, health_profile: Optional[Dict]) -> Optional[Tuple[Dict, str]]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((product_data, health_profile, future))
+        self.items += 1
+        if len(self._pending) >= self.pack_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        group, self._pending = self._pending, []
+        if group:
+            task = asyncio.create_task(self._send_group(group))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send_group(self, group: List[Tuple[Dict, Optional[Dict], asyncio.Future]]):
+        item_ids = [str(i) for i in range(1, len(group) + 1)]
+        results, model = {}, None
+        try:
+            self.calls += 1
+            response = await self.send(
+                build_packed_prompt([(item_id, data, profile) for item_id, (data, profile, _) in zip(item_ids, group)]),
+                len(group)
+            )
+            if response and response.text:
+                results, model = parse_packed_response(response.text, item_ids), response.model
+        except Exception as e:
+            print(f"Packed AI analysis error: {e}")
+        finally:
+            for item_id, (_, _, future) in zip(item_ids, group):
+                result = results.get(item_id)
+                if result is None:
+                    self.fallbacks += 1
+                else:
+                    self.packed_items += 1
+                if not future.done():
+                    future.set_result(None if result is None else (result, model))
+
+    def stats(self) -> Dict:
+        return {
+            "pack_size": self.pack_size,
+            "calls": self.calls,
+            "items": self.items,
+            "packed_items": self.packed_items,
+            "fallbacks": self.fallbacks,
+            "pending": len(self._pending)
+        }
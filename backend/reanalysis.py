@@ -0,0 +1,330 @@
+import os
+import sys
+import time
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .models import Product, ReanalysisCheckpoint, RiskAnalysis
+from .analysis_store import AI_FIELDS, risk_analysis_values
+from .analysis_stats import record_analyses
+
+JOB_NAME = "analyzer_version"
+
+
+class ReanalysisJob:
+    """
+    Incremental re-analysis of stored analyses produced by another analyzer version.
+
+    Walks risk_analyses in id order, ``chunk_size`` rows at a time, picking rows
+    whose ``analyzer_version`` differs from the analyzer's current one. Each chunk
+    re-runs the rule-based stages (and the AI phase with ``refresh_ai``) under the
+    profile stored with the row, then rewrites the rows, adjusts the stats buckets
+    and advances the checkpoint in one transaction, so a crash or restart resumes
+    after the last committed chunk. Runs are throttled to ``max_rows_per_second``.
+
+    Rows written before health profiles were stored cannot be re-scored for their
+    user, so they are left alone and reported as ``skipped`` instead of being
+    overwritten with generic scores.
+
+    The running worker holds a lease on the checkpoint row, renewed every chunk,
+    so only one process works on a run at a time.
+    """
+
+    def __init__(self, analyzer, session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+                 chunk_size: Optional[int] = None, max_rows_per_second: Optional[float] = None,
+                 lease_seconds: float = 300):
+        self.analyzer = analyzer
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size or int(os.getenv("REANALYSIS_CHUNK_SIZE", "100"))
+        self.max_rows_per_second = max_rows_per_second or float(os.getenv("REANALYSIS_MAX_ROWS_PER_SECOND", "200"))
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+        self._stop_status = "paused"
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self, refresh_ai: bool = False, restart: bool = False) -> Dict:
+        """
+        Start or resume the run for the current analyzer version.
+
+        A checkpoint for the same version and mode is resumed from its last id;
+        otherwise (or with ``restart``) the scan starts over from the first row.
+        """
+        if self._task is not None:
+            return await self.status()
+
+        target_version = self.analyzer.analyzer_version
+        async with self.session_factory() as db:
+            if await db.get(ReanalysisCheckpoint, JOB_NAME) is None:
+                db.add(ReanalysisCheckpoint(name=JOB_NAME, target_version=target_version, status="paused"))
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    # Another worker created it first
+                    await db.rollback()
+
+            # Take the lease atomically: free, already ours, or abandoned by a dead worker
+            now = datetime.utcnow()
+            claimed = await db.execute(update(ReanalysisCheckpoint).where(
+                ReanalysisCheckpoint.name == JOB_NAME,
+                or_(ReanalysisCheckpoint.owner.is_(None), ReanalysisCheckpoint.owner == self.owner,
+                    ReanalysisCheckpoint.heartbeat_at < now - timedelta(seconds=self.lease_seconds))
+            ).values(owner=self.owner, heartbeat_at=now))
+            if claimed.rowcount != 1:
+                await db.rollback()
+                raise RuntimeError("Re-analysis is already running on another worker")
+
+            checkpoint = await db.get(ReanalysisCheckpoint, JOB_NAME, populate_existing=True)
+            fresh = (restart or checkpoint.started_at is None or checkpoint.status == "complete"
+                     or checkpoint.target_version != target_version or checkpoint.refresh_ai != refresh_ai)
+            if fresh:
+                checkpoint.target_version = target_version
+                checkpoint.refresh_ai = refresh_ai
+                checkpoint.last_id = 0
+                checkpoint.scanned = checkpoint.updated = checkpoint.failed = 0
+                checkpoint.last_error = None
+                checkpoint.started_at = datetime.utcnow()
+                checkpoint.finished_at = None
+                checkpoint.total = await db.scalar(
+                    select(func.count(RiskAnalysis.id)).where(self._stale_filter(target_version))
+                )
+                checkpoint.skipped = await db.scalar(
+                    select(func.count(RiskAnalysis.id)).where(self._stale_filter(target_version, legacy=True))
+                )
+                if checkpoint.skipped:
+                    print(f"Re-analysis skips {checkpoint.skipped} analyses stored without a health profile")
+
+            checkpoint.status = "running"
+            await db.commit()
+
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+        return await self.status()
+
+    async def pause(self) -> Dict:
+        """Stop after the chunk in progress; ``start`` resumes from the checkpoint"""
+        await self._halt("paused")
+        return await self.status()
+
+    async def wait(self):
+        """Until the run in progress here stops"""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def shutdown(self):
+        """Stop for process shutdown, leaving the run to be resumed on the next start"""
+        await self._halt("interrupted")
+
+    async def resume_interrupted(self):
+        """Pick up a run a previous process was working on when it stopped"""
+        async with self.session_factory() as db:
+            checkpoint = await db.get(ReanalysisCheckpoint, JOB_NAME)
+        if checkpoint is None or checkpoint.status not in ("running", "interrupted"):
+            return
+        if checkpoint.status == "running" and not self._lease_expired(checkpoint):
+            return
+        try:
+            await self.start(refresh_ai=checkpoint.refresh_ai)
+        except RuntimeError as e:
+            print(f"Not resuming re-analysis: {e}")
+
+    async def status(self) -> Dict:
+        async with self.session_factory() as db:
+            checkpoint = await db.get(ReanalysisCheckpoint, JOB_NAME)
+        current_version = self.analyzer.analyzer_version
+        if checkpoint is None:
+            return {"status": "idle", "running_here": False, "current_version": current_version}
+
+        return {
+            "status": checkpoint.status,
+            "running_here": self.running,
+            "current_version": current_version,
+            "target_version": checkpoint.target_version,
+            "refresh_ai": checkpoint.refresh_ai,
+            "total": checkpoint.total,
+            "scanned": checkpoint.scanned,
+            "updated": checkpoint.updated,
+            "failed": checkpoint.failed,
+            "skipped": checkpoint.skipped,
+            "remaining": max(checkpoint.total - checkpoint.scanned, 0),
+            "progress": round(checkpoint.scanned / checkpoint.total, 4) if checkpoint.total else 1.0,
+            "last_id": checkpoint.last_id,
+            "last_error": checkpoint.last_error,
+            "owner": checkpoint.owner,
+            "started_at": checkpoint.started_at,
+            "heartbeat_at": checkpoint.heartbeat_at,
+            "finished_at": checkpoint.finished_at
+        }
+
+    async def _halt(self, status: str):
+        if self._task is None:
+            return
+        self._stop_status = status
+        self._stop.set()
+        await self._task
+
+    def _lease_expired(self, checkpoint: ReanalysisCheckpoint) -> bool:
+        return (checkpoint.heartbeat_at is None
+                or checkpoint.heartbeat_at < datetime.utcnow() - timedelta(seconds=self.lease_seconds))
+
+    @staticmethod
+    def _stale_filter(target_version: str, legacy: bool = False):
+        """
+        Rows from another analyzer version that have a stored health profile, or
+        with ``legacy`` the ones that do not. Rows analyzed without a profile hold
+        JSON null; only rows from before the column existed are SQL NULL.
+        """
+        stale = or_(RiskAnalysis.analyzer_version.is_(None), RiskAnalysis.analyzer_version != target_version)
+        profile_stored = RiskAnalysis.health_profile.is_(None) if legacy else RiskAnalysis.health_profile.isnot(None)
+        return and_(stale, profile_stored)
+
+    async def _run(self):
+        status, error = "complete", None
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                processed = await self._process_chunk()
+                if processed == 0:
+                    break
+                # Throttle: a chunk of N rows takes at least N / max_rows_per_second seconds
+                remaining = processed / self.max_rows_per_second - (time.perf_counter() - started)
+                if remaining > 0:
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+            if self._stop.is_set():
+                status = self._stop_status
+        except Exception as e:
+            status, error = "paused", str(e)
+            print(f"Re-analysis stopped: {e}")
+        finally:
+            self._task = None
+        await self._finish(status, error)
+
+    async def _finish(self, status: str, error: Optional[str] = None):
+        values = {"status": status, "owner": None, "heartbeat_at": datetime.utcnow()}
+        if status == "complete":
+            values["finished_at"] = datetime.utcnow()
+        if error is not None:
+            values["last_error"] = error
+        async with self.session_factory() as db:
+            # Leave the checkpoint alone if another worker has taken the lease over
+            await db.execute(update(ReanalysisCheckpoint).where(
+                ReanalysisCheckpoint.name == JOB_NAME, ReanalysisCheckpoint.owner == self.owner
+            ).values(values))
+            await db.commit()
+
+    async def _process_chunk(self) -> int:
+        """Re-analyze and rewrite one chunk; returns the number of rows scanned"""
+        async with self.session_factory() as db:
+            checkpoint = await db.get(ReanalysisCheckpoint, JOB_NAME)
+            if checkpoint.owner != self.owner:
+                raise RuntimeError(f"Lease lost to {checkpoint.owner}")
+
+            rows = (await db.execute(
+                select(RiskAnalysis, Product)
+                .outerjoin(Product, Product.id == RiskAnalysis.product_id)
+                .where(RiskAnalysis.id > checkpoint.last_id, self._stale_filter(checkpoint.target_version))
+                .order_by(RiskAnalysis.id)
+                .limit(self.chunk_size)
+            )).all()
+            if not rows:
+                return 0
+
+            results = await asyncio.gather(*(
+                self._reanalyze(product, analysis.health_profile, checkpoint.refresh_ai)
+                for analysis, product in rows
+            ))
+
+            removed, added = [], []
+            failed = 0
+            for (analysis, product), (result, error) in zip(rows, results):
+                if result is None:
+                    failed += 1
+                    checkpoint.last_error = f"analysis {analysis.id}: {error}"
+                    continue
+
+                category = product.category
+                removed.append((analysis.created_at, category, analysis.risk_level, analysis.overall_risk_score))
+                values = risk_analysis_values(result)
+                for field, value in values.items():
+                    if field in AI_FIELDS and not checkpoint.refresh_ai:
+                        continue
+                    setattr(analysis, field, value)
+                added.append((analysis.created_at, category, analysis.risk_level, analysis.overall_risk_score))
+
+            # Move the rewritten rows between stats buckets
+            await db.run_sync(record_analyses, removed, -1)
+            await db.run_sync(record_analyses, added)
+
+            checkpoint.last_id = rows[-1][0].id
+            checkpoint.scanned += len(rows)
+            checkpoint.updated += len(added)
+            checkpoint.failed += failed
+            checkpoint.heartbeat_at = datetime.utcnow()
+            await db.commit()
+            return len(rows)
+
+    async def _reanalyze(self, product: Optional[Product], health_profile: Optional[Dict],
+                         refresh_ai: bool) -> Tuple[Optional[Dict], Optional[str]]:
+        """(analysis result, None) or (None, error) for one stored row"""
+        if product is None:
+            return None, "product no longer exists"
+
+        product_data = {
+            "product_name": product.name,
+            "ingredients": product.ingredients or "",
+            "nutrition_facts": product.nutrition_facts or {},
+            "category": product.category or "Unknown"
+        }
+        try:
+            result = await self.analyzer._rule_based_analysis(product_data, health_profile)
+            if refresh_ai:
+                ai_analysis = await self.analyzer._ai_comprehensive_analysis(product_data, health_profile, packed=True)
+                if ai_analysis == self.analyzer._get_default_ai_response():
+                    return None, "AI analysis unavailable"
+                result.update(self.analyzer._ai_fields(ai_analysis))
+            return result, None
+        except Exception as e:
+            return None, str(e)
+
+
+if __name__ == "__main__":
+    # python -m backend.reanalysis run [--refresh-ai] [--restart]
+    args = sys.argv[1:]
+    if args[:1] != ["run"] or any(arg not in ("--refresh-ai", "--restart") for arg in args[1:]):
+        print("usage: python -m backend.reanalysis run [--refresh-ai] [--restart]")
+        sys.exit(1)
+
+    from .database import engine, dispose_engines
+    from .models import Base
+    from .migrations import run_migrations
+    from .ai_analyzer import AIRiskAnalyzer
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    async def run():
+        analyzer = AIRiskAnalyzer()
+        job = ReanalysisJob(analyzer)
+        try:
+            print(await job.start(refresh_ai="--refresh-ai" in args, restart="--restart" in args))
+            await job.wait()
+            print(await job.status())
+        finally:
+            await analyzer.aclose()
+            await dispose_engines()
+
+    asyncio.run(run())
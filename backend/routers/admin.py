@@ -0,0 +1,155 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+import asyncio
+
+from ..database import get_db, pool_status
+from ..analysis_stats import rebuild_stats
+from ..ai_analyzer import AIRiskAnalyzer
+from ..analysis_writer import AnalysisWriter
+from ..product_cache import ProductCache
+from ..reanalysis import ReanalysisJob
+from ..dependencies import get_analyzer, get_analysis_writer, get_product_cache, get_reanalysis_job
+
+router = APIRouter()
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    ai_analyzer: AIRiskAnalyzer = Depends(get_analyzer),
+    product_cache: ProductCache = Depends(get_product_cache)
+):
+    """
+    Hit/miss counters and entry counts for both LLM response cache tiers, how
+    many AI calls were coalesced onto an identical in-flight request, the
+    ingredient parse cache and the product lookup cache
+    """
+    return {
+        "status": "success",
+        "cache": await ai_analyzer.response_cache.stats(),
+        "in_flight": ai_analyzer.in_flight.stats(),
+        "prompt_packing": ai_analyzer.packer.stats(),
+        "ingredient_parse": {
+            **ai_analyzer.ingredient_tokenizer.cache_info()._asdict(),
+            "vocabulary_size": len(ai_analyzer.ingredient_tokenizer.vocabulary)
+        },
+        "products": product_cache.stats()
+    }
+
+@router.get("/llm/stats")
+async def get_llm_stats(ai_analyzer: AIRiskAnalyzer = Depends(get_analyzer)):
+    """
+    Provider routing: circuit breaker state and hedge delay per provider, hedged
+    requests and how often the hedge won, and calls that ran out of budget; plus
+    prompt sizes and how many prompts had fields trimmed to the token budget
+    """
+    return {"status": "success", "router": ai_analyzer.llm_router.stats(), "prompts": ai_analyzer.prompt_builder.stats()}
+
+@router.delete("/cache")
+async def purge_cache(
+    prefix: Optional[str] = None,
+    older_than_seconds: Optional[float] = Query(None, ge=0),
+    ai_analyzer: AIRiskAnalyzer = Depends(get_analyzer)
+):
+    """
+    Purge cached LLM responses by key prefix (e.g. "<prompt_version>:<model>:"), by age, or both
+    """
+    if prefix is None and older_than_seconds is None:
+        raise HTTPException(status_code=400, detail="Specify prefix and/or older_than_seconds")
+    
+    try:
+        removed = await ai_analyzer.response_cache.purge(prefix, older_than_seconds)
+        return {"status": "success", "removed": removed}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Cache purge failed: {str(e)}")
+
+@router.get("/knowledge-base")
+async def get_knowledge_base_info(ai_analyzer: AIRiskAnalyzer = Depends(get_analyzer)):
+    """
+    Version, entry counts and reload history of the active ingredient knowledge base
+    """
+    return {"status": "success", "knowledge_base": ai_analyzer.knowledge_base_store.stats()}
+
+@router.post("/knowledge-base/reload")
+async def reload_knowledge_base(ai_analyzer: AIRiskAnalyzer = Depends(get_analyzer)):
+    """
+    Re-open the compiled knowledge base now instead of waiting for the next file check
+    """
+    store = ai_analyzer.knowledge_base_store
+    if not store.path:
+        raise HTTPException(status_code=400, detail="KNOWLEDGE_BASE_PATH is not set; the bundled source is in use")
+    
+    try:
+        reloaded = await asyncio.to_thread(store.reload)
+        if not reloaded:
+            raise HTTPException(status_code=500, detail=f"Knowledge base reload failed: {store.last_error}")
+        return {"status": "success", "knowledge_base": store.stats()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Knowledge base reload failed: {str(e)}")
+
+@router.post("/stats/rebuild")
+async def rebuild_analysis_stats(db: AsyncSession = Depends(get_db)):
+    """
+    Reconcile the analysis stats summary table from the raw analyses
+    """
+    try:
+        buckets = await db.run_sync(rebuild_stats)
+        await db.commit()
+        return {"status": "success", "buckets": buckets}
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Stats rebuild failed: {str(e)}")
+
+@router.get("/writer/stats")
+async def get_writer_stats(analysis_writer: AnalysisWriter = Depends(get_analysis_writer)):
+    """
+    Queue depth, flush latency and row counters for the analysis write-behind writer
+    """
+    return {"status": "success", "writer": analysis_writer.stats()}
+
+@router.get("/db/stats")
+async def get_db_stats():
+    """
+    Connection pool usage of the write and read engines
+    """
+    return {"status": "success", "engines": pool_status()}
+
+@router.get("/reanalysis")
+async def get_reanalysis_status(reanalysis_job: ReanalysisJob = Depends(get_reanalysis_job)):
+    """
+    Progress of the re-analysis run for analyses from other analyzer versions
+    """
+    try:
+        return {"status": "success", "reanalysis": await reanalysis_job.status()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get re-analysis status: {str(e)}")
+
+@router.post("/reanalysis/start")
+async def start_reanalysis(
+    refresh_ai: bool = False,
+    restart: bool = False,
+    reanalysis_job: ReanalysisJob = Depends(get_reanalysis_job)
+):
+    """
+    Start or resume re-analysis of stored analyses whose analyzer_version is not the current one
+
+    Only the rule-based stages are re-run unless ``refresh_ai=true``. A paused or
+    interrupted run resumes from its checkpoint; ``restart=true`` scans from the start.
+    """
+    try:
+        return {"status": "success", "reanalysis": await reanalysis_job.start(refresh_ai, restart)}
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to start re-analysis: {str(e)}")
+
+@router.post("/reanalysis/pause")
+async def pause_reanalysis(reanalysis_job: ReanalysisJob = Depends(get_reanalysis_job)):
+    """
+    Stop the run after the chunk in progress; start resumes it from the checkpoint
+    """
+    try:
+        return {"status": "success", "reanalysis": await reanalysis_job.pause()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to pause re-analysis: {str(e)}")
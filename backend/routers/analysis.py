@@ -1,51 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import ValidationError
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+import os
 import uuid
+import json
+import time
+import asyncio
+import base64
 from datetime import datetime
 
-from ..database import get_db
-from ..models import RiskAnalysis, UserSubmission, Product
-from ..schemas import ProductAnalysisRequest, RiskAnalysisResponse, HealthProfile, AnalysisHistory
+from ..database import get_db, get_read_db, AsyncSessionLocal
+from ..models import RiskAnalysis, UserSubmission
+from ..schemas import (
+    ProductAnalysisRequest, AnalyzeResponse, AnalysisDetailsResponse, StoredAnalysis, HealthProfile, AnalysisHistory,
+    QuickCheckBatchRequest, RescoreRequest, RescoreResponse
+)
 from ..ai_analyzer import AIRiskAnalyzer
+from ..rule_engine import RuleEngine
+from ..ai_jobs import AIJobRegistry
+from ..analysis_stats import get_stats
+from ..analysis_store import write_analyses, save_analyses_batch, products_added
+from ..analysis_writer import AnalysisWriter
+from ..metrics import observe_db_write
+from ..product_cache import ProductCache
+from ..responses import FastJSONResponse
+from ..dependencies import get_analyzer, get_rule_engine, get_ai_jobs, get_analysis_writer, get_product_cache
 
-router = APIRouter()
-ai_analyzer = AIRiskAnalyzer()
+router = APIRouter(default_response_class=FastJSONResponse)
 
-@router.post("/analyze", response_model=dict)
+AI_STATUS_POLL_SECONDS = float(os.getenv("AI_STATUS_POLL_SECONDS", "1"))
+
+# Keys the analyzer did not set (e.g. the two-phase fields) are left out of the response
+@router.post("/analyze", response_model=AnalyzeResponse, response_model_exclude_unset=True)
 async def analyze_product(
     request: ProductAnalysisRequest,
     health_profile: Optional[HealthProfile] = None,
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-    db: Session = Depends(get_db)
+    two_phase: bool = False,
+    db: AsyncSession = Depends(get_db),
+    ai_analyzer: AIRiskAnalyzer = Depends(get_analyzer),
+    ai_jobs: AIJobRegistry = Depends(get_ai_jobs),
+    analysis_writer: AnalysisWriter = Depends(get_analysis_writer),
+    product_cache: ProductCache = Depends(get_product_cache)
 ):
     """
     Analyze a consumable product for health and safety risks
+
+    With ``two_phase=true`` the rule-based scores are returned immediately and the
+    AI summary is delivered later via ``/analysis/{id}/ai`` or ``/analysis/{id}/ai/stream``.
     """
     try:
         # Generate session ID for tracking
         session_id = str(uuid.uuid4())
         
         # Prepare product data for analysis
-        product_data = {
-            "product_name": request.product_name,
-            "ingredients": request.ingredients,
-            "nutrition_facts": request.nutrition_facts or {},
-            "category": request.category or "Unknown",
-            "product_description": request.product_description or ""
-        }
+        product_data = _build_product_data(request)
         
         # Convert health profile to dict if provided
-        health_profile_dict = health_profile.dict() if health_profile else None
+        health_profile_dict = health_profile.model_dump() if health_profile else None
+        
+        if two_phase:
+            # Rule-based result now; the AI phase patches the stored row when done
+            analysis_result = await ai_analyzer.analyze_rules(product_data, health_profile_dict)
+            analysis_id = await save_analysis_to_db(
+                db, product_data, {**analysis_result, "ai_status": "pending"}, session_id, product_cache
+            )
+            if analysis_id is None:
+                raise HTTPException(status_code=500, detail="Analysis failed: could not store analysis")
+            
+            stored = await db.get(RiskAnalysis, analysis_id)
+            
+            ai_jobs.start(analysis_id, lambda: run_ai_phase(ai_analyzer, analysis_id, product_data, health_profile_dict))
+            
+            return {
+                "status": "success",
+                "session_id": session_id,
+                "analysis_id": analysis_id,
+                "ai_status": "pending",
+                "ai_result_url": f"/api/analysis/analysis/{analysis_id}/ai",
+                "ai_stream_url": f"/api/analysis/analysis/{analysis_id}/ai/stream",
+                "analysis": {**analysis_result, "analysis_id": analysis_id, "created_at": stored.created_at}
+            }
         
         # Run AI analysis
         analysis_result = await ai_analyzer.analyze_product(product_data, health_profile_dict)
         
-        # Save to database in background
-        background_tasks.add_task(
-            save_analysis_to_db,
-            db, product_data, analysis_result, session_id
-        )
+        # Hand off to the write-behind writer; it persists in batches on its own session
+        await analysis_writer.submit(product_data, analysis_result, session_id)
         
         return {
             "status": "success",
@@ -53,83 +97,397 @@ async def analyze_product(
             "analysis": analysis_result
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+def _build_product_data(request: ProductAnalysisRequest) -> dict:
+    """Analyzer input for an analysis request"""
+    return {
+        "product_name": request.product_name,
+        "ingredients": request.ingredients,
+        "nutrition_facts": request.nutrition_facts or {},
+        "category": request.category or "Unknown",
+        "product_description": request.product_description or ""
+    }
+
+# Queued by the batch body reader when the client goes away
+_DISCONNECTED = object()
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response that leaves ``receive`` to the body generator.
+
+    StreamingResponse normally listens for disconnects on ``receive``, which would
+    swallow request body chunks that the batch endpoint is still reading. The
+    batch endpoint watches for the disconnect itself once the body is read.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def _analyze_batch_item(ai_analyzer: AIRiskAnalyzer, index: int, line: bytes, packed: bool = False) -> dict:
+    """Analyze one NDJSON batch line; failures are reported, never raised"""
+    try:
+        item = json.loads(line)
+        profile = item.pop("health_profile", None)
+        health_profile_dict = HealthProfile(**profile).model_dump() if profile else None
+        product_data = _build_product_data(ProductAnalysisRequest(**item))
+    except (ValueError, TypeError, AttributeError, ValidationError) as e:
+        return {"type": "error", "index": index, "error": f"Invalid item: {str(e)}"}
+    
+    try:
+        analysis_result = await ai_analyzer.analyze_product(product_data, health_profile_dict, packed)
+    except Exception as e:
+        return {"type": "error", "index": index, "product_name": product_data["product_name"], "error": str(e)}
+    
+    return {
+        "type": "result",
+        "index": index,
+        "session_id": str(uuid.uuid4()),
+        "product_name": product_data["product_name"],
+        "analysis": analysis_result,
+        "_product_data": product_data
+    }
+
+@router.post("/batch")
+async def batch_analyze(
+    request: Request,
+    workers: int = Query(8, ge=1, le=64),
+    persist_batch_size: int = Query(100, ge=1, le=1000),
+    packed: bool = False,
+    ai_analyzer: AIRiskAnalyzer = Depends(get_analyzer),
+    product_cache: ProductCache = Depends(get_product_cache)
+):
+    """
+    Analyze a stream of products sent as NDJSON (one ProductAnalysisRequest per line,
+    optionally with a ``health_profile`` key).
+
+    Results are streamed back as NDJSON in completion order, tagged with the input
+    line ``index``; a final ``summary`` line closes the stream. Successful results are
+    persisted in transactions of ``persist_batch_size`` rows by a background task, so
+    commits never hold up the stream; the summary lists the ``index`` of any result
+    that could not be stored under ``not_persisted``. If the client disconnects the
+    workers are cancelled and the results so far are still stored.
+
+    With ``packed=true`` the AI analyses of concurrent workers are sent LLM_PACK_SIZE
+    products per LLM request; use at least that many ``workers``.
+    """
+    async def results():
+        chunks = asyncio.Queue(maxsize=2)
+        pending = asyncio.Queue(maxsize=workers * 2)
+        finished = asyncio.Queue()
+        # At most two full batches wait for the database before the stream slows down
+        persisting = asyncio.Queue(maxsize=2)
+        counts = {"received": 0, "succeeded": 0, "failed": 0, "persisted": 0, "not_persisted": []}
+        to_persist = []
+        
+        async def receive_body():
+            try:
+                async for chunk in request.stream():
+                    await chunks.put(chunk)
+            except ClientDisconnect:
+                await finished.put(_DISCONNECTED)
+                return
+            await chunks.put(None)
+            
+            # The body is fully read, so the next message on receive is the disconnect
+            while (await request.receive())["type"] != "http.disconnect":
+                pass
+            await finished.put(_DISCONNECTED)
+        
+        async def read_items():
+            index = 0
+            buffer = b""
+            try:
+                while (chunk := await chunks.get()) is not None:
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b"\n")
+                    for line in lines:
+                        if line.strip():
+                            await pending.put((index, line))
+                            index += 1
+                if buffer.strip():
+                    await pending.put((index, buffer))
+                    index += 1
+            finally:
+                counts["received"] = index
+            for _ in range(workers):
+                await pending.put(None)
+        
+        async def worker():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    break
+                await finished.put(await _analyze_batch_item(ai_analyzer, *item, packed))
+            await finished.put(None)
+        
+        async def persister():
+            while True:
+                batch = await persisting.get()
+                if batch is None:
+                    break
+                failed = await save_analyses_batch([item for _, item in batch], product_cache)
+                counts["persisted"] += len(batch) - len(failed)
+                counts["not_persisted"].extend(batch[position][0] for position in failed)
+        
+        async def persist():
+            batch = to_persist[:]
+            to_persist.clear()
+            await persisting.put(batch)
+        
+        body_receiver = asyncio.create_task(receive_body())
+        reader = asyncio.create_task(read_items())
+        workers_running = [asyncio.create_task(worker()) for _ in range(workers)]
+        persisting_task = asyncio.create_task(persister())
+        
+        try:
+            running = workers
+            while running:
+                result = await finished.get()
+                if result is _DISCONNECTED:
+                    # Client gone: stop analyzing, but still store what is already done
+                    print(f"Batch client disconnected after {counts['succeeded'] + counts['failed']} items")
+                    for task in [reader, *workers_running]:
+                        task.cancel()
+                    break
+                if result is None:
+                    running -= 1
+                    continue
+                
+                if result["type"] == "result":
+                    counts["succeeded"] += 1
+                    to_persist.append(
+                        (result["index"], (result.pop("_product_data"), result["analysis"], result["session_id"]))
+                    )
+                    if len(to_persist) >= persist_batch_size:
+                        await persist()
+                else:
+                    counts["failed"] += 1
+                
+                yield json.dumps(result, default=str) + "\n"
+            
+            if to_persist:
+                await persist()
+            await persisting.put(None)
+            await persisting_task
+            
+            yield json.dumps({"type": "summary", **counts}) + "\n"
+        finally:
+            for task in [body_receiver, reader, persisting_task, *workers_running]:
+                task.cancel()
+    
+    return NDJSONStreamingResponse(results())
+
+async def run_ai_phase(ai_analyzer: AIRiskAnalyzer, analysis_id: int, product_data: dict,
+                       health_profile: Optional[dict]) -> dict:
+    """
+    Second phase of a two-phase analysis: run the AI analysis and patch the stored row.
+    The row is marked failed if this errors or is cancelled at shutdown.
+    """
+    try:
+        ai_analysis = await ai_analyzer._ai_comprehensive_analysis(product_data, health_profile)
+        ai_fields = ai_analyzer._ai_fields(ai_analysis)
+        await patch_ai_analysis(analysis_id, {**ai_fields, "ai_status": "complete"})
+        return ai_fields
+    except (Exception, asyncio.CancelledError):
+        try:
+            await patch_ai_analysis(analysis_id, {"ai_status": "failed"})
+        except Exception as e:
+            print(f"Failed to mark AI phase of analysis {analysis_id} as failed: {e}")
+        raise
+
+async def patch_ai_analysis(analysis_id: int, values: dict):
+    """
+    Write AI results and status into an existing analysis row using a dedicated session
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            await db.execute(update(RiskAnalysis).where(RiskAnalysis.id == analysis_id).values(values))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+async def _stored_ai_status(analysis_id: int, db: AsyncSession) -> dict:
+    """
+    AI phase status from the database, for jobs running in another process or
+    no longer tracked in memory
+    """
+    analysis = await db.get(RiskAnalysis, analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    if analysis.ai_status == "pending":
+        return {"analysis_id": analysis_id, "status": "pending", "result": None, "error": None}
+    if analysis.ai_status == "failed":
+        return {"analysis_id": analysis_id, "status": "failed", "result": None, "error": "AI analysis did not complete"}
+    if analysis.ai_summary is None:
+        return {"analysis_id": analysis_id, "status": "unavailable", "result": None, "error": None}
+    
+    return {
+        "analysis_id": analysis_id,
+        "status": "complete",
+        "result": {
+            "confidence_score": analysis.confidence_score,
+            "ai_summary": analysis.ai_summary,
+            "ai_recommendations": analysis.ai_recommendations
+        },
+        "error": None
+    }
+
+@router.get("/analysis/{analysis_id}/ai")
+async def get_ai_result(
+    analysis_id: int,
+    db: AsyncSession = Depends(get_db),
+    ai_jobs: AIJobRegistry = Depends(get_ai_jobs)
+):
+    """
+    Poll for the AI phase of a two-phase analysis
+    """
+    job = ai_jobs.get(analysis_id)
+    if job:
+        return job.to_dict()
+    
+    try:
+        return await _stored_ai_status(analysis_id, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve AI result: {str(e)}")
+
+@router.get("/analysis/{analysis_id}/ai/stream")
+async def stream_ai_result(
+    analysis_id: int,
+    db: AsyncSession = Depends(get_db),
+    ai_jobs: AIJobRegistry = Depends(get_ai_jobs)
+):
+    """
+    Server-Sent Events stream that emits the AI phase result once it is available
+
+    Jobs running in another process are followed through the stored row, checked
+    every ``AI_STATUS_POLL_SECONDS``.
+    """
+    job = ai_jobs.get(analysis_id)
+    stored = None if job else await _stored_ai_status(analysis_id, db)
+    
+    async def events():
+        nonlocal stored
+        if job:
+            while not job.done.is_set():
+                try:
+                    await asyncio.wait_for(job.done.wait(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+            payload = job.to_dict()
+        else:
+            waited = 0.0
+            while stored["status"] == "pending":
+                await asyncio.sleep(AI_STATUS_POLL_SECONDS)
+                waited += AI_STATUS_POLL_SECONDS
+                if waited >= 15:
+                    waited = 0.0
+                    yield ": keep-alive\n\n"
+                async with AsyncSessionLocal() as poll_db:
+                    stored = await _stored_ai_status(analysis_id, poll_db)
+            payload = stored
+        
+        yield f"event: ai_result\ndata: {json.dumps(payload)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _encode_history_cursor(created_at: datetime, analysis_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{analysis_id}".encode()).decode()
+
+def _decode_history_cursor(cursor: str):
+    try:
+        created_at, analysis_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(analysis_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/history", response_model=list[AnalysisHistory])
 async def get_analysis_history(
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get recent analysis history
+    Get recent analysis history, newest first
+
+    Pages are keyed on (created_at, id): pass the ``X-Next-Cursor`` response header
+    back as ``cursor`` to fetch the next page.
     """
     try:
-        analyses = db.query(RiskAnalysis).order_by(RiskAnalysis.created_at.desc()).limit(limit).all()
-        
-        history = []
-        for analysis in analyses:
-            # Get product name from user submission or use generic name
-            submission = db.query(UserSubmission).filter(
-                UserSubmission.analysis_id == analysis.id
-            ).first()
-            
-            product_name = submission.product_name if submission else "Unknown Product"
-            
-            history.append(AnalysisHistory(
-                id=analysis.id,
-                product_name=product_name,
-                risk_level=analysis.risk_level,
-                overall_risk_score=analysis.overall_risk_score,
-                created_at=analysis.created_at
-            ))
+        query = select(
+            RiskAnalysis.id,
+            RiskAnalysis.risk_level,
+            RiskAnalysis.overall_risk_score,
+            RiskAnalysis.created_at,
+            UserSubmission.product_name
+        ).outerjoin(UserSubmission, UserSubmission.analysis_id == RiskAnalysis.id)
+        
+        if cursor:
+            created_at, analysis_id = _decode_history_cursor(cursor)
+            query = query.where(tuple_(RiskAnalysis.created_at, RiskAnalysis.id) < (created_at, analysis_id))
+        
+        rows = (await db.execute(
+            query.order_by(RiskAnalysis.created_at.desc(), RiskAnalysis.id.desc()).limit(limit)
+        )).all()
+        
+        history = [
+            AnalysisHistory(
+                id=row.id,
+                # Fall back to a generic name when there is no user submission
+                product_name=row.product_name or "Unknown Product",
+                risk_level=row.risk_level,
+                overall_risk_score=row.overall_risk_score,
+                created_at=row.created_at
+            )
+            for row in rows
+        ]
+        
+        if len(rows) == limit:
+            response.headers["X-Next-Cursor"] = _encode_history_cursor(rows[-1].created_at, rows[-1].id)
         
         return history
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve history: {str(e)}")
 
-@router.get("/analysis/{analysis_id}")
+@router.get("/analysis/{analysis_id}", response_model=AnalysisDetailsResponse)
 async def get_analysis_details(
     analysis_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get detailed analysis results by ID
     """
     try:
-        analysis = db.query(RiskAnalysis).filter(RiskAnalysis.id == analysis_id).first()
+        analysis = await db.get(RiskAnalysis, analysis_id)
         
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
         
         # Get associated user submission
-        submission = db.query(UserSubmission).filter(
+        submission = await db.scalar(select(UserSubmission).where(
             UserSubmission.analysis_id == analysis_id
-        ).first()
+        ).limit(1))
         
         return {
-            "analysis": {
-                "id": analysis.id,
-                "overall_risk_score": analysis.overall_risk_score,
-                "risk_level": analysis.risk_level,
-                "confidence_score": analysis.confidence_score,
-                "allergen_risk": {
-                    "score": analysis.allergen_risk,
-                    "allergens": analysis.identified_allergens
-                },
-                "nutritional_risk": analysis.nutritional_risk,
-                "additive_risk": analysis.additive_risk,
-                "contamination_risk": analysis.contamination_risk,
-                "interaction_risk": analysis.interaction_risk,
-                "identified_allergens": analysis.identified_allergens,
-                "harmful_additives": analysis.harmful_additives,
-                "nutritional_concerns": analysis.nutritional_concerns,
-                "safety_warnings": analysis.safety_warnings,
-                "ai_summary": analysis.ai_summary,
-                "ai_recommendations": analysis.ai_recommendations,
-                "created_at": analysis.created_at
-            },
+            "analysis": StoredAnalysis.from_row(analysis),
             "product": {
                 "name": submission.product_name if submission else "Unknown",
                 "description": submission.product_description if submission else "",
@@ -145,110 +503,111 @@ async def get_analysis_details(
 @router.post("/quick-check")
 async def quick_ingredient_check(
     ingredients: str,
-    allergens: Optional[list[str]] = None
+    allergens: Optional[list[str]] = None,
+    rule_engine: RuleEngine = Depends(get_rule_engine)
 ):
     """
     Quick check for specific allergens in ingredients list
     """
     try:
-        analyzer = AIRiskAnalyzer()
-        
-        # Parse ingredients
-        ingredient_list = analyzer._parse_ingredients(ingredients)
+        return {"status": "success", **await rule_engine.quick_check(ingredients, allergens)}
         
-        # Check for allergens
-        health_profile = {"allergies": allergens} if allergens else None
-        allergen_analysis = await analyzer._analyze_allergens(ingredient_list, health_profile)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Quick check failed: {str(e)}")
+
+@router.post("/quick-check/batch")
+async def quick_ingredient_check_batch(
+    request: QuickCheckBatchRequest,
+    rule_engine: RuleEngine = Depends(get_rule_engine)
+):
+    """
+    Quick allergen check for many ingredient lists in one request
+
+    Each item may carry its own ``allergens``; otherwise the batch-level list applies.
+    """
+    try:
+        results = []
+        for item in request.items:
+            allergens = item.allergens if item.allergens is not None else request.allergens
+            results.append(await rule_engine.quick_check(item.ingredients, allergens))
         
-        return {
-            "status": "success",
-            "ingredients_found": ingredient_list,
-            "allergen_warnings": allergen_analysis["details"],
-            "risk_level": allergen_analysis["severity"],
-            "identified_allergens": allergen_analysis.get("allergens", [])
-        }
+        return {"status": "success", "results": results}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Quick check failed: {str(e)}")
 
-def save_analysis_to_db(db: Session, product_data: dict, analysis_result: dict, session_id: str):
+@router.post("/rescore", response_model=RescoreResponse, response_model_exclude_unset=True)
+async def rescore_analyses(
+    request: RescoreRequest,
+    db: AsyncSession = Depends(get_read_db),
+    rule_engine: RuleEngine = Depends(get_rule_engine)
+):
+    """
+    Recompute personalized scores, risk level and warnings of stored analyses under a health profile
+
+    Uses the findings stored with each analysis, so nothing is re-parsed and the LLM is not called.
+    Analyses saved before findings were recorded are listed under ``unavailable``.
+    """
+    try:
+        health_profile_dict = request.health_profile.model_dump() if request.health_profile else None
+        
+        rows = (await db.execute(select(RiskAnalysis.id, RiskAnalysis.findings).where(
+            RiskAnalysis.id.in_(set(request.analysis_ids))
+        ))).all()
+        findings_by_id = {row.id: row.findings for row in rows}
+        
+        results = []
+        missing = []
+        unavailable = []
+        for analysis_id in request.analysis_ids:
+            if analysis_id not in findings_by_id:
+                missing.append(analysis_id)
+            elif not findings_by_id[analysis_id]:
+                unavailable.append(analysis_id)
+            else:
+                results.append({
+                    "analysis_id": analysis_id,
+                    **rule_engine.rescore(findings_by_id[analysis_id], health_profile_dict)
+                })
+        
+        return {"status": "success", "results": results, "missing": missing, "unavailable": unavailable}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Rescore failed: {str(e)}")
+
+async def save_analysis_to_db(db: AsyncSession, product_data: dict, analysis_result: dict, session_id: str,
+                              product_cache: Optional[ProductCache] = None):
     """
-    Save analysis results to database (background task)
+    Save one analysis synchronously on the given session; returns the analysis id
     """
+    start = time.perf_counter()
     try:
-        # Create product record
-        product = Product(
-            name=product_data["product_name"],
-            category=product_data.get("category"),
-            ingredients=product_data["ingredients"],
-            nutrition_facts=product_data.get("nutrition_facts")
-        )
-        db.add(product)
-        db.flush()  # Get the ID
-        
-        # Create risk analysis record
-        risk_analysis = RiskAnalysis(
-            product_id=product.id,
-            overall_risk_score=analysis_result.get("overall_risk_score", 0),
-            risk_level=analysis_result.get("risk_level", "UNKNOWN"),
-            allergen_risk=analysis_result.get("allergen_risk", {}).get("score", 0),
-            nutritional_risk=analysis_result.get("nutritional_risk", {}).get("score", 0),
-            additive_risk=analysis_result.get("additive_risk", {}).get("score", 0),
-            contamination_risk=analysis_result.get("contamination_risk", {}).get("score", 0),
-            interaction_risk=analysis_result.get("interaction_risk", {}).get("score", 0),
-            identified_allergens=analysis_result.get("identified_allergens", []),
-            harmful_additives=analysis_result.get("harmful_additives", []),
-            nutritional_concerns=analysis_result.get("nutritional_concerns", []),
-            safety_warnings=analysis_result.get("safety_warnings", []),
-            ai_summary=analysis_result.get("ai_summary", ""),
-            ai_recommendations=analysis_result.get("ai_recommendations", []),
-            confidence_score=analysis_result.get("confidence_score", 0),
-            analyzer_version="1.0.0"
-        )
-        db.add(risk_analysis)
-        db.flush()
-        
-        # Create user submission record
-        user_submission = UserSubmission(
-            session_id=session_id,
-            product_name=product_data["product_name"],
-            product_description=product_data.get("product_description", ""),
-            ingredients_text=product_data["ingredients"],
-            analysis_id=risk_analysis.id
-        )
-        db.add(user_submission)
-        
-        db.commit()
+        items = [(product_data, analysis_result, session_id)]
+        analysis_id = (await db.run_sync(write_analyses, items))[0]
+        await db.commit()
+        observe_db_write("save_analysis", time.perf_counter() - start)
+        products_added(product_cache, items)
+        return analysis_id
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Failed to save analysis to database: {e}")
+        return None
 
 @router.get("/stats")
-async def get_analysis_stats(db: Session = Depends(get_db)):
+async def get_analysis_stats(
+    breakdown: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    Get analysis statistics
+    Get analysis statistics from the incrementally maintained summary table
+
+    Set ``breakdown=true`` to include per-day and per-category buckets.
     """
     try:
-        total_analyses = db.query(RiskAnalysis).count()
-        
-        # Count by risk level
-        risk_level_counts = {}
-        for level in ["LOW", "MEDIUM", "HIGH", "CRITICAL"]:
-            count = db.query(RiskAnalysis).filter(RiskAnalysis.risk_level == level).count()
-            risk_level_counts[level.lower()] = count
-        
-        # Average risk score
-        avg_risk_score = db.query(RiskAnalysis).with_entities(
-            db.func.avg(RiskAnalysis.overall_risk_score)
-        ).scalar() or 0
-        
-        return {
-            "total_analyses": total_analyses,
-            "risk_distribution": risk_level_counts,
-            "average_risk_score": round(float(avg_risk_score), 1),
-            "last_updated": datetime.utcnow().isoformat()
-        }
+        stats = await db.run_sync(get_stats, breakdown)
+        stats["last_updated"] = datetime.utcnow().isoformat()
+        return stats
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
\ No newline at end of file
@@ -1,26 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models import Product
 from ..schemas import Product as ProductSchema, ProductCreate
+from ..product_search import search_product_ids
+from ..product_cache import ProductCache, product_dict
+from ..dependencies import get_product_cache
 
 router = APIRouter()
 
 @router.post("/", response_model=ProductSchema)
-async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
+async def create_product(
+    product: ProductCreate,
+    db: AsyncSession = Depends(get_db),
+    product_cache: ProductCache = Depends(get_product_cache)
+):
     """
     Create a new product in the database
     """
     try:
-        db_product = Product(**product.dict())
+        db_product = Product(**{**product.model_dump(), "barcode": product.barcode or None})
         db.add(db_product)
-        db.commit()
-        db.refresh(db_product)
+        await db.commit()
+        await db.refresh(db_product)
+        # The id or barcode may have been cached as not found
+        product_cache.invalidate([db_product.id], [db_product.barcode], categories=bool(db_product.category))
         return db_product
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="A product with this barcode already exists")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create product: {str(e)}")
 
 @router.get("/", response_model=List[ProductSchema])
@@ -29,35 +43,62 @@ async def get_products(
     limit: int = Query(100, ge=1, le=1000),
     category: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get products with optional filtering
     """
     try:
-        query = db.query(Product)
+        query = select(Product)
         
         if category:
-            query = query.filter(Product.category.ilike(f"%{category}%"))
+            query = query.where(Product.category.ilike(f"%{category}%"))
         
         if search:
-            query = query.filter(
+            query = query.where(
                 (Product.name.ilike(f"%{search}%")) |
                 (Product.brand.ilike(f"%{search}%"))
             )
         
-        products = query.offset(skip).limit(limit).all()
+        products = (await db.scalars(query.offset(skip).limit(limit))).all()
         return products
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve products: {str(e)}")
 
+@router.get("/search", response_model=List[ProductSchema])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Ranked full-text search over name, brand, category and ingredients
+    """
+    try:
+        product_ids = await db.run_sync(search_product_ids, q, limit, skip)
+        if not product_ids:
+            return []
+        
+        products = {p.id: p for p in await db.scalars(select(Product).where(Product.id.in_(product_ids)))}
+        return [products[product_id] for product_id in product_ids if product_id in products]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search products: {str(e)}")
+
 @router.get("/{product_id}", response_model=ProductSchema)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(
+    product_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    product_cache: ProductCache = Depends(get_product_cache)
+):
     """
     Get a specific product by ID
     """
     try:
-        product = db.query(Product).filter(Product.id == product_id).first()
+        async def load():
+            return product_dict(await db.get(Product, product_id))
+        
+        product = await product_cache.get_product(product_id, load)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         return product
@@ -67,12 +108,19 @@ async def get_product(product_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve product: {str(e)}")
 
 @router.get("/barcode/{barcode}", response_model=ProductSchema)
-async def get_product_by_barcode(barcode: str, db: Session = Depends(get_db)):
+async def get_product_by_barcode(
+    barcode: str,
+    db: AsyncSession = Depends(get_read_db),
+    product_cache: ProductCache = Depends(get_product_cache)
+):
     """
     Get a product by barcode
     """
     try:
-        product = db.query(Product).filter(Product.barcode == barcode).first()
+        async def load():
+            return product_dict(await db.scalar(select(Product).where(Product.barcode == barcode)))
+        
+        product = await product_cache.get_by_barcode(barcode, load)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         return product
@@ -85,56 +133,78 @@ async def get_product_by_barcode(barcode: str, db: Session = Depends(get_db)):
 async def update_product(
     product_id: int,
     product_update: ProductCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    product_cache: ProductCache = Depends(get_product_cache)
 ):
     """
     Update an existing product
     """
     try:
-        db_product = db.query(Product).filter(Product.id == product_id).first()
+        db_product = await db.get(Product, product_id)
         if not db_product:
             raise HTTPException(status_code=404, detail="Product not found")
         
+        old_barcode, old_category = db_product.barcode, db_product.category
         update_data = product_update.dict(exclude_unset=True)
+        if "barcode" in update_data:
+            update_data["barcode"] = update_data["barcode"] or None
         for field, value in update_data.items():
             setattr(db_product, field, value)
         
-        db.commit()
-        db.refresh(db_product)
+        await db.commit()
+        await db.refresh(db_product)
+        product_cache.invalidate(
+            [product_id], [old_barcode, db_product.barcode], categories=db_product.category != old_category
+        )
         return db_product
     except HTTPException:
         raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="A product with this barcode already exists")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update product: {str(e)}")
 
 @router.delete("/{product_id}")
-async def delete_product(product_id: int, db: Session = Depends(get_db)):
+async def delete_product(
+    product_id: int,
+    db: AsyncSession = Depends(get_db),
+    product_cache: ProductCache = Depends(get_product_cache)
+):
     """
     Delete a product
     """
     try:
-        db_product = db.query(Product).filter(Product.id == product_id).first()
+        db_product = await db.get(Product, product_id)
         if not db_product:
             raise HTTPException(status_code=404, detail="Product not found")
         
-        db.delete(db_product)
-        db.commit()
+        await db.delete(db_product)
+        await db.commit()
+        product_cache.invalidate([product_id], [db_product.barcode], categories=bool(db_product.category))
         return {"message": "Product deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete product: {str(e)}")
 
 @router.get("/categories/list")
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(
+    db: AsyncSession = Depends(get_read_db),
+    product_cache: ProductCache = Depends(get_product_cache)
+):
     """
     Get list of unique product categories
     """
     try:
-        categories = db.query(Product.category).distinct().filter(Product.category.isnot(None)).all()
-        category_list = [cat[0] for cat in categories if cat[0]]
-        return {"categories": sorted(category_list)}
+        async def load():
+            categories = (await db.execute(
+                select(Product.category).distinct().where(Product.category.isnot(None))
+            )).all()
+            return sorted(cat[0] for cat in categories if cat[0])
+        
+        return {"categories": await product_cache.get_categories(load)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve categories: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,383 @@
+import os
+from typing import Dict, List, Optional, Tuple
+import asyncio
+
+from .knowledge_base import KnowledgeBase, KnowledgeBaseStore
+from .ingredient_tokenizer import IngredientTokenizer
+from .metrics import timed_stage
+
+# Bump whenever scoring rules or weights change; stored analyses from other
+# versions are picked up by the re-analysis job (backend/reanalysis.py)
+RULES_VERSION = "1.1.1"
+
+class RuleEngine:
+    """
+    Rule-based product risk analysis: ingredient parsing, the allergen, additive,
+    nutrition, contamination and interaction rules, and risk scoring.
+
+    Holds no LLM clients, so it is cheap to build and safe to share across requests.
+    """
+
+    def __init__(self, knowledge_base_store: Optional[KnowledgeBaseStore] = None):
+        # Allergen, additive, interaction and contamination tables live in the
+        # compiled knowledge base; the store swaps in new versions without a restart
+        self.knowledge_base_store = knowledge_base_store or KnowledgeBaseStore.from_env()
+        
+        self.nutrition_thresholds = {
+            "sodium": {"high": 600, "very_high": 1400},  # mg per serving
+            "sugar": {"high": 15, "very_high": 25},      # g per serving
+            "saturated_fat": {"high": 5, "very_high": 10}, # g per serving
+            "trans_fat": {"any": 0.5}                    # g per serving
+        }
+        
+        # Category weights for the overall score
+        self.risk_weights = {
+            "allergen": 0.3,
+            "additive": 0.25,
+            "nutrition": 0.2,
+            "contamination": 0.15,
+            "interaction": 0.1
+        }
+        
+        # Overall score cut-offs, highest first
+        self.risk_level_cutoffs = [(80, "CRITICAL"), (60, "HIGH"), (30, "MEDIUM")]
+        
+        # Memoized structured parser; statements recur constantly across the catalog
+        self.ingredient_tokenizer = IngredientTokenizer(
+            cache_size=int(os.getenv("INGREDIENT_PARSE_CACHE_SIZE", "4096"))
+        )
+
+    @property
+    def knowledge_base(self) -> KnowledgeBase:
+        """The active knowledge base version; take one reference per analysis"""
+        return self.knowledge_base_store.knowledge_base
+
+    @property
+    def analyzer_version(self) -> str:
+        """Rules version plus knowledge base version, stored with every analysis"""
+        return f"{RULES_VERSION}+{self.knowledge_base.version}"[:50]
+
+    async def quick_check(self, ingredients_text: str, allergies: Optional[List[str]] = None) -> Dict:
+        """Allergen check for a raw ingredient statement"""
+        ingredient_list, matches = self._match_ingredients(ingredients_text)
+        health_profile = {"allergies": allergies} if allergies else None
+        allergen_analysis = await self._analyze_allergens(ingredient_list, health_profile, matches)
+        
+        return {
+            "ingredients_found": ingredient_list,
+            "allergen_warnings": allergen_analysis["details"],
+            "risk_level": allergen_analysis["severity"],
+            "identified_allergens": allergen_analysis.get("allergens", [])
+        }
+
+    async def _rule_based_analysis(self, product_data: Dict, health_profile: Optional[Dict]) -> Dict:
+        """Run every rule-based analyzer and score the result"""
+        # Parse ingredients and match every rule dictionary in a single pass
+        ingredients, matches = self._match_ingredients(product_data.get("ingredients", ""))
+        
+        tasks = [
+            self._analyze_allergens(ingredients, health_profile, matches),
+            self._analyze_additives(ingredients, matches),
+            self._analyze_nutrition(product_data.get("nutrition_facts", {})),
+            self._analyze_contamination_risk(product_data),
+            self._analyze_drug_interactions(ingredients, health_profile, matches)
+        ]
+        
+        allergen_analysis, additive_analysis, nutrition_analysis, contamination_analysis, interaction_analysis = await asyncio.gather(*tasks)
+        
+        # Calculate overall risk score
+        overall_score = self._calculate_overall_risk(
+            allergen_analysis, additive_analysis, nutrition_analysis, 
+            contamination_analysis, interaction_analysis
+        )
+        
+        # Determine risk level
+        risk_level = self._determine_risk_level(overall_score)
+        
+        return {
+            "overall_risk_score": overall_score,
+            "risk_level": risk_level,
+            "confidence_score": None,
+            "allergen_risk": allergen_analysis,
+            "nutritional_risk": nutrition_analysis,
+            "additive_risk": additive_analysis,
+            "contamination_risk": contamination_analysis,
+            "interaction_risk": interaction_analysis,
+            "identified_allergens": allergen_analysis.get("allergens", []),
+            "harmful_additives": additive_analysis.get("harmful", []),
+            "nutritional_concerns": nutrition_analysis.get("concerns", []),
+            "safety_warnings": self._generate_safety_warnings(allergen_analysis, additive_analysis, nutrition_analysis),
+            "findings": self._findings(matches, additive_analysis, nutrition_analysis, contamination_analysis),
+            "health_profile": health_profile,
+            "analyzer_version": self.analyzer_version,
+            "ai_summary": None,
+            "ai_recommendations": None
+        }
+
+    def _findings(self, matches: Dict[str, List[str]], additive_analysis: Dict,
+                  nutrition_analysis: Dict, contamination_analysis: Dict) -> Dict:
+        """Everything the personalized scores depend on except the health profile"""
+        return {
+            "allergens": list(matches["allergen"]),
+            "interactions": list(matches["interaction"]),
+            "additive": {"score": additive_analysis["score"], "severity": additive_analysis["severity"]},
+            "nutrition": {"score": nutrition_analysis["score"], "severity": nutrition_analysis["severity"]},
+            "contamination": {"score": contamination_analysis["score"], "severity": contamination_analysis["severity"]}
+        }
+
+    def rescore(self, findings: Dict, health_profile: Optional[Dict]) -> Dict:
+        """
+        Recompute the personalized scores of a stored analysis from its findings,
+        without parsing, matching or calling the LLM
+        """
+        allergen_analysis = self._score_allergens(findings["allergens"], health_profile)
+        interaction_analysis = self._score_interactions(findings["interactions"], health_profile)
+        additive_analysis, nutrition_analysis = findings["additive"], findings["nutrition"]
+        
+        overall_score = self._calculate_overall_risk(
+            allergen_analysis, additive_analysis, nutrition_analysis,
+            findings["contamination"], interaction_analysis
+        )
+        
+        return {
+            "overall_risk_score": overall_score,
+            "risk_level": self._determine_risk_level(overall_score),
+            "allergen_risk": allergen_analysis,
+            "interaction_risk": interaction_analysis,
+            "safety_warnings": self._generate_safety_warnings(allergen_analysis, additive_analysis, nutrition_analysis)
+        }
+
+    def _parse_ingredients(self, ingredients_text: str) -> List[str]:
+        """Parse ingredients from text into canonical lowercase names, nested sub-ingredients included"""
+        return self.ingredient_tokenizer.names(ingredients_text)
+
+    def _match_ingredients(self, ingredients_text: str) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        Parsed ingredient names and their rule matches. Each entry counts once per
+        top-level ingredient, so "milk chocolate (milk, sugar)" contains milk once.
+        """
+        ingredients = self._parse_ingredients(ingredients_text)
+        groups = self.ingredient_tokenizer.top_level(ingredients_text)
+        return ingredients, self.knowledge_base.match(ingredients, normalized=True, groups=groups)
+
+    @timed_stage("allergens")
+    async def _analyze_allergens(self, ingredients: List[str], health_profile: Optional[Dict],
+                                 matches: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """Analyze potential allergens"""
+        if matches is None:
+            matches = self.knowledge_base.match(ingredients)
+        
+        return self._score_allergens(matches["allergen"], health_profile)
+
+    def _score_allergens(self, allergens: List[str], health_profile: Optional[Dict]) -> Dict:
+        """Personalized allergen score for the matched allergens"""
+        identified_allergens = []
+        risk_details = []
+        
+        for allergen in allergens:
+            identified_allergens.append(allergen)
+            
+            # Check against user's allergies
+            if health_profile and allergen in health_profile.get("allergies", []):
+                risk_details.append(f"CRITICAL: Contains {allergen} - matches your allergy profile")
+            else:
+                risk_details.append(f"Contains {allergen}")
+        
+        # Calculate risk score
+        base_score = len(identified_allergens) * 15
+        personal_risk_multiplier = 3 if health_profile and any(
+            allergen in health_profile.get("allergies", []) for allergen in identified_allergens
+        ) else 1
+        
+        score = min(base_score * personal_risk_multiplier, 100)
+        severity = "CRITICAL" if score > 80 else "HIGH" if score > 50 else "MEDIUM" if score > 20 else "LOW"
+        
+        return {
+            "score": score,
+            "details": risk_details,
+            "severity": severity,
+            "allergens": identified_allergens
+        }
+
+    @timed_stage("additives")
+    async def _analyze_additives(self, ingredients: List[str],
+                                 matches: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """Analyze harmful additives"""
+        if matches is None:
+            matches = self.knowledge_base.match(ingredients)
+        
+        harmful_found = []
+        risk_details = []
+        
+        for additive in matches["additive"]:
+            # "" only if a reload dropped the entry between matching and this lookup
+            concern = self.knowledge_base.detail("additive", additive) or ""
+            harmful_found.append({"name": additive, "concern": concern})
+            risk_details.append(f"Contains {additive}: {concern}")
+        
+        score = len(harmful_found) * 20
+        severity = "HIGH" if score > 60 else "MEDIUM" if score > 30 else "LOW"
+        
+        return {
+            "score": min(score, 100),
+            "details": risk_details,
+            "severity": severity,
+            "harmful": harmful_found
+        }
+
+    @timed_stage("nutrition")
+    async def _analyze_nutrition(self, nutrition_facts: Dict) -> Dict:
+        """Analyze nutritional risks"""
+        concerns = []
+        risk_details = []
+        score = 0
+        
+        if not nutrition_facts:
+            return {"score": 20, "details": ["Nutrition information not available"], "severity": "MEDIUM", "concerns": []}
+        
+        # Analyze sodium
+        sodium = nutrition_facts.get("sodium_mg", 0)
+        if sodium > self.nutrition_thresholds["sodium"]["very_high"]:
+            concerns.append({"type": "sodium", "level": "very_high", "value": sodium})
+            risk_details.append(f"Very high sodium content: {sodium}mg")
+            score += 25
+        elif sodium > self.nutrition_thresholds["sodium"]["high"]:
+            concerns.append({"type": "sodium", "level": "high", "value": sodium})
+            risk_details.append(f"High sodium content: {sodium}mg")
+            score += 15
+        
+        # Analyze sugar
+        sugar = nutrition_facts.get("sugar_g", 0)
+        if sugar > self.nutrition_thresholds["sugar"]["very_high"]:
+            concerns.append({"type": "sugar", "level": "very_high", "value": sugar})
+            risk_details.append(f"Very high sugar content: {sugar}g")
+            score += 20
+        elif sugar > self.nutrition_thresholds["sugar"]["high"]:
+            concerns.append({"type": "sugar", "level": "high", "value": sugar})
+            risk_details.append(f"High sugar content: {sugar}g")
+            score += 10
+        
+        # Analyze trans fat
+        trans_fat = nutrition_facts.get("trans_fat_g", 0)
+        if trans_fat > self.nutrition_thresholds["trans_fat"]["any"]:
+            concerns.append({"type": "trans_fat", "level": "any", "value": trans_fat})
+            risk_details.append(f"Contains trans fat: {trans_fat}g")
+            score += 30
+        
+        severity = "HIGH" if score > 50 else "MEDIUM" if score > 25 else "LOW"
+        
+        return {
+            "score": min(score, 100),
+            "details": risk_details,
+            "severity": severity,
+            "concerns": concerns
+        }
+
+    @timed_stage("contamination")
+    async def _analyze_contamination_risk(self, product_data: Dict) -> Dict:
+        """Analyze contamination risks"""
+        risk_factors = []
+        score = 0
+        
+        tables = self.knowledge_base.contamination
+        category = product_data.get("category", "").lower()
+        
+        # High-risk categories
+        if any(cat in category for cat in tables.get("high_risk_categories", [])):
+            risk_factors.append("High-risk category for bacterial contamination")
+            score += 20
+        
+        ingredients = product_data.get("ingredients", "").lower()
+        
+        if (any(marker in category for marker in tables.get("raw_categories", []))
+                or any(marker in ingredients for marker in tables.get("raw_ingredients", []))):
+            risk_factors.append("Raw/unpasteurized product - higher contamination risk")
+            score += 30
+        
+        # Check for recall-prone ingredients
+        if any(ingredient in ingredients for ingredient in tables.get("recall_prone", [])):
+            risk_factors.append("Contains ingredients with history of contamination issues")
+            score += 15
+        
+        severity = "HIGH" if score > 40 else "MEDIUM" if score > 20 else "LOW"
+        
+        return {
+            "score": min(score, 100),
+            "details": risk_factors or ["Low contamination risk"],
+            "severity": severity
+        }
+
+    @timed_stage("drug_interactions")
+    async def _analyze_drug_interactions(self, ingredients: List[str], health_profile: Optional[Dict],
+                                         matches: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """Analyze potential drug interactions"""
+        if not health_profile or not health_profile.get("medical_conditions"):
+            return self._score_interactions([], health_profile)
+        
+        if matches is None:
+            matches = self.knowledge_base.match(ingredients)
+        
+        return self._score_interactions(matches["interaction"], health_profile)
+
+    def _score_interactions(self, interaction_ingredients: List[str], health_profile: Optional[Dict]) -> Dict:
+        """Personalized interaction score for the matched interaction ingredients"""
+        interactions = []
+        score = 0
+        
+        if not health_profile or not health_profile.get("medical_conditions"):
+            return {"score": 0, "details": ["No medical conditions specified"], "severity": "LOW"}
+        
+        for interaction_ingredient in interaction_ingredients:
+            warning = self.knowledge_base.detail("interaction", interaction_ingredient) or ""
+            interactions.append(f"{interaction_ingredient}: {warning}")
+            score += 25
+        
+        severity = "HIGH" if score > 50 else "MEDIUM" if score > 25 else "LOW"
+        
+        return {
+            "score": min(score, 100),
+            "details": interactions or ["No known drug interactions"],
+            "severity": severity
+        }
+
+    def _calculate_overall_risk(self, allergen_analysis: Dict, additive_analysis: Dict, 
+                              nutrition_analysis: Dict, contamination_analysis: Dict, 
+                              interaction_analysis: Dict) -> float:
+        """Calculate weighted overall risk score"""
+        weights = self.risk_weights
+        
+        overall_score = (
+            allergen_analysis["score"] * weights["allergen"] +
+            additive_analysis["score"] * weights["additive"] +
+            nutrition_analysis["score"] * weights["nutrition"] +
+            contamination_analysis["score"] * weights["contamination"] +
+            interaction_analysis["score"] * weights["interaction"]
+        )
+        
+        return round(overall_score, 1)
+
+    def _determine_risk_level(self, score: float) -> str:
+        """Determine risk level based on score"""
+        for cutoff, level in self.risk_level_cutoffs:
+            if score >= cutoff:
+                return level
+        return "LOW"
+
+    def _generate_safety_warnings(self, allergen_analysis: Dict, additive_analysis: Dict, 
+                                nutrition_analysis: Dict) -> List[str]:
+        """Generate safety warnings"""
+        warnings = []
+        
+        if allergen_analysis["severity"] in ["HIGH", "CRITICAL"]:
+            warnings.append("⚠️ Contains known allergens - check ingredient list carefully")
+        
+        if additive_analysis["severity"] == "HIGH":
+            warnings.append("⚠️ Contains potentially harmful additives")
+        
+        if nutrition_analysis["severity"] == "HIGH":
+            warnings.append("⚠️ High in sodium, sugar, or unhealthy fats")
+        
+        if not warnings:
+            warnings.append("✅ No major safety concerns identified")
+        
+        return warnings
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -14,12 +14,11 @@ class ProductCreate(ProductBase):
     pass
 
 class Product(ProductBase):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        orm_mode = True
 
 class ProductAnalysisRequest(BaseModel):
     product_name: str
@@ -28,15 +27,29 @@ class ProductAnalysisRequest(BaseModel):
     product_description: Optional[str] = None
     category: Optional[str] = None
 
+class QuickCheckItem(BaseModel):
+    ingredients: str
+    allergens: Optional[List[str]] = None
+
+class QuickCheckBatchRequest(BaseModel):
+    items: List[QuickCheckItem] = Field(..., max_length=1000)
+    allergens: Optional[List[str]] = None
+
 class RiskCategory(BaseModel):
     score: float = Field(..., ge=0, le=100)
     details: List[str] = []
-    severity: str = Field(..., regex="^(LOW|MEDIUM|HIGH|CRITICAL)$")
+    severity: str = Field(..., pattern="^(LOW|MEDIUM|HIGH|CRITICAL)$")
+    
+    # Matches behind the score, depending on the category
+    allergens: Optional[List[str]] = None
+    concerns: Optional[List[Dict[str, Any]]] = None
+    harmful: Optional[List[Dict[str, Any]]] = None
 
 class RiskAnalysisResponse(BaseModel):
     overall_risk_score: float = Field(..., ge=0, le=100)
-    risk_level: str = Field(..., regex="^(LOW|MEDIUM|HIGH|CRITICAL)$")
-    confidence_score: float = Field(..., ge=0, le=100)
+    risk_level: str = Field(..., pattern="^(LOW|MEDIUM|HIGH|CRITICAL)$")
+    # None until the AI phase of a two-phase analysis completes
+    confidence_score: Optional[float] = Field(None, ge=0, le=100)
     
     # Risk categories
     allergen_risk: RiskCategory
@@ -47,30 +60,133 @@ class RiskAnalysisResponse(BaseModel):
     
     # Detailed analysis
     identified_allergens: List[str]
-    harmful_additives: List[Dict[str, str]]
-    nutritional_concerns: List[Dict[str, str]]
+    harmful_additives: List[Dict[str, Any]]
+    nutritional_concerns: List[Dict[str, Any]]
     safety_warnings: List[str]
     
     # AI insights
-    ai_summary: str
-    ai_recommendations: List[str]
+    ai_summary: Optional[str] = None
+    ai_recommendations: Optional[List[str]] = None
+    
+    analyzer_version: Optional[str] = None
     
+    # Set once the row is stored; write-behind analyses are not stored yet
+    analysis_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class AnalyzeResponse(BaseModel):
+    status: str
+    session_id: str
+    analysis: RiskAnalysisResponse
+    
+    # Two-phase analyses only
+    analysis_id: Optional[int] = None
+    ai_status: Optional[str] = None
+    ai_result_url: Optional[str] = None
+    ai_stream_url: Optional[str] = None
+
+class AllergenRiskSummary(BaseModel):
+    score: Optional[float] = None
+    allergens: Optional[List[str]] = None
+
+class StoredAnalysis(BaseModel):
+    """A stored analysis row; category risks are kept as scores only"""
+    id: int
+    overall_risk_score: Optional[float] = None
+    risk_level: Optional[str] = None
+    confidence_score: Optional[float] = None
+    allergen_risk: AllergenRiskSummary
+    nutritional_risk: Optional[float] = None
+    additive_risk: Optional[float] = None
+    contamination_risk: Optional[float] = None
+    interaction_risk: Optional[float] = None
+    identified_allergens: Optional[List[str]] = None
+    harmful_additives: Optional[List[Dict[str, Any]]] = None
+    nutritional_concerns: Optional[List[Dict[str, Any]]] = None
+    safety_warnings: Optional[List[str]] = None
+    ai_summary: Optional[str] = None
+    ai_recommendations: Optional[List[str]] = None
+    created_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_row(cls, analysis) -> "StoredAnalysis":
+        """Build from a RiskAnalysis row, grouping the allergen score with the allergens"""
+        return cls(
+            id=analysis.id,
+            overall_risk_score=analysis.overall_risk_score,
+            risk_level=analysis.risk_level,
+            confidence_score=analysis.confidence_score,
+            allergen_risk=AllergenRiskSummary(score=analysis.allergen_risk, allergens=analysis.identified_allergens),
+            nutritional_risk=analysis.nutritional_risk,
+            additive_risk=analysis.additive_risk,
+            contamination_risk=analysis.contamination_risk,
+            interaction_risk=analysis.interaction_risk,
+            identified_allergens=analysis.identified_allergens,
+            harmful_additives=analysis.harmful_additives,
+            nutritional_concerns=analysis.nutritional_concerns,
+            safety_warnings=analysis.safety_warnings,
+            ai_summary=analysis.ai_summary,
+            ai_recommendations=analysis.ai_recommendations,
+            created_at=analysis.created_at
+        )
+
+class SubmittedProduct(BaseModel):
+    name: str
+    description: Optional[str] = ""
+    ingredients: Optional[str] = ""
+
+class AnalysisDetailsResponse(BaseModel):
+    analysis: StoredAnalysis
+    product: SubmittedProduct
+
+class RescoreResult(BaseModel):
     analysis_id: int
-    created_at: datetime
+    overall_risk_score: float
+    risk_level: str
+    allergen_risk: RiskCategory
+    interaction_risk: RiskCategory
+    safety_warnings: List[str]
+
+class RescoreResponse(BaseModel):
+    status: str
+    results: List[RescoreResult]
+    missing: List[int]
+    unavailable: List[int]
 
 class AnalysisHistory(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     product_name: str
     risk_level: str
     overall_risk_score: float
     created_at: datetime
-    
-    class Config:
-        orm_mode = True
 
 class HealthProfile(BaseModel):
     allergies: List[str] = []
     dietary_restrictions: List[str] = []
     medical_conditions: List[str] = []
     age_group: Optional[str] = None
-    pregnancy_status: Optional[bool] = None
\ No newline at end of file
+    pregnancy_status: Optional[bool] = None
+
+class RescoreRequest(BaseModel):
+    analysis_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    health_profile: Optional[HealthProfile] = None
+
+def validate_ai_response(entry) -> Optional[Dict]:
+    """The analysis fields of one LLM response object, or None when it is unusable"""
+    if not isinstance(entry, dict):
+        return None
+    summary = entry.get("summary")
+    recommendations = entry.get("recommendations", [])
+    confidence = entry.get("confidence", 80)
+    concerns = entry.get("concerns", [])
+    if not isinstance(summary, str) or not summary.strip():
+        return None
+    if not isinstance(recommendations, list) or not isinstance(concerns, list):
+        return None
+    if not all(isinstance(item, str) for item in recommendations + concerns):
+        return None
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not 0 <= confidence <= 100:
+        return None
+    return {"summary": summary, "recommendations": recommendations, "confidence": confidence, "concerns": concerns}
\ No newline at end of file
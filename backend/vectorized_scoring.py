@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+NUTRIENT_COLUMNS = ("sodium_mg", "sugar_g", "trans_fat_g")
+CATEGORY_COLUMNS = {
+    "allergen": "allergen_risk",
+    "additive": "additive_risk",
+    "nutrition": "nutritional_risk",
+    "contamination": "contamination_risk",
+    "interaction": "interaction_risk"
+}
+
+
+def _round1(values: np.ndarray) -> np.ndarray:
+    """
+    ``round(x, 1)`` for every element, bit-identical to the builtin.
+
+    ``np.round`` scales by 10 before rounding, which can flip values sitting on a
+    .x5 boundary; those few elements are re-rounded with the builtin.
+    """
+    rounded = np.round(values, 1)
+    scaled = values * 10
+    ambiguous = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ambiguous.any():
+        rounded[ambiguous] = [round(value, 1) for value in values[ambiguous].tolist()]
+    return rounded
+
+
+class VectorizedScorer:
+    """
+    Columnar counterpart of the analyzer's scalar scoring.
+
+    Applies ``nutrition_thresholds``, the category weights and the risk-level
+    cut-offs to arrays of N products at once. Results match
+    ``_analyze_nutrition``, ``_calculate_overall_risk`` and
+    ``_determine_risk_level`` exactly.
+    """
+
+    def __init__(self, nutrition_thresholds: Dict, risk_weights: Dict[str, float],
+                 risk_level_cutoffs: Sequence[Tuple[float, str]]):
+        self.nutrition_thresholds = nutrition_thresholds
+        self.risk_weights = risk_weights
+        self.risk_level_cutoffs = list(risk_level_cutoffs)
+
+    @classmethod
+    def from_analyzer(cls, analyzer) -> "VectorizedScorer":
+        return cls(analyzer.nutrition_thresholds, analyzer.risk_weights, analyzer.risk_level_cutoffs)
+
+    @staticmethod
+    def nutrition_columns(nutrition_facts: List[Optional[Dict]]) -> Dict[str, np.ndarray]:
+        """Extract the scored nutrients from a list of nutrition_facts dicts (missing -> 0)"""
+        columns = {
+            name: np.array([(facts or {}).get(name, 0) for facts in nutrition_facts], dtype=np.float64)
+            for name in NUTRIENT_COLUMNS
+        }
+        columns["has_facts"] = np.array([bool(facts) for facts in nutrition_facts])
+        return columns
+
+    def nutrition_scores(self, sodium_mg: np.ndarray, sugar_g: np.ndarray, trans_fat_g: np.ndarray,
+                         has_facts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Nutrition score and severity per product"""
+        sodium = self.nutrition_thresholds["sodium"]
+        sugar = self.nutrition_thresholds["sugar"]
+        trans_fat = self.nutrition_thresholds["trans_fat"]
+
+        score = np.where(sodium_mg > sodium["very_high"], 25, np.where(sodium_mg > sodium["high"], 15, 0))
+        score = score + np.where(sugar_g > sugar["very_high"], 20, np.where(sugar_g > sugar["high"], 10, 0))
+        score = score + np.where(trans_fat_g > trans_fat["any"], 30, 0)
+        score = np.minimum(score, 100)
+
+        severity = np.where(score > 50, "HIGH", np.where(score > 25, "MEDIUM", "LOW")).astype(object)
+
+        # Products without nutrition facts get the fixed "not available" score
+        score = np.where(has_facts, score, 20)
+        severity[~has_facts] = "MEDIUM"
+
+        return score, severity
+
+    def overall_risk_scores(self, allergen: np.ndarray, additive: np.ndarray, nutrition: np.ndarray,
+                            contamination: np.ndarray, interaction: np.ndarray) -> np.ndarray:
+        """Weighted overall score per product, summed in the same order as the scalar path"""
+        weights = self.risk_weights
+        overall_score = (
+            np.asarray(allergen) * weights["allergen"] +
+            np.asarray(additive) * weights["additive"] +
+            np.asarray(nutrition) * weights["nutrition"] +
+            np.asarray(contamination) * weights["contamination"] +
+            np.asarray(interaction) * weights["interaction"]
+        )
+        return _round1(np.asarray(overall_score, dtype=np.float64))
+
+    def risk_levels(self, scores: np.ndarray) -> np.ndarray:
+        conditions = [scores >= cutoff for cutoff, _ in self.risk_level_cutoffs]
+        choices = [level for _, level in self.risk_level_cutoffs]
+        return np.select(conditions, choices, default="LOW").astype(object)
+
+    def score_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Re-score a frame of products.
+
+        Expects the category score columns (``allergen_risk``, ``additive_risk``,
+        ``contamination_risk``, ``interaction_risk``) plus either a
+        ``nutrition_facts`` column of dicts or the ``sodium_mg``/``sugar_g``/
+        ``trans_fat_g`` columns with ``has_facts``. Returns a new frame with
+        ``nutritional_risk``, ``nutrition_severity``, ``overall_risk_score`` and
+        ``risk_level`` filled in.
+        """
+        if "nutrition_facts" in frame:
+            nutrients = self.nutrition_columns(frame["nutrition_facts"].tolist())
+        else:
+            nutrients = {name: frame[name].fillna(0).to_numpy(dtype=np.float64) for name in NUTRIENT_COLUMNS}
+            nutrients["has_facts"] = frame["has_facts"].to_numpy(dtype=bool)
+
+        nutrition, severity = self.nutrition_scores(
+            nutrients["sodium_mg"], nutrients["sugar_g"], nutrients["trans_fat_g"], nutrients["has_facts"]
+        )
+
+        result = frame.copy()
+        result["nutritional_risk"] = nutrition
+        result["nutrition_severity"] = severity
+
+        columns = {category: result[column].to_numpy() for category, column in CATEGORY_COLUMNS.items()}
+        overall = self.overall_risk_scores(**columns)
+        result["overall_risk_score"] = overall
+        result["risk_level"] = self.risk_levels(overall)
+        return result
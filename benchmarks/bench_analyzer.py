@@ -0,0 +1,238 @@
+"""
+Micro-benchmarks for the analyzer hot paths over a seeded synthetic corpus,
+with the LLM stubbed out (no network). Reports ops/sec, p50/p99 latency and
+peak bytes allocated per call (tracemalloc), and can save or compare against
+a baseline so regressions in the analyzer get caught.
+
+    python -m benchmarks.bench_analyzer [--size N] [--iterations N] [--repeat N]
+                                        [--save baseline.json]
+                                        [--compare baseline.json] [--threshold 0.2]
+
+Exits with status 1 when --compare finds a case whose p50 or allocations
+grew by more than --threshold (a fraction, default 0.2). Timings only
+compare meaningfully on the same idle machine; allocation figures are
+deterministic for a given seed and Python version.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+from backend.ai_analyzer import AIRiskAnalyzer
+from backend.llm_cache import LLMResponseCache, MemoryLRUCache
+from backend.llm_client import LLMClientPool, ProviderSettings
+from benchmarks.corpus import build_corpus
+
+STUB_REPLY = json.dumps({
+    "summary": "Stubbed analysis", "recommendations": ["Eat in moderation"], "confidence": 88, "concerns": []
+})
+
+
+def stub_llm_pool() -> LLMClientPool:
+    """An OpenAI-shaped provider answered in-process by an httpx MockTransport"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": STUB_REPLY}}],
+            "usage": {"prompt_tokens": 400, "completion_tokens": 120}
+        })
+
+    settings = {"openai": ProviderSettings(api_key="stub", model="stub-model", max_concurrency=64)}
+    return LLMClientPool(settings=settings, transport=httpx.MockTransport(handler))
+
+
+def build_analyzer() -> AIRiskAnalyzer:
+    # Cache disabled so analyze_product always reaches the (stub) provider
+    return AIRiskAnalyzer(llm_clients=stub_llm_pool(), response_cache=LLMResponseCache(MemoryLRUCache(max_entries=0)))
+
+
+def prepare(analyzer: AIRiskAnalyzer, corpus: List[Dict]) -> List[Dict]:
+    """Precompute each stage's inputs so stages are measured in isolation"""
+    records = []
+    for record in corpus:
+        ingredients = analyzer._parse_ingredients(record["product"]["ingredients"])
+        records.append({
+            **record,
+            "ingredients": ingredients,
+            "matches": analyzer.knowledge_base.match(ingredients, normalized=True)
+        })
+    return records
+
+
+async def _stage_scores(analyzer: AIRiskAnalyzer, record: Dict) -> Tuple:
+    ingredients, profile, matches = record["ingredients"], record["health_profile"], record["matches"]
+    return (
+        await analyzer._analyze_allergens(ingredients, profile, matches),
+        await analyzer._analyze_additives(ingredients, matches),
+        await analyzer._analyze_nutrition(record["product"]["nutrition_facts"]),
+        await analyzer._analyze_contamination_risk(record["product"]),
+        await analyzer._analyze_drug_interactions(ingredients, profile, matches)
+    )
+
+
+async def build_cases(analyzer: AIRiskAnalyzer, records: List[Dict]) -> List[Tuple[str, Callable, bool]]:
+    """(name, fn(record), is_async) for every measured path"""
+    for record in records:
+        record["scores"] = await _stage_scores(analyzer, record)
+
+    return [
+        ("parse_ingredients", lambda r: analyzer._parse_ingredients(r["product"]["ingredients"]), False),
+        ("tokenizer (uncached)", lambda r: analyzer.ingredient_tokenizer._parse(r["product"]["ingredients"]), False),
+        ("knowledge_base.match", lambda r: analyzer.knowledge_base.match(r["ingredients"], normalized=True), False),
+        ("analyze_allergens", lambda r: analyzer._analyze_allergens(r["ingredients"], r["health_profile"], r["matches"]), True),
+        ("analyze_additives", lambda r: analyzer._analyze_additives(r["ingredients"], r["matches"]), True),
+        ("analyze_nutrition", lambda r: analyzer._analyze_nutrition(r["product"]["nutrition_facts"]), True),
+        ("analyze_contamination_risk", lambda r: analyzer._analyze_contamination_risk(r["product"]), True),
+        ("analyze_drug_interactions", lambda r: analyzer._analyze_drug_interactions(r["ingredients"], r["health_profile"], r["matches"]), True),
+        ("calculate_overall_risk", lambda r: analyzer._calculate_overall_risk(*r["scores"]), False),
+        ("rule_based_analysis", lambda r: analyzer._rule_based_analysis(r["product"], r["health_profile"]), True),
+        ("analyze_product", lambda r: analyzer.analyze_product(r["product"], r["health_profile"]), True),
+    ]
+
+
+def _percentile(sorted_values: List[int], fraction: float) -> float:
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def _time_case(fn: Callable, is_async: bool, records: List[Dict], iterations: int) -> List[int]:
+    durations = []
+    perf_counter_ns = time.perf_counter_ns
+    count = len(records)
+    for i in range(iterations):
+        record = records[i % count]
+        start = perf_counter_ns()
+        if is_async:
+            await fn(record)
+        else:
+            fn(record)
+        durations.append(perf_counter_ns() - start)
+    return durations
+
+
+async def _peak_allocations(fn: Callable, is_async: bool, records: List[Dict], samples: int) -> int:
+    """Median peak bytes allocated during one call"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(samples):
+            record = records[i % len(records)]
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            if is_async:
+                await fn(record)
+            else:
+                fn(record)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    return peaks[len(peaks) // 2]
+
+
+async def run_cases(cases, records: List[Dict], iterations: int, warmup: int, alloc_samples: int,
+                    repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for name, fn, is_async in cases:
+        # analyze_product goes through the stub HTTP transport; fewer iterations keep runs short
+        case_iterations = max(iterations // 10, 200) if name == "analyze_product" else iterations
+        await _time_case(fn, is_async, records, min(warmup, case_iterations))
+        # Keep the quietest of ``repeat`` rounds to damp scheduler and frequency noise
+        rounds = [sorted(await _time_case(fn, is_async, records, case_iterations)) for _ in range(repeat)]
+        durations = min(rounds, key=lambda values: _percentile(values, 0.50))
+        total_seconds = sum(durations) / 1e9
+        results[name] = {
+            "iterations": case_iterations,
+            "ops_per_sec": round(case_iterations / total_seconds, 1),
+            "p50_us": round(_percentile(durations, 0.50) / 1000, 2),
+            "p99_us": round(_percentile(durations, 0.99) / 1000, 2),
+            "peak_alloc_bytes": await _peak_allocations(fn, is_async, records, alloc_samples)
+        }
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Names of cases whose p50 or allocations regressed beyond ``threshold``"""
+    regressions = []
+    print(f"\n{'case':<28} {'p50 base':>10} {'p50 now':>10} {'delta':>8} {'alloc base':>11} {'alloc now':>10} {'delta':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<28} (not in baseline)")
+            continue
+
+        p50_delta = current["p50_us"] / previous["p50_us"] - 1 if previous["p50_us"] else 0.0
+        alloc_delta = (current["peak_alloc_bytes"] / previous["peak_alloc_bytes"] - 1
+                       if previous["peak_alloc_bytes"] else 0.0)
+        regressed = p50_delta > threshold or alloc_delta > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<28} {previous['p50_us']:>10.2f} {current['p50_us']:>10.2f} {p50_delta:>+7.0%} "
+              f"{previous['peak_alloc_bytes']:>11} {current['peak_alloc_bytes']:>10} {alloc_delta:>+7.0%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2000, help="synthetic products in the corpus")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--iterations", type=int, default=20000, help="timed calls per case")
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3, help="timed rounds per case; the quietest is reported")
+    parser.add_argument("--alloc-samples", type=int, default=200)
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="compare against this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed fractional regression")
+    args = parser.parse_args(argv)
+
+    async def run():
+        analyzer = build_analyzer()
+        try:
+            records = prepare(analyzer, build_corpus(args.size, args.seed))
+            cases = await build_cases(analyzer, records)
+            return await run_cases(cases, records, args.iterations, args.warmup, args.alloc_samples, args.repeat)
+        finally:
+            await analyzer.aclose()
+
+    results = asyncio.run(run())
+
+    print(f"{'case':<28} {'ops/sec':>12} {'p50 us':>9} {'p99 us':>9} {'peak alloc B':>13}")
+    for name, result in results.items():
+        print(f"{name:<28} {result['ops_per_sec']:>12,.0f} {result['p50_us']:>9.2f} "
+              f"{result['p99_us']:>9.2f} {result['peak_alloc_bytes']:>13,}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "meta": {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "size": args.size,
+                    "seed": args.seed,
+                    "iterations": args.iterations,
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+                },
+                "results": results
+            }, f, indent=2)
+        print(f"\nbaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"\nno regressions beyond {args.threshold:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
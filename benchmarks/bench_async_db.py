@@ -0,0 +1,180 @@
+"""
+Event-loop behaviour of blocking Session queries inside ``async def`` handlers
+against the AsyncSession layer, at increasing request concurrency.
+
+Heavy requests run an aggregate over a few hundred thousand risk_analyses rows
+on a temporary SQLite file, keeping the database busy. Alongside them a stream
+of light requests (primary-key lookups) and a heartbeat task that sleeps 1 ms
+in a loop share the same event loop. With blocking sessions the light requests
+queue behind every heavy query; with AsyncSession they keep being served, and
+the heartbeat's worst overshoot shows how long the whole process stalled.
+
+What to expect: AsyncSession buys responsiveness, not heavy-query throughput.
+SQLite scans are CPU-bound, so heavy req/s only grows with concurrency when
+there are spare cores; on a single core it only catches up with the blocking
+figure at high concurrency, because the thread hand-off adds overhead.
+Measured on 1 CPU with the defaults:
+
+    session        concurrency  heavy req/s  light req/s  max loop stall ms
+    sync Session             1         11.0          4.1             2905.9
+    sync Session            16         10.7          4.0             2993.3
+    AsyncSession             1          4.5        299.7                7.2
+    AsyncSession            16         11.0         21.2               79.1
+
+Blocking sessions freeze the loop for the whole round (the stall is the round
+length, and light requests only run between heavy ones). With AsyncSession the
+loop never stalls for more than about a query's share of the CPU, and light
+requests keep flowing, though fewer of them as more heavy queries compete for
+the same core.
+
+    python -m benchmarks.bench_async_db [--rows N] [--requests N] [--concurrency 1 4 16]
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.database import async_database_url
+from backend.models import Base, RiskAnalysis
+
+LEVELS = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+
+def build_database(path: str, rows: int) -> str:
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    rng = random.Random(3)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, 50_000):
+            conn.execute(RiskAnalysis.__table__.insert(), [
+                {
+                    "product_id": i,
+                    "overall_risk_score": round(rng.uniform(0, 100), 1),
+                    "risk_level": rng.choice(LEVELS),
+                    "created_at": start + timedelta(minutes=i)
+                }
+                for i in range(offset, min(offset + 50_000, rows))
+            ])
+    engine.dispose()
+    return url
+
+
+def request_query(k: int):
+    """Unindexed aggregate, standing in for a slow report or a busy database"""
+    return (select(RiskAnalysis.risk_level, func.count(), func.avg(RiskAnalysis.overall_risk_score))
+            .where(RiskAnalysis.product_id % 13 == k % 13)
+            .group_by(RiskAnalysis.risk_level))
+
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(0.001)
+        lags.append(loop.time() - start - 0.001)
+
+
+async def light_requests(handler, stop: asyncio.Event, done: list):
+    k = 0
+    while not stop.is_set():
+        await handler(k)
+        done.append(k)
+        k += 1
+        # Yield even if the handler never awaited, so the round can finish
+        await asyncio.sleep(0)
+
+
+async def run_round(heavy_handler, light_handler, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    stop = asyncio.Event()
+    lags, light_done = [], []
+    background = [
+        asyncio.create_task(heartbeat(stop, lags)),
+        *(asyncio.create_task(light_requests(light_handler, stop, light_done)) for _ in range(4))
+    ]
+
+    async def one(k):
+        async with semaphore:
+            await heavy_handler(k)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(k) for k in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*background)
+    return requests / elapsed, len(light_done) / elapsed, max(lags, default=0.0) * 1000
+
+
+async def run(path: str, rows: int, requests: int, concurrency_levels: list):
+    url = build_database(path, rows)
+    print(f"{rows:,} risk_analyses rows, {requests} requests per round, {os.cpu_count()} CPU(s)\n")
+
+    # Room for every heavy request plus the four light request loops; the aiosqlite
+    # engine opens a connection per session (NullPool), so it never waits either
+    sync_engine = create_engine(url, pool_size=max(concurrency_levels) + 4,
+                                connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(async_database_url(url))
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSession = async_sessionmaker(async_engine)
+
+    # What the routers did before: a synchronous Session inside async def
+    async def blocking_heavy(k):
+        db = SyncSession()
+        try:
+            db.execute(request_query(k)).all()
+        finally:
+            db.close()
+
+    async def blocking_light(k):
+        db = SyncSession()
+        try:
+            db.get(RiskAnalysis, k % rows + 1)
+        finally:
+            db.close()
+
+    async def async_heavy(k):
+        async with AsyncSession() as db:
+            (await db.execute(request_query(k))).all()
+
+    async def async_light(k):
+        async with AsyncSession() as db:
+            await db.get(RiskAnalysis, k % rows + 1)
+
+    # Warm both pools and the page cache
+    await run_round(blocking_heavy, blocking_light, 4, 4)
+    await run_round(async_heavy, async_light, 4, 4)
+
+    print(f"{'session':<14} {'concurrency':>11} {'heavy req/s':>12} {'light req/s':>12} {'max loop stall ms':>18}")
+    for name, heavy, light in (("sync Session", blocking_heavy, blocking_light),
+                               ("AsyncSession", async_heavy, async_light)):
+        for concurrency in concurrency_levels:
+            heavy_rate, light_rate, stall_ms = await run_round(heavy, light, requests, concurrency)
+            print(f"{name:<14} {concurrency:>11} {heavy_rate:>12.1f} {light_rate:>12.1f} {stall_ms:>18.1f}")
+
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="risk_analyses rows in the database")
+    parser.add_argument("--requests", type=int, default=32, help="heavy requests per round")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="heavy request concurrency levels to measure")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(os.path.join(directory, "bench.db"), args.rows, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
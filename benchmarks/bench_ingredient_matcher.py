@@ -0,0 +1,104 @@
+"""
+Compare the compiled IngredientMatcher against the nested substring loops it
+replaced, as the rule dictionaries grow.
+
+    python -m benchmarks.bench_ingredient_matcher
+"""
+import random
+import string
+import time
+from typing import Dict, List
+
+from backend.ingredient_matcher import IngredientMatcher
+
+BASE_ALLERGENS = [
+    "milk", "eggs", "fish", "shellfish", "tree nuts", "peanuts",
+    "wheat", "soybeans", "sesame", "lactose", "gluten", "casein"
+]
+BASE_ADDITIVES = [
+    "monosodium glutamate", "sodium nitrate", "high fructose corn syrup", "trans fat",
+    "aspartame", "red dye 40", "bht", "bha", "sodium benzoate"
+]
+BASE_INTERACTIONS = ["grapefruit", "caffeine", "alcohol", "vitamin k", "tyramine"]
+FILLER = [
+    "sugar", "salt", "water", "cocoa butter", "enriched flour", "canola oil",
+    "natural flavors", "citric acid", "skim milk powder", "soy lecithin", "corn starch"
+]
+
+
+def _random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+
+
+def build_dictionaries(scale: int, rng: random.Random) -> Dict[str, List[str]]:
+    """Pad the real dictionaries with synthetic entries up to scale x their size"""
+    dictionaries = {
+        "allergen": list(BASE_ALLERGENS),
+        "additive": list(BASE_ADDITIVES),
+        "interaction": list(BASE_INTERACTIONS)
+    }
+    for category, patterns in dictionaries.items():
+        target = len(patterns) * scale
+        seen = set(patterns)
+        while len(patterns) < target:
+            word = _random_word(rng)
+            if word not in seen:
+                seen.add(word)
+                patterns.append(word)
+    return dictionaries
+
+
+def build_corpus(dictionaries: Dict[str, List[str]], size: int, rng: random.Random) -> List[List[str]]:
+    vocabulary = FILLER + [p for patterns in dictionaries.values() for p in patterns]
+    return [
+        [rng.choice(vocabulary) for _ in range(rng.randint(5, 30))]
+        for _ in range(size)
+    ]
+
+
+def naive_match(dictionaries: Dict[str, List[str]], ingredients: List[str]) -> Dict[str, List[str]]:
+    """The per-ingredient x per-entry loops the analyzers used previously"""
+    hits = {category: [] for category in dictionaries}
+    for category, patterns in dictionaries.items():
+        for ingredient in ingredients:
+            for pattern in patterns:
+                if pattern.lower() in ingredient.lower():
+                    hits[category].append(pattern)
+    return hits
+
+
+def _as_counts(hits: Dict[str, List[str]]) -> Dict[str, Dict[str, int]]:
+    counts = {}
+    for category, patterns in hits.items():
+        counts[category] = {}
+        for pattern in patterns:
+            counts[category][pattern] = counts[category].get(pattern, 0) + 1
+    return counts
+
+
+def run(scales=(1, 10, 100), corpus_size: int = 2000, seed: int = 1234):
+    print(f"{'scale':>6} {'patterns':>9} {'naive ms':>10} {'matcher ms':>11} {'speedup':>8}")
+
+    for scale in scales:
+        rng = random.Random(seed)
+        dictionaries = build_dictionaries(scale, rng)
+        corpus = build_corpus(dictionaries, corpus_size, rng)
+        matcher = IngredientMatcher(dictionaries)
+
+        start = time.perf_counter()
+        naive_results = [naive_match(dictionaries, ingredients) for ingredients in corpus]
+        naive_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        matcher_results = [matcher.match(ingredients) for ingredients in corpus]
+        matcher_ms = (time.perf_counter() - start) * 1000
+
+        for expected, actual in zip(naive_results, matcher_results):
+            assert _as_counts(expected) == _as_counts(actual), "matcher diverged from substring semantics"
+
+        pattern_count = sum(len(p) for p in dictionaries.values())
+        print(f"{scale:>6} {pattern_count:>9} {naive_ms:>10.1f} {matcher_ms:>11.1f} {naive_ms / matcher_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,132 @@
+"""
+Startup and match cost of the compiled, memory-mapped knowledge base against
+building the in-process automaton from the source tables, on a synthetic
+knowledge base with tens of thousands of additives, synonyms and E-numbers.
+Also checks match parity and exercises an atomic hot reload.
+
+    python -m benchmarks.bench_knowledge_base [N]   (default 50,000 additives)
+"""
+import os
+import sys
+import json
+import time
+import random
+import string
+import tempfile
+
+from backend.ingredient_matcher import IngredientMatcher
+from backend.ingredient_tokenizer import IngredientTokenizer
+from backend.knowledge_base import (
+    BUNDLED_SOURCE, KnowledgeBase, KnowledgeBaseStore, compile_file, load_source
+)
+from benchmarks.corpus import build_corpus
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 11)))
+
+
+def build_source(additive_count: int, seed: int = 11) -> dict:
+    """The bundled tables plus ``additive_count`` synthetic additives"""
+    rng = random.Random(seed)
+    source = load_source(BUNDLED_SOURCE)
+    names = {entry["name"] for entry in source["additives"]}
+    code = 1000
+    while len(source["additives"]) < additive_count:
+        name = f"{_word(rng)} {_word(rng)}"
+        if name in names:
+            continue
+        names.add(name)
+        code += 1
+        source["additives"].append({
+            "name": name,
+            "concern": f"Synthetic concern {len(names)}",
+            "synonyms": [_word(rng) + "ate"],
+            "e_numbers": [f"e{code}"]
+        })
+    source["version"] = f"synthetic-{additive_count}"
+    return source
+
+
+def in_process_matcher(source: dict) -> IngredientMatcher:
+    """What every worker did before: build the automaton from the tables at startup"""
+    return IngredientMatcher({
+        "allergen": [entry["name"] for entry in source["allergens"]],
+        "additive": [pattern for entry in source["additives"]
+                     for pattern in [entry["name"], *entry.get("synonyms", []), *entry.get("e_numbers", [])]],
+        "interaction": [entry["name"] for entry in source["interactions"]]
+    })
+
+
+def run(additive_count: int = 50_000, corpus_size: int = 2000):
+    directory = tempfile.mkdtemp()
+    source_path = os.path.join(directory, "knowledge_base.json")
+    index_path = os.path.join(directory, "knowledge_base.kb")
+    source = build_source(additive_count)
+    with open(source_path, "w") as f:
+        json.dump(source, f)
+
+    start = time.perf_counter()
+    info = compile_file(source_path, index_path)
+    compile_s = time.perf_counter() - start
+    print(f"compiled {info['counts']['entries']:,} entries / {info['counts']['patterns']:,} patterns / "
+          f"{info['counts']['states']:,} states into {info['size_bytes'] / 1e6:.1f} MB in {compile_s:.1f}s")
+
+    start = time.perf_counter()
+    matcher = in_process_matcher(source)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    knowledge_base = KnowledgeBase.open(index_path)
+    open_ms = (time.perf_counter() - start) * 1000
+    print(f"startup: in-process build {build_ms:,.0f} ms, mmap open {open_ms:.2f} ms")
+
+    tokenizer = IngredientTokenizer()
+    corpus = [tokenizer.names(record["product"]["ingredients"]) for record in build_corpus(corpus_size)]
+    # Sprinkle synthetic names, synonyms and codes into the corpus so the large dictionary gets hits
+    rng = random.Random(5)
+    synthetic = source["additives"][9:]
+    for ingredients in corpus:
+        entry = rng.choice(synthetic)
+        ingredients.append(rng.choice([entry["name"], entry["synonyms"][0], entry["e_numbers"][0]]))
+
+    start = time.perf_counter()
+    cold = [knowledge_base.match(ingredients, normalized=True) for ingredients in corpus]
+    cold_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for ingredients in corpus:
+        knowledge_base.match(ingredients, normalized=True)
+    warm_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for ingredients in corpus:
+        matcher.match(ingredients, normalized=True)
+    dict_ms = (time.perf_counter() - start) * 1000
+    print(f"match {corpus_size:,} products: in-process {dict_ms:.0f} ms, "
+          f"mmap cold {cold_ms:.0f} ms, mmap warm {warm_ms:.0f} ms")
+
+    # Parity: every in-process pattern hit must resolve to the same canonical entries
+    canonical = {}
+    for entry in source["additives"]:
+        for pattern in [entry["name"], *entry.get("synonyms", []), *entry.get("e_numbers", [])]:
+            canonical[pattern] = entry["name"]
+    for ingredients, compiled_hits in zip(corpus, cold):
+        for ingredient in ingredients:
+            expected = sorted({canonical[p] for p in matcher.match([ingredient], normalized=True)["additive"]})
+            actual = sorted(knowledge_base.match([ingredient], normalized=True)["additive"])
+            assert expected == actual, (ingredient, expected, actual)
+    print("parity: OK")
+
+    # Hot reload: recompile a new version over the live file and let the store pick it up
+    store = KnowledgeBaseStore(index_path, check_interval=0)
+    source["version"] = "synthetic-reloaded"
+    with open(source_path, "w") as f:
+        json.dump(source, f)
+    compile_file(source_path, index_path)
+    old_version = store.knowledge_base.version
+    assert store.reload(force=False) and store.knowledge_base.version == "synthetic-reloaded"
+    assert knowledge_base.match(corpus[0], normalized=True) == cold[0], "old mapping must stay usable"
+    print(f"hot reload: {old_version} -> {store.knowledge_base.version}, old mapping still readable")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,90 @@
+"""
+Tail latency of hedged routing against stub OpenAI and Anthropic endpoints:
+every 10th primary call stalls for 2 s. Primary-only routing against hedged
+routing, reporting p50 / p95 / max per analysis. The breaker and budget
+behaviours are covered by tests/test_llm_router.py.
+
+    python -m benchmarks.bench_llm_router [N]   (default 200 calls per round)
+"""
+import sys
+import json
+import time
+import asyncio
+
+import httpx
+
+from backend.ai_analyzer import AIRiskAnalyzer
+from backend.llm_cache import LLMResponseCache
+from backend.llm_client import LLMClientPool, ProviderSettings
+from backend.llm_router import LLMRouter
+
+REPLY = json.dumps({"summary": "stub", "recommendations": [], "confidence": 90, "concerns": []})
+
+
+class StubProviders:
+    """Both vendors' endpoints on one mock transport"""
+
+    def __init__(self):
+        self.calls = {"openai": 0, "anthropic": 0}
+        self.delay = {"openai": 0.02, "anthropic": 0.03}
+        self.stall_every = {"openai": 0, "anthropic": 0}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        name = "openai" if request.url.path.endswith("/chat/completions") else "anthropic"
+        self.calls[name] += 1
+        delay = self.delay[name]
+        if self.stall_every[name] and self.calls[name] % self.stall_every[name] == 0:
+            delay = 2.0
+        await asyncio.sleep(delay)
+        if name == "openai":
+            return httpx.Response(200, json={"choices": [{"message": {"content": REPLY}}], "usage": {}})
+        return httpx.Response(200, json={"content": [{"text": REPLY}], "usage": {}})
+
+    def pool(self, names=("openai", "anthropic")) -> LLMClientPool:
+        settings = {name: ProviderSettings(api_key="stub", model=f"stub-{name}", max_concurrency=64) for name in names}
+        return LLMClientPool(settings=settings, transport=httpx.MockTransport(self.handler))
+
+
+def analyzer_for(pool: LLMClientPool, **router_options) -> AIRiskAnalyzer:
+    analyzer = AIRiskAnalyzer(llm_clients=pool, response_cache=LLMResponseCache())
+    analyzer.llm_router = LLMRouter(pool, **router_options)
+    return analyzer
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return (f"p50 {ordered[len(ordered) // 2] * 1000:6.0f} ms  p95 {ordered[int(len(ordered) * 0.95)] * 1000:6.0f} ms  "
+            f"max {ordered[-1] * 1000:6.0f} ms")
+
+
+async def timed_call(analyzer: AIRiskAnalyzer):
+    start = time.perf_counter()
+    response = await analyzer._complete("Product: stub\n")
+    return response.text if response else None, time.perf_counter() - start
+
+
+async def tail_latency(count: int):
+    print("primary stalls for 2 s on every 10th call")
+    for label, names in (("primary only", ("openai",)), ("hedged", ("openai", "anthropic"))):
+        stub = StubProviders()
+        stub.stall_every["openai"] = 10
+        analyzer = analyzer_for(stub.pool(names), budget_seconds=5, hedge_delay=0.1, hedge_min_delay=0.05)
+        latencies = []
+        try:
+            for _ in range(count):
+                text, elapsed = await timed_call(analyzer)
+                assert text == REPLY
+                latencies.append(elapsed)
+        finally:
+            await analyzer.aclose()
+        router = analyzer.llm_router.stats()
+        print(f"{label:<13} {summarize(latencies)}  hedged {router['hedged']}, hedge wins {router['hedge_wins']}, "
+              f"calls {stub.calls}")
+
+
+async def main(count: int):
+    await tail_latency(count)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,104 @@
+"""
+Compare the FTS5 product search against the ILIKE filter used by
+GET /api/products/?search= on a synthetic SQLite catalog.
+
+Both return the best matches first: the ILIKE baseline searches the same four
+columns and ranks by the same column weights (then id), so like FTS it has to
+rank every match before applying the limit rather than stopping at the first
+``limit`` rows it finds.
+
+    python -m benchmarks.bench_product_search [N]   (default 1,000,000 products)
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+from sqlalchemy import case, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.models import Base, Product
+from backend.migrations import run_migrations
+from backend.product_search import SQLITE_BM25_WEIGHTS, search_product_ids
+
+BRANDS = ["Acme", "NutriCo", "GreenFarm", "Sunrise", "Oceanic", "Hearty", "PureLife", "Crunchy"]
+NOUNS = ["cookies", "granola", "yogurt", "crackers", "soup", "cereal", "juice", "chips", "bar", "sauce"]
+ADJECTIVES = ["organic", "chocolate", "vanilla", "spicy", "honey", "almond", "classic", "lite", "smoked"]
+CATEGORIES = ["Snacks", "Dairy", "Beverages", "Breakfast", "Condiments", "Frozen", "Bakery"]
+INGREDIENTS = [
+    "sugar", "salt", "wheat flour", "milk", "soy lecithin", "palm oil", "cocoa", "peanuts",
+    "natural flavors", "citric acid", "corn syrup", "eggs", "sesame", "aspartame", "water"
+]
+QUERIES = ["chocolate", "acme granola", "peanuts", "honey alm", "spicy soup sesame", "quinoa"]
+
+
+def populate(session_factory, count: int, seed: int = 7, chunk: int = 20_000):
+    rng = random.Random(seed)
+    table = Product.__table__
+    with session_factory() as db:
+        for start in range(0, count, chunk):
+            rows = [{
+                "name": f"{rng.choice(ADJECTIVES)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}",
+                "brand": rng.choice(BRANDS),
+                "category": rng.choice(CATEGORIES),
+                "ingredients": ", ".join(rng.sample(INGREDIENTS, 6)),
+                "barcode": f"{start + i:012d}"
+            } for i in range(min(chunk, count - start))]
+            db.execute(table.insert(), rows)
+            db.commit()
+
+
+def time_query(run, repeat: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def ilike_query(db, query: str, limit: int):
+    """Products matching ``query`` in any searched column, ranked by the FTS column weights"""
+    pattern = f"%{query}%"
+    columns = [Product.name, Product.brand, Product.category, Product.ingredients]
+    rank = sum(case((column.ilike(pattern), weight), else_=0.0)
+               for column, weight in zip(columns, SQLITE_BM25_WEIGHTS))
+    return (db.query(Product)
+            .filter(rank > 0)
+            .order_by(rank.desc(), Product.id)
+            .limit(limit))
+
+
+def run(count: int = 1_000_000, limit: int = 20):
+    with tempfile.TemporaryDirectory() as directory:
+        search(os.path.join(directory, "search_bench.db"), count, limit)
+
+
+def search(path: str, count: int, limit: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    start = time.perf_counter()
+    populate(session_factory, count)
+    print(f"populated {count:,} products in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'query':<20} {'ilike ms':>10} {'fts ms':>10} {'speedup':>8}")
+    with session_factory() as db:
+        for query in QUERIES:
+            def ilike():
+                ilike_query(db, query, limit).all()
+
+            def fts():
+                ids = search_product_ids(db, query, limit, 0)
+                db.query(Product).filter(Product.id.in_(ids)).all()
+
+            ilike_ms = time_query(ilike)
+            fts_ms = time_query(fts)
+            print(f"{query:<20} {ilike_ms:>10.2f} {fts_ms:>10.2f} {ilike_ms / fts_ms:>7.1f}x")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
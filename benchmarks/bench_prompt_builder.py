@@ -0,0 +1,87 @@
+"""
+Input tokens of the compact prompt builder against the previous inline prompt
+(indented JSON, padded template, no trimming) over the benchmark corpus, plus
+every 10th product padded out with a very long ingredient list and description.
+Checks that every built prompt stays within PROMPT_MAX_INPUT_TOKENS and keeps the
+product name and first ingredient.
+
+    python -m benchmarks.bench_prompt_builder [N]   (default 2,000 products)
+"""
+import sys
+import json
+import time
+import random
+
+from backend.llm_client import SYSTEM_PROMPT
+from backend.prompt_builder import PromptBuilder, count_tokens
+from benchmarks.corpus import COMMON, build_corpus
+
+
+def legacy_prompt(product_data, health_profile) -> str:
+    """The analysis prompt as it was built before PromptBuilder"""
+    return f"""
+            Analyze this consumable product for health and safety risks:
+
+            Product: {product_data.get('product_name', 'Unknown')}
+            Ingredients: {product_data.get('ingredients', 'Not provided')}
+            Nutrition: {json.dumps(product_data.get('nutrition_facts', {}), indent=2)}
+            Category: {product_data.get('category', 'Unknown')}
+
+            User Health Profile: {json.dumps(health_profile or {}, indent=2)}
+
+            Provide a comprehensive analysis including:
+            1. Overall safety assessment
+            2. Specific health concerns
+            3. Personalized recommendations based on health profile
+            4. Long-term consumption risks
+            5. Interactions with common medications
+
+            Format your response as JSON with keys: summary, recommendations, confidence, concerns
+            """
+
+
+def percentiles(values):
+    ordered = sorted(values)
+    return sum(ordered) / len(ordered), ordered[int(len(ordered) * 0.95)], ordered[-1]
+
+
+def run(size: int):
+    rng = random.Random(11)
+    corpus = build_corpus(size)
+    for index, record in enumerate(corpus):
+        if index % 10 == 0:
+            product = record["product"]
+            product["ingredients"] += ", " + ", ".join(rng.choice(COMMON) for _ in range(rng.randint(150, 400)))
+            product["product_description"] = " ".join(rng.choice(COMMON) for _ in range(rng.randint(200, 600)))
+
+    builder = PromptBuilder.from_env()
+    system_tokens = count_tokens(SYSTEM_PROMPT)
+    legacy, compact = [], []
+    start = time.perf_counter()
+    for record in corpus:
+        prompt = builder.build(record["product"], record["health_profile"])
+        compact.append(prompt.input_tokens + system_tokens)
+        assert prompt.input_tokens <= builder.max_input_tokens, prompt.input_tokens
+        assert record["product"]["product_name"] in prompt.text
+        first_ingredient = record["product"]["ingredients"].split(",")[0].strip()
+        assert first_ingredient in prompt.text, first_ingredient
+    build_us = (time.perf_counter() - start) / size * 1e6
+    for record in corpus:
+        legacy.append(count_tokens(legacy_prompt(record["product"], record["health_profile"])) + system_tokens)
+
+    print(f"{size:,} prompts, budget {builder.max_input_tokens} input tokens, "
+          f"{builder.truncated} trimmed, {build_us:.0f} us/prompt to build\n")
+    print(f"{'products':<9} {'prompt':<8} {'mean':>8} {'p95':>8} {'max':>8} {'saved':>7}")
+    groups = (("typical", [i for i in range(size) if i % 10]), ("long", list(range(0, size, 10))),
+              ("all", list(range(size))))
+    for group, indexes in groups:
+        legacy_total = sum(legacy[i] for i in indexes)
+        for name, values in (("legacy", legacy), ("compact", compact)):
+            mean, p95, largest = percentiles([values[i] for i in indexes])
+            saved = 1 - sum(values[i] for i in indexes) / legacy_total
+            print(f"{group:<9} {name:<8} {mean:>8.0f} {p95:>8} {largest:>8} {saved:>7.0%}")
+    print("\ntoken counts include the system prompt; legacy prompts never carried the description")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,104 @@
+"""
+Packed against one-call-per-product AI analysis over a stub provider.
+
+The stub answers packed prompts with a JSON array but, like a real model now
+and then, leaves out every 11th item and gives every 13th an invalid
+confidence, so the single-call fallback is exercised too. Each call costs a
+fixed round trip plus a per-item generation time, with at most 8 calls in
+flight (the LLM_MAX_CONCURRENCY default). Checks that every product gets the
+summary written for it (no id mix-ups) and reports provider calls, prompt
+tokens (system prompt included, ~4 chars per token), fallbacks and wall time
+per pack size.
+
+    python -m benchmarks.bench_prompt_packing [N] [WORKERS]   (default 200 / 16)
+"""
+import sys
+import json
+import time
+import asyncio
+
+import httpx
+
+from backend.ai_analyzer import AIRiskAnalyzer
+from backend.llm_cache import LLMResponseCache
+from backend.llm_client import LLMClientPool, ProviderSettings
+from backend.prompt_packing import PromptPacker
+from benchmarks.corpus import build_corpus
+
+ROUND_TRIP = 0.05
+PER_ITEM = 0.005
+
+
+def stub_pool(calls: list) -> LLMClientPool:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        messages = json.loads(request.content)["messages"]
+        prompt = messages[-1]["content"]
+        calls.append(sum(len(message["content"]) for message in messages) // 4)
+        entries = [json.loads(line) for line in prompt.splitlines() if line.startswith('{"id"')]
+        if entries:
+            reply = []
+            for entry in entries:
+                # Stable per product, so a retried item is not dropped again
+                fault = sum(map(ord, entry["product"]))
+                if fault % 11 == 0:
+                    continue
+                reply.append({"id": entry["id"], "summary": f"stub: {entry['product']}", "recommendations": [],
+                              "confidence": 150 if fault % 13 == 0 else 90, "concerns": []})
+            content = "Here is the analysis:\n" + json.dumps(reply)
+        else:
+            product = prompt.split("Product: ", 1)[1].split("\n", 1)[0]
+            entries = [product]
+            content = json.dumps({"summary": f"stub: {product}", "recommendations": [],
+                                  "confidence": 90, "concerns": []})
+        await asyncio.sleep(ROUND_TRIP + PER_ITEM * len(entries))
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        })
+
+    settings = {"openai": ProviderSettings(api_key="stub", model="stub-model", max_concurrency=8)}
+    return LLMClientPool(settings=settings, transport=httpx.MockTransport(handler))
+
+
+async def run_round(corpus, workers: int, pack_size: int):
+    calls = []
+    analyzer = AIRiskAnalyzer(llm_clients=stub_pool(calls), response_cache=LLMResponseCache())
+    analyzer.packer = PromptPacker(analyzer._call_ai_packed, pack_size=pack_size)
+    semaphore = asyncio.Semaphore(workers)
+
+    async def one(record):
+        async with semaphore:
+            return await analyzer.analyze_product(dict(record["product"]), record["health_profile"],
+                                                  packed=pack_size > 1)
+
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(record) for record in corpus))
+        elapsed = time.perf_counter() - start
+    finally:
+        await analyzer.aclose()
+
+    for record, result in zip(corpus, results):
+        expected = f"stub: {record['product']['product_name']}"
+        assert result["ai_summary"] == expected, (result["ai_summary"], expected)
+    return len(calls), sum(calls), analyzer.packer.fallbacks, elapsed
+
+
+async def main(size: int, workers: int):
+    corpus = build_corpus(size)
+    print(f"{size} products, {workers} workers, stub call = {ROUND_TRIP * 1000:.0f} ms "
+          f"+ {PER_ITEM * 1000:.0f} ms per item\n")
+    print(f"{'pack size':>9} {'LLM calls':>10} {'saved':>7} {'prompt tokens':>14} {'fallbacks':>10} {'wall s':>8}")
+    baseline = None
+    for pack_size in (1, 4, 8, 16):
+        calls, tokens, fallbacks, elapsed = await run_round(corpus, workers, pack_size)
+        baseline = baseline or calls
+        print(f"{pack_size:>9} {calls:>10} {1 - calls / baseline:>7.0%} {tokens:>14,} {fallbacks:>10} {elapsed:>8.2f}")
+    print("\nper-item results: OK (every product got its own summary)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    ))
@@ -0,0 +1,49 @@
+"""
+Re-scoring stored findings under a new health profile against re-running the
+rule-based pipeline. Checks that both produce the same scores, risk level and
+warnings for every product/profile pair, then reports microseconds per item.
+
+    python -m benchmarks.bench_rescore [N]   (default 2,000 products)
+"""
+import sys
+import time
+import random
+import asyncio
+
+from backend.rule_engine import RuleEngine
+from benchmarks.corpus import build_corpus, health_profile
+
+
+async def run(size: int = 2000):
+    engine = RuleEngine()
+    corpus = build_corpus(size)
+    rng = random.Random(7)
+    new_profiles = [health_profile(rng) for _ in corpus]
+
+    # What gets stored at analysis time
+    stored = [(await engine._rule_based_analysis(record["product"], record["health_profile"]))["findings"]
+              for record in corpus]
+
+    for record, findings, profile in zip(corpus, stored, new_profiles):
+        full = await engine._rule_based_analysis(record["product"], profile)
+        rescored = engine.rescore(findings, profile)
+        for key in ("overall_risk_score", "risk_level", "allergen_risk", "interaction_risk", "safety_warnings"):
+            assert rescored[key] == full[key], (key, rescored[key], full[key])
+    print(f"parity: OK ({size:,} products re-scored under new profiles)")
+
+    start = time.perf_counter()
+    for record, profile in zip(corpus, new_profiles):
+        await engine._rule_based_analysis(record["product"], profile)
+    pipeline_us = (time.perf_counter() - start) / size * 1e6
+
+    start = time.perf_counter()
+    for findings, profile in zip(stored, new_profiles):
+        engine.rescore(findings, profile)
+    rescore_us = (time.perf_counter() - start) / size * 1e6
+
+    print(f"rule-based pipeline {pipeline_us:.1f} us/item, rescore {rescore_us:.1f} us/item "
+          f"({pipeline_us / rescore_us:.0f}x), LLM call excluded from both")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,140 @@
+"""
+Serialization time and payload size of the analysis responses, through
+FastAPI's own response path (``serialize_response`` plus the response class's
+``render``), before and after the typed response models:
+
+- analyze:  ``response_model=dict`` with JSONResponse, against AnalyzeResponse
+            with JSONResponse and with FastJSONResponse (orjson when installed)
+- details:  a hand-built dict run through jsonable_encoder, against the stored
+            row mapped to StoredAnalysis in an AnalysisDetailsResponse
+
+The payload is a typical full analysis: rule-based scores for a benchmark-corpus
+product plus a filled-in AI summary and recommendations.
+
+    python -m benchmarks.bench_response_serialization [N]   (default 5,000 responses)
+"""
+import sys
+import json
+import time
+import uuid
+import asyncio
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from backend.analysis_store import risk_analysis_row
+from backend.responses import FastJSONResponse, orjson
+from backend.rule_engine import RuleEngine
+from backend.schemas import AnalysisDetailsResponse, AnalyzeResponse, StoredAnalysis
+from benchmarks.corpus import build_corpus
+
+AI_FIELDS = {
+    "confidence_score": 85,
+    "ai_summary": "Moderate risk. The product combines several common allergens with a high sodium content and "
+                  "two additives flagged for sensitive groups. Occasional consumption is unlikely to be harmful "
+                  "for most adults, but it conflicts with the stated allergy profile.",
+    "ai_recommendations": [
+        "Avoid this product given your peanut allergy",
+        "Choose a lower-sodium alternative if you have hypertension",
+        "Check labels for aspartame if you are sensitive to artificial sweeteners",
+        "Limit to occasional consumption"
+    ]
+}
+
+
+def legacy_details(analysis, product):
+    """The dict get_analysis_details used to build by hand"""
+    return {
+        "analysis": {
+            "id": analysis.id,
+            "overall_risk_score": analysis.overall_risk_score,
+            "risk_level": analysis.risk_level,
+            "confidence_score": analysis.confidence_score,
+            "allergen_risk": {"score": analysis.allergen_risk, "allergens": analysis.identified_allergens},
+            "nutritional_risk": analysis.nutritional_risk,
+            "additive_risk": analysis.additive_risk,
+            "contamination_risk": analysis.contamination_risk,
+            "interaction_risk": analysis.interaction_risk,
+            "identified_allergens": analysis.identified_allergens,
+            "harmful_additives": analysis.harmful_additives,
+            "nutritional_concerns": analysis.nutritional_concerns,
+            "safety_warnings": analysis.safety_warnings,
+            "ai_summary": analysis.ai_summary,
+            "ai_recommendations": analysis.ai_recommendations,
+            "created_at": analysis.created_at
+        },
+        "product": product
+    }
+
+
+async def timed(label: str, payloads, encode):
+    start = time.perf_counter()
+    size = 0
+    for payload in payloads:
+        size += len(await encode(payload))
+    elapsed = (time.perf_counter() - start) / len(payloads) * 1e6
+    print(f"{label:<44} {elapsed:>8.1f} {size / len(payloads):>10.0f}")
+    return elapsed
+
+
+def encoder(field, response_class, exclude_unset=False):
+    async def encode(payload):
+        content = await serialize_response(field=field, response_content=payload, exclude_unset=exclude_unset)
+        return response_class(content).body
+    return encode
+
+
+async def main(size: int):
+    engine = RuleEngine()
+    corpus = build_corpus(size)
+    results = []
+    for record in corpus:
+        result = await engine._rule_based_analysis(record["product"], record["health_profile"])
+        result.update(AI_FIELDS)
+        results.append(result)
+
+    analyze_payloads = [{"status": "success", "session_id": str(uuid.uuid4()), "analysis": result} for result in results]
+    details_payloads = []
+    for index, (record, result) in enumerate(zip(corpus, results), 1):
+        row = risk_analysis_row(index, result)
+        row.id, row.created_at = index, datetime.utcnow()
+        product = {"name": record["product"]["product_name"], "description": "",
+                   "ingredients": record["product"]["ingredients"]}
+        details_payloads.append((row, product))
+
+    dict_field = create_response_field("response", dict)
+    analyze_field = create_response_field("response", AnalyzeResponse)
+    details_field = create_response_field("response", AnalysisDetailsResponse)
+
+    print(f"{size:,} responses, orjson {'installed' if orjson else 'not installed'}\n")
+    print(f"{'path':<44} {'us/resp':>8} {'bytes':>10}")
+    legacy = await timed("analyze: response_model=dict, JSONResponse", analyze_payloads,
+                         encoder(dict_field, JSONResponse))
+    await timed("analyze: AnalyzeResponse, JSONResponse", analyze_payloads,
+                encoder(analyze_field, JSONResponse, exclude_unset=True))
+    typed = await timed("analyze: AnalyzeResponse, FastJSONResponse", analyze_payloads,
+                        encoder(analyze_field, FastJSONResponse, exclude_unset=True))
+    print(f"{'':<44} {legacy / typed:>7.1f}x\n")
+
+    async def legacy_encode(payload):
+        return JSONResponse(jsonable_encoder(legacy_details(*payload))).body
+    typed_encode = encoder(details_field, FastJSONResponse)
+
+    legacy = await timed("details: hand-built dict, jsonable_encoder", details_payloads, legacy_encode)
+    typed = await timed("details: AnalysisDetailsResponse, FastJSON", details_payloads,
+                        lambda payload: typed_encode({"analysis": StoredAnalysis.from_row(payload[0]), "product": payload[1]}))
+    print(f"{'':<44} {legacy / typed:>7.1f}x")
+
+    # Same document either way (integer scores come back as floats, which compare equal)
+    for row, product in details_payloads[:50]:
+        old = json.loads(await legacy_encode((row, product)))
+        new = json.loads(await typed_encode({"analysis": StoredAnalysis.from_row(row), "product": product}))
+        assert old == new, (old, new)
+    print("\ndetails payloads identical: OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
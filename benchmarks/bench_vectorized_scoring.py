@@ -0,0 +1,88 @@
+"""
+Parity check and throughput comparison between the analyzer's scalar scoring
+(_analyze_nutrition, _calculate_overall_risk, _determine_risk_level) and
+VectorizedScorer.
+
+    python -m benchmarks.bench_vectorized_scoring [N]
+"""
+import sys
+import time
+import random
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from backend.ai_analyzer import AIRiskAnalyzer
+from backend.llm_cache import LLMResponseCache
+from backend.vectorized_scoring import VectorizedScorer
+
+
+def build_products(count: int, seed: int = 42) -> pd.DataFrame:
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        nutrition_facts = {} if rng.random() < 0.1 else {
+            "sodium_mg": rng.choice([0, rng.uniform(0, 2000), 600, 1400]),
+            "sugar_g": rng.choice([0, rng.uniform(0, 40), 15, 25]),
+            "trans_fat_g": rng.choice([0, rng.uniform(0, 2), 0.5])
+        }
+        rows.append({
+            "allergen_risk": min(rng.randint(0, 6) * 15 * rng.choice([1, 3]), 100),
+            "additive_risk": min(rng.randint(0, 6) * 20, 100),
+            "contamination_risk": rng.choice([0, 15, 20, 30, 35, 45, 50, 65]),
+            "interaction_risk": min(rng.randint(0, 5) * 25, 100),
+            "nutrition_facts": nutrition_facts
+        })
+    return pd.DataFrame(rows)
+
+
+def score_scalar(analyzer: AIRiskAnalyzer, frame: pd.DataFrame):
+    loop = asyncio.new_event_loop()
+    nutrition_scores, severities, overall_scores, levels = [], [], [], []
+    try:
+        for row in frame.itertuples(index=False):
+            nutrition = loop.run_until_complete(analyzer._analyze_nutrition(row.nutrition_facts))
+            overall = analyzer._calculate_overall_risk(
+                {"score": row.allergen_risk}, {"score": row.additive_risk}, nutrition,
+                {"score": row.contamination_risk}, {"score": row.interaction_risk}
+            )
+            nutrition_scores.append(nutrition["score"])
+            severities.append(nutrition["severity"])
+            overall_scores.append(overall)
+            levels.append(analyzer._determine_risk_level(overall))
+    finally:
+        loop.close()
+    return nutrition_scores, severities, overall_scores, levels
+
+
+def run(count: int = 200_000):
+    analyzer = AIRiskAnalyzer(response_cache=LLMResponseCache())
+    scorer = VectorizedScorer.from_analyzer(analyzer)
+    frame = build_products(count)
+
+    start = time.perf_counter()
+    nutrition_scores, severities, overall_scores, levels = score_scalar(analyzer, frame)
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scored = scorer.score_frame(frame)
+    vector_seconds = time.perf_counter() - start
+
+    # Parity: exact equality, floats compared bit for bit
+    assert scored["nutritional_risk"].tolist() == nutrition_scores
+    assert scored["nutrition_severity"].tolist() == severities
+    assert np.array_equal(
+        scored["overall_risk_score"].to_numpy(dtype=np.float64).view(np.uint64),
+        np.array(overall_scores, dtype=np.float64).view(np.uint64)
+    )
+    assert scored["risk_level"].tolist() == levels
+
+    print(f"products:   {count}")
+    print(f"scalar:     {count / scalar_seconds:>12,.0f} products/s")
+    print(f"vectorized: {count / vector_seconds:>12,.0f} products/s ({scalar_seconds / vector_seconds:.1f}x)")
+    print("parity:     OK")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,102 @@
+"""
+Seeded generator of synthetic but realistic product records and health
+profiles, shared by the analyzer benchmarks.
+"""
+import random
+from typing import Dict, List, Optional
+
+ALLERGENS = [
+    "milk", "eggs", "fish", "shellfish", "tree nuts", "peanuts",
+    "wheat", "soybeans", "sesame", "lactose", "gluten", "casein"
+]
+ADDITIVES = [
+    "monosodium glutamate", "sodium nitrate", "high fructose corn syrup", "trans fat",
+    "aspartame", "red dye 40", "bht", "bha", "sodium benzoate"
+]
+INTERACTION_INGREDIENTS = ["grapefruit", "caffeine", "alcohol", "vitamin k", "tyramine"]
+RECALL_PRONE = ["spinach", "lettuce", "sprouts"]
+COMMON = [
+    "sugar", "salt", "water", "cocoa butter", "enriched wheat flour", "canola oil", "palm oil",
+    "natural flavors", "citric acid", "skim milk powder", "soy lecithin", "corn starch",
+    "whole grain oats", "brown rice syrup", "dextrose", "maltodextrin", "xanthan gum",
+    "guar gum", "ascorbic acid", "tocopherols", "niacin", "reduced iron", "thiamine mononitrate",
+    "riboflavin", "folic acid", "yeast extract", "garlic powder", "onion powder", "paprika",
+    "black pepper", "turmeric", "vinegar", "tomato paste", "modified food starch", "whey protein",
+    "egg whites", "almond butter", "sunflower oil", "baking soda", "calcium carbonate",
+    "potassium sorbate", "carrageenan", "pea protein", "chicory root fiber", "vanilla extract",
+    "sea salt", "honey", "molasses", "cane sugar", "barley malt", "cultured celery powder"
+]
+CATEGORIES = [
+    "Snacks", "Dairy", "Beverages", "Breakfast Cereal", "Condiments", "Frozen Meals",
+    "Bakery", "Seafood", "Meat", "Raw Meat", "Produce", "Eggs", "Supplements", "Confectionery"
+]
+NAME_WORDS = [
+    "organic", "classic", "crunchy", "lite", "protein", "honey", "spicy", "family size",
+    "original", "smoked", "granola", "yogurt", "crackers", "soup", "cereal", "juice", "bar"
+]
+DIETARY_RESTRICTIONS = ["vegetarian", "vegan", "gluten-free", "low-sodium", "keto", "halal", "kosher"]
+MEDICAL_CONDITIONS = ["hypertension", "diabetes", "celiac disease", "heart disease", "pregnancy", "kidney disease"]
+AGE_GROUPS = ["child", "teen", "adult", "senior"]
+
+
+def ingredients_text(rng: random.Random, count: int) -> str:
+    """Mostly common ingredients with a realistic sprinkling of rule hits"""
+    parts = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.08:
+            parts.append(rng.choice(ALLERGENS))
+        elif roll < 0.13:
+            parts.append(rng.choice(ADDITIVES))
+        elif roll < 0.16:
+            parts.append(rng.choice(INTERACTION_INGREDIENTS))
+        elif roll < 0.18:
+            parts.append(rng.choice(RECALL_PRONE))
+        else:
+            parts.append(rng.choice(COMMON))
+    prefix = "Ingredients: " if rng.random() < 0.5 else ""
+    return prefix + ", ".join(parts)
+
+
+def nutrition_facts(rng: random.Random) -> Dict:
+    if rng.random() < 0.1:
+        return {}
+    return {
+        "serving_size": f"{rng.randint(20, 250)}g",
+        "calories": rng.randint(40, 650),
+        "sodium_mg": round(rng.uniform(0, 2200), 1),
+        "sugar_g": round(rng.uniform(0, 45), 1),
+        "saturated_fat_g": round(rng.uniform(0, 14), 1),
+        "trans_fat_g": rng.choice([0, 0, 0, 0.2, 0.5, round(rng.uniform(0, 3), 1)]),
+        "protein_g": round(rng.uniform(0, 30), 1),
+        "fiber_g": round(rng.uniform(0, 12), 1)
+    }
+
+
+def product(rng: random.Random, min_ingredients: int = 8, max_ingredients: int = 60) -> Dict:
+    return {
+        "product_name": " ".join(rng.sample(NAME_WORDS, 3)).title(),
+        "brand": rng.choice(["Acme", "NutriCo", "GreenFarm", "Sunrise", "Oceanic", None]),
+        "category": rng.choice(CATEGORIES),
+        "ingredients": ingredients_text(rng, rng.randint(min_ingredients, max_ingredients)),
+        "nutrition_facts": nutrition_facts(rng),
+        "product_description": ""
+    }
+
+
+def health_profile(rng: random.Random) -> Optional[Dict]:
+    if rng.random() < 0.25:
+        return None
+    return {
+        "allergies": rng.sample(ALLERGENS, rng.randint(0, 3)),
+        "dietary_restrictions": rng.sample(DIETARY_RESTRICTIONS, rng.randint(0, 2)),
+        "medical_conditions": rng.sample(MEDICAL_CONDITIONS, rng.randint(0, 2)),
+        "age_group": rng.choice(AGE_GROUPS),
+        "pregnancy_status": rng.random() < 0.05
+    }
+
+
+def build_corpus(size: int, seed: int = 2024) -> List[Dict]:
+    """``size`` records of {"product": ..., "health_profile": ...}; identical for a given seed"""
+    rng = random.Random(seed)
+    return [{"product": product(rng), "health_profile": health_profile(rng)} for _ in range(size)]
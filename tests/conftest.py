@@ -0,0 +1,90 @@
+import os
+import json
+import random
+import asyncio
+import tempfile
+
+import httpx
+import pytest
+
+# Point the app's databases at a scratch directory before any backend module reads the environment
+_scratch = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch.name}/test.db")
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_scratch.name, "llm_cache.db"))
+
+from backend.llm_client import LLMClientPool, ProviderSettings  # noqa: E402
+
+
+def pytest_unconfigure(config):
+    _scratch.cleanup()
+
+
+@pytest.fixture
+def scoring_frame():
+    """Category scores and nutrition facts spanning every nutrition and risk level threshold"""
+    import pandas as pd
+
+    rng = random.Random(7)
+    rows = []
+    for _ in range(5000):
+        nutrition_facts = {} if rng.random() < 0.1 else {
+            "sodium_mg": rng.choice([0, rng.uniform(0, 2000), 600, 1400]),
+            "sugar_g": rng.choice([0, rng.uniform(0, 40), 15, 25]),
+            "trans_fat_g": rng.choice([0, rng.uniform(0, 2), 0.5])
+        }
+        rows.append({
+            "allergen_risk": min(rng.randint(0, 6) * 15 * rng.choice([1, 3]), 100),
+            "additive_risk": min(rng.randint(0, 6) * 20, 100),
+            "contamination_risk": rng.choice([0, 15, 20, 30, 35, 45, 50, 65]),
+            "interaction_risk": min(rng.randint(0, 5) * 25, 100),
+            "nutrition_facts": nutrition_facts
+        })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def packing_corpus():
+    """Products with distinct names, some with a health profile"""
+    rng = random.Random(11)
+    ingredients = ["sugar", "milk", "wheat flour", "soy lecithin", "salt", "palm oil", "cocoa", "peanuts"]
+    return [{
+        "product": {"product_name": f"Stub Product {i}", "ingredients": ", ".join(rng.sample(ingredients, 5)),
+                    "nutrition_facts": {"sugar_g": rng.randint(0, 30)}, "category": "Snacks"},
+        "health_profile": {"allergies": ["milk"]} if i % 3 == 0 else None
+    } for i in range(48)]
+
+
+@pytest.fixture
+def packing_stub_pool():
+    """
+    Factory for an LLM pool whose stub provider answers single and packed prompts
+    with "stub: <product name>" summaries. Like a real model now and then, it leaves
+    out some packed items and gives others an invalid confidence (stable per
+    product, so retries succeed). Each call's prompt token estimate goes to ``calls``.
+    """
+    def stub_pool(calls: list) -> LLMClientPool:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            messages = json.loads(request.content)["messages"]
+            prompt = messages[-1]["content"]
+            calls.append(sum(len(message["content"]) for message in messages) // 4)
+            entries = [json.loads(line) for line in prompt.splitlines() if line.startswith('{"id"')]
+            if entries:
+                reply = []
+                for entry in entries:
+                    fault = sum(map(ord, entry["product"]))
+                    if fault % 11 == 0:
+                        continue
+                    reply.append({"id": entry["id"], "summary": f"stub: {entry['product']}", "recommendations": [],
+                                  "confidence": 150 if fault % 13 == 0 else 90, "concerns": []})
+                content = "Here is the analysis:\n" + json.dumps(reply)
+            else:
+                product = prompt.split("Product: ", 1)[1].split("\n", 1)[0]
+                content = json.dumps({"summary": f"stub: {product}", "recommendations": [],
+                                      "confidence": 90, "concerns": []})
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}], "usage": {}})
+
+        settings = {"openai": ProviderSettings(api_key="stub", model="stub-model", max_concurrency=8)}
+        return LLMClientPool(settings=settings, transport=httpx.MockTransport(handler))
+
+    return stub_pool
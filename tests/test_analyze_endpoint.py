@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.llm_cache import LLMResponseCache
+from backend.llm_client import LLMResponse
+
+REQUEST = {"request": {"product_name": "Stub Bar", "ingredients": "sugar, milk, salt"}}
+VALID = {"summary": "Fine in moderation", "recommendations": ["Limit sugar"], "confidence": 90, "concerns": []}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def stub_llm(monkeypatch, reply: dict, model=None):
+    """
+    Answer every LLM call with ``reply``, written by the primary model unless
+    ``model`` is given, and give the analyzer a fresh in-memory cache
+    """
+    analyzer = app.state.ai_analyzer
+    calls = []
+
+    async def complete(prompt, max_tokens=None, scale=1.0):
+        calls.append(prompt)
+        return LLMResponse(text=json.dumps(reply), provider="stub", model=model or analyzer._primary_model())
+
+    monkeypatch.setattr(analyzer, "_complete", complete)
+    monkeypatch.setattr(analyzer, "response_cache", LLMResponseCache())
+    return calls
+
+
+@pytest.mark.parametrize("malformed", [
+    {"confidence": 150},
+    {"recommendations": [{"text": "Limit sugar"}]},
+    {"summary": {"text": "Fine in moderation"}},
+    {"summary": None},
+])
+def test_malformed_llm_reply_falls_back_to_the_default_analysis(client, monkeypatch, malformed):
+    calls = stub_llm(monkeypatch, {**VALID, **malformed})
+    default = app.state.ai_analyzer._get_default_ai_response()
+
+    for _ in range(2):
+        response = client.post("/api/analysis/analyze", json=REQUEST)
+        assert response.status_code == 200
+        assert response.json()["analysis"]["ai_summary"] == default["summary"]
+
+    # The malformed reply is not cached, so the next request asks the provider again
+    assert len(calls) == 2
+
+
+def test_valid_llm_reply_is_served_and_cached(client, monkeypatch):
+    calls = stub_llm(monkeypatch, VALID)
+
+    for _ in range(2):
+        response = client.post("/api/analysis/analyze", json=REQUEST)
+        assert response.status_code == 200
+        analysis = response.json()["analysis"]
+        assert analysis["ai_summary"] == VALID["summary"]
+        assert analysis["confidence_score"] == 90
+
+    assert len(calls) == 1
+
+
+def test_reply_from_a_fallback_model_is_served_but_not_cached(client, monkeypatch):
+    calls = stub_llm(monkeypatch, VALID, model="secondary-model")
+
+    for _ in range(2):
+        response = client.post("/api/analysis/analyze", json=REQUEST)
+        assert response.json()["analysis"]["ai_summary"] == VALID["summary"]
+
+    assert len(calls) == 2
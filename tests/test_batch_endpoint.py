@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+ITEM = {"product_name": "Stub Bar", "ingredients": "sugar, milk, salt"}
+
+
+def test_batch_results_are_persisted_and_summarized():
+    with TestClient(app) as client:
+        body = "\n".join(json.dumps({**ITEM, "product_name": f"Stub Bar {i}"}) for i in range(5))
+        response = client.post("/api/analysis/batch?persist_batch_size=2", content=body)
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines[:-1]) == list(range(5))
+    assert lines[-1] == {"type": "summary", "received": 5, "succeeded": 5, "failed": 0,
+                         "persisted": 5, "not_persisted": []}
+
+
+def test_client_disconnect_cancels_remaining_analyses(monkeypatch):
+    with TestClient(app) as client:
+        analyzer = app.state.ai_analyzer
+        started = []
+
+        async def slow_analysis(product_data, health_profile=None, packed=False):
+            started.append(product_data["product_name"])
+            await asyncio.sleep(0.05)
+            return await analyzer.analyze_rules(product_data, health_profile)
+
+        monkeypatch.setattr(analyzer, "analyze_product", slow_analysis)
+        body = "\n".join(json.dumps(ITEM) for _ in range(200)).encode()
+        sent = []
+
+        async def run():
+            messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await asyncio.sleep(0.1)
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+                "scheme": "http", "path": "/api/analysis/batch", "raw_path": b"/api/analysis/batch",
+                "root_path": "", "query_string": b"workers=2", "headers": [(b"host", b"testserver")],
+                "client": ("testclient", 50000), "server": ("testserver", 80),
+            }
+            await asyncio.wait_for(app(scope, receive, send), timeout=5)
+
+        client.portal.call(run)
+
+    assert len(started) < 20
+    body_chunks = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    summary = json.loads(body_chunks.splitlines()[-1])
+    assert summary["type"] == "summary"
+    assert summary["persisted"] == summary["succeeded"]
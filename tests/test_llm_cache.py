@@ -0,0 +1,29 @@
+import time
+import asyncio
+
+from backend.llm_cache import LLMResponseCache, MemoryLRUCache, SQLiteCache
+
+
+def test_disk_hits_keep_their_timestamp_when_promoted(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "llm_cache.db"))
+    disk.set("key", {"summary": "stored earlier"})
+    # Backdate the disk entry by an hour
+    with disk._lock:
+        disk._conn.execute("UPDATE llm_cache SET created_at = created_at - 3600")
+        disk._conn.commit()
+    cache = LLMResponseCache(memory=MemoryLRUCache(), disk=disk)
+
+    async def scenario():
+        assert await cache.get("key") == {"summary": "stored earlier"}
+        return await cache.purge(older_than=1800)
+
+    # Both tiers agree the promoted entry is older than 30 minutes
+    assert asyncio.run(scenario()) == {"memory": 1, "disk": 1}
+    disk.close()
+
+
+def test_promoted_entries_stay_in_memory_for_the_memory_ttl():
+    memory = MemoryLRUCache(ttl_seconds=60)
+    memory.set("key", {"summary": "old"}, created_at=time.time() - 3600)
+
+    assert memory.get("key") == {"summary": "old"}
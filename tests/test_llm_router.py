@@ -0,0 +1,111 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from backend.ai_analyzer import AIRiskAnalyzer
+from backend.llm_cache import LLMResponseCache
+from backend.llm_client import LLMClientPool, ProviderSettings
+from backend.llm_router import LLMRouter
+
+REPLY = json.dumps({"summary": "stub", "recommendations": [], "confidence": 90, "concerns": []})
+
+
+class StubProviders:
+    """Both vendors' endpoints on one mock transport; behaviour is switched per test"""
+
+    def __init__(self):
+        self.calls = {"openai": 0, "anthropic": 0}
+        self.delay = {"openai": 0.01, "anthropic": 0.02}
+        self.stall = {"openai": 0.0, "anthropic": 0.0}
+        self.stall_every = {"openai": 0, "anthropic": 0}
+        self.failing = {"openai": False, "anthropic": False}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        name = "openai" if request.url.path.endswith("/chat/completions") else "anthropic"
+        self.calls[name] += 1
+        delay = self.delay[name]
+        if self.stall_every[name] and self.calls[name] % self.stall_every[name] == 0:
+            delay = self.stall[name]
+        await asyncio.sleep(delay)
+        if self.failing[name]:
+            return httpx.Response(503, text="overloaded")
+        if name == "openai":
+            return httpx.Response(200, json={"choices": [{"message": {"content": REPLY}}], "usage": {}})
+        return httpx.Response(200, json={"content": [{"text": REPLY}], "usage": {}})
+
+    def analyzer(self, names=("openai", "anthropic"), **router_options) -> AIRiskAnalyzer:
+        settings = {name: ProviderSettings(api_key="stub", model=f"stub-{name}", max_concurrency=64) for name in names}
+        pool = LLMClientPool(settings=settings, transport=httpx.MockTransport(self.handler))
+        analyzer = AIRiskAnalyzer(llm_clients=pool, response_cache=LLMResponseCache())
+        analyzer.llm_router = LLMRouter(pool, **router_options)
+        return analyzer
+
+
+async def timed_calls(analyzer: AIRiskAnalyzer, count: int):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await analyzer._complete("Product: stub\n")
+        assert response is not None and response.text == REPLY
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def test_hedging_cuts_primary_stalls_short():
+    async def run():
+        stub = StubProviders()
+        stub.stall["openai"], stub.stall_every["openai"] = 1.0, 5
+        analyzer = stub.analyzer(budget_seconds=5, hedge_delay=0.1, hedge_min_delay=0.05)
+        try:
+            latencies = await timed_calls(analyzer, 20)
+        finally:
+            await analyzer.aclose()
+        return latencies, analyzer.llm_router.stats()
+
+    latencies, stats = asyncio.run(run())
+    assert max(latencies) < 0.5
+    assert stats["hedged"] >= 4 and stats["hedge_wins"] >= 4
+
+
+def test_breaker_stops_traffic_to_a_failing_primary_then_probes_it():
+    async def run():
+        stub = StubProviders()
+        analyzer = stub.analyzer(failure_threshold=5, cooldown_seconds=0.5, hedge_delay=1.0)
+        breaker = analyzer.llm_router.breakers["openai"]
+        try:
+            stub.failing["openai"] = True
+            # The secondary answers while the primary fails
+            await timed_calls(analyzer, 10)
+            assert breaker.state == "open"
+            assert stub.calls["openai"] == 5
+
+            stub.failing["openai"] = False
+            await asyncio.sleep(0.55)
+            before = stub.calls["openai"]
+            await timed_calls(analyzer, 5)
+            assert breaker.state == "closed"
+            assert stub.calls["openai"] == before + 5
+        finally:
+            await analyzer.aclose()
+
+    asyncio.run(run())
+
+
+def test_analysis_degrades_to_the_default_when_the_budget_runs_out():
+    async def run():
+        stub = StubProviders()
+        stub.delay = {"openai": 10.0, "anthropic": 10.0}
+        analyzer = stub.analyzer(budget_seconds=0.3, hedge_delay=0.1)
+        try:
+            start = time.perf_counter()
+            result = await analyzer.analyze_product({"product_name": "Stub", "ingredients": "sugar"})
+            return analyzer, result, time.perf_counter() - start
+        finally:
+            await analyzer.aclose()
+
+    analyzer, result, elapsed = asyncio.run(run())
+    assert result["ai_summary"] == analyzer._get_default_ai_response()["summary"]
+    assert elapsed < 1.0
+    assert analyzer.llm_router.budget_exhausted == 1
@@ -0,0 +1,28 @@
+import asyncio
+
+from backend.product_cache import ProductCache
+
+
+def cached_categories(cache: ProductCache, categories):
+    async def load():
+        return list(categories)
+    return asyncio.run(cache.get_categories(load))
+
+
+def test_products_with_a_new_category_drop_the_cached_list():
+    cache = ProductCache()
+    cached_categories(cache, ["Dairy"])
+
+    cache.products_added(["Snacks"])
+
+    assert cached_categories(cache, ["Dairy", "Snacks"]) == ["Dairy", "Snacks"]
+
+
+def test_products_with_known_categories_keep_the_cached_list():
+    cache = ProductCache()
+    cached_categories(cache, ["Dairy", "Snacks"])
+
+    cache.products_added(["Dairy", None])
+
+    assert cached_categories(cache, ["reloaded"]) == ["Dairy", "Snacks"]
+    assert cache.invalidations == 0
@@ -0,0 +1,18 @@
+from backend.prompt_builder import fit_ingredients, split_top_level
+
+
+def test_sub_ingredient_lists_stay_with_their_ingredient():
+    statement = "sugar, chocolate (sugar, cocoa butter; milk [skimmed, powdered]), milk (3,5% fat), salt"
+    assert split_top_level(statement) == [
+        "sugar", "chocolate (sugar, cocoa butter; milk [skimmed, powdered])", "milk (3,5% fat)", "salt"
+    ]
+
+
+def test_trimming_never_cuts_inside_brackets():
+    statement = ", ".join(["chocolate (sugar, cocoa butter, emulsifier (soy lecithin), vanilla)"] * 2 +
+                          [f"spice {i}" for i in range(200)])
+    fitted, trimmed = fit_ingredients(statement, 60)
+    assert trimmed
+    kept = fitted.rsplit(" (+", 1)[0]
+    assert kept.count("(") == kept.count(")")
+    assert fitted.startswith("chocolate (sugar, cocoa butter, emulsifier (soy lecithin), vanilla)")
@@ -0,0 +1,74 @@
+import json
+import asyncio
+
+from backend.ai_analyzer import AIRiskAnalyzer
+from backend.llm_cache import LLMResponseCache
+from backend.prompt_packing import PromptPacker, parse_packed_response
+
+
+def entry(item_id, **fields):
+    return {"id": item_id, "summary": f"summary {item_id}", "recommendations": [], "confidence": 90,
+            "concerns": [], **fields}
+
+
+def test_parse_packed_response_tolerates_prose_around_the_array():
+    text = "Here you go:\n```json\n" + json.dumps([entry("1"), entry("2")]) + "\n```"
+
+    results = parse_packed_response(text, ["1", "2"])
+
+    assert results["1"]["summary"] == "summary 1"
+    assert results["2"]["summary"] == "summary 2"
+
+
+def test_parse_packed_response_drops_unusable_entries():
+    text = json.dumps([
+        entry("1"),
+        entry("1", summary="repeated id"),
+        entry("9"),
+        entry("2", confidence=150),
+        entry("3", recommendations="not a list"),
+        {"id": "4", "confidence": 90}
+    ])
+
+    results = parse_packed_response(text, ["1", "2", "3", "4"])
+
+    assert list(results) == ["1"]
+    assert results["1"]["summary"] == "summary 1"
+
+
+def test_parse_packed_response_without_an_array():
+    assert parse_packed_response("Sorry, I can't help with that.", ["1"]) == {}
+    assert parse_packed_response("[not json]", ["1"]) == {}
+
+
+async def run_round(stub_pool, corpus, pack_size: int):
+    """Analyze ``corpus`` with 16 concurrent workers; (provider calls, packer fallbacks)"""
+    calls = []
+    analyzer = AIRiskAnalyzer(llm_clients=stub_pool(calls), response_cache=LLMResponseCache())
+    analyzer.packer = PromptPacker(analyzer._call_ai_packed, pack_size=pack_size)
+    semaphore = asyncio.Semaphore(16)
+
+    async def one(record):
+        async with semaphore:
+            return await analyzer.analyze_product(dict(record["product"]), record["health_profile"],
+                                                  packed=pack_size > 1)
+
+    try:
+        results = await asyncio.gather(*(one(record) for record in corpus))
+    finally:
+        await analyzer.aclose()
+
+    # No id mix-ups: every product gets the summary written for it
+    for record, result in zip(corpus, results):
+        assert result["ai_summary"] == f"stub: {record['product']['product_name']}"
+    return len(calls), analyzer.packer.fallbacks
+
+
+def test_packed_batch_gives_every_product_its_own_result(packing_stub_pool, packing_corpus):
+    single_calls, _ = asyncio.run(run_round(packing_stub_pool, packing_corpus, pack_size=1))
+    packed_calls, fallbacks = asyncio.run(run_round(packing_stub_pool, packing_corpus, pack_size=8))
+
+    assert single_calls == len(packing_corpus)
+    assert packed_calls < single_calls
+    # Items the stub leaves out or answers with an invalid confidence are retried on their own
+    assert fallbacks > 0
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.database import AsyncSessionLocal
+from backend.models import Product, RiskAnalysis
+from backend.reanalysis import ReanalysisJob
+
+
+def test_rows_without_a_stored_profile_are_skipped_not_rescored():
+    async def insert_rows():
+        async with AsyncSessionLocal() as db:
+            product = Product(name="Legacy Bar", category="Snacks", ingredients="milk, sugar")
+            db.add(product)
+            await db.flush()
+            common = {"product_id": product.id, "analyzer_version": "old", "risk_level": "CRITICAL",
+                      "overall_risk_score": 99.0, "created_at": datetime(2024, 1, 1)}
+            # Written before health profiles were stored: the column is left SQL NULL
+            legacy = RiskAnalysis(**common)
+            profiled = RiskAnalysis(**common, health_profile={"allergies": ["milk"]})
+            db.add_all([legacy, profiled])
+            await db.commit()
+            return legacy.id, profiled.id
+
+    async def run_job():
+        job = ReanalysisJob(app.state.ai_analyzer, max_rows_per_second=10_000)
+        await job.start(restart=True)
+        await job.wait()
+        return await job.status()
+
+    async def load(analysis_id):
+        async with AsyncSessionLocal() as db:
+            return await db.get(RiskAnalysis, analysis_id)
+
+    with TestClient(app) as client:
+        legacy_id, profiled_id = client.portal.call(insert_rows)
+        status = client.portal.call(run_job)
+        legacy = client.portal.call(load, legacy_id)
+        profiled = client.portal.call(load, profiled_id)
+
+    assert status["status"] == "complete"
+    assert status["skipped"] >= 1
+    assert (legacy.analyzer_version, legacy.overall_risk_score) == ("old", 99.0)
+    assert profiled.analyzer_version == app.state.ai_analyzer.analyzer_version
+    assert profiled.health_profile == {"allergies": ["milk"]}
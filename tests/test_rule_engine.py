@@ -0,0 +1,21 @@
+import asyncio
+
+from backend.rule_engine import RuleEngine
+
+
+def analyze(ingredients: str, health_profile=None) -> dict:
+    return asyncio.run(RuleEngine()._rule_based_analysis(
+        {"ingredients": ingredients, "nutrition_facts": {}}, health_profile
+    ))
+
+
+def test_sub_ingredients_do_not_repeat_their_parents_allergen():
+    result = analyze("sugar, milk chocolate (milk, sugar)", {"allergies": ["milk"]})
+
+    assert result["identified_allergens"] == ["milk"]
+    assert result["allergen_risk"]["score"] == 45
+    assert result["findings"]["allergens"] == ["milk"]
+
+
+def test_separate_top_level_ingredients_still_count_separately():
+    assert analyze("milk, cream (milk)")["identified_allergens"] == ["milk", "milk"]
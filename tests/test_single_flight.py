@@ -0,0 +1,67 @@
+import json
+import asyncio
+
+import httpx
+
+from backend.ai_analyzer import AIRiskAnalyzer
+from backend.llm_cache import LLMResponseCache
+from backend.llm_client import LLMClientPool, ProviderSettings
+
+PRODUCT = {
+    "product_name": "Viral Protein Bar",
+    "ingredients": "peanuts, milk protein, sugar, soy lecithin, aspartame",
+    "nutrition_facts": {"sugar_g": 18, "sodium_mg": 220},
+    "category": "Snacks"
+}
+PROFILE = {"allergies": ["peanuts"], "medications": [], "health_conditions": []}
+
+
+def stub_analyzer(calls: list, delay: float = 0.1) -> AIRiskAnalyzer:
+    """Analyzer whose only provider is a stub that records each call"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        await asyncio.sleep(delay)
+        reply = {"summary": "stub", "recommendations": [], "confidence": 90, "concerns": []}
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": json.dumps(reply)}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1}
+        })
+
+    settings = {"openai": ProviderSettings(api_key="stub", model="stub-model", max_concurrency=64)}
+    pool = LLMClientPool(settings=settings, transport=httpx.MockTransport(handler))
+    return AIRiskAnalyzer(llm_clients=pool, response_cache=LLMResponseCache())
+
+
+def test_identical_concurrent_analyses_share_one_provider_call():
+    async def scenario():
+        calls = []
+        analyzer = stub_analyzer(calls)
+        try:
+            results = await asyncio.gather(*[
+                analyzer.analyze_product(dict(PRODUCT), dict(PROFILE)) for _ in range(50)
+            ])
+        finally:
+            await analyzer.aclose()
+        return calls, results, analyzer.in_flight.coalesced
+
+    calls, results, coalesced = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(result["ai_summary"] == "stub" for result in results)
+    assert coalesced == 49
+
+
+def test_distinct_profiles_are_not_coalesced():
+    async def scenario():
+        calls = []
+        analyzer = stub_analyzer(calls)
+        try:
+            await asyncio.gather(
+                analyzer.analyze_product(dict(PRODUCT), {"allergies": ["milk"]}),
+                analyzer.analyze_product(dict(PRODUCT), {"allergies": ["soy"]})
+            )
+        finally:
+            await analyzer.aclose()
+        return calls
+
+    assert len(asyncio.run(scenario())) == 2
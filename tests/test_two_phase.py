@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+REQUEST = {"request": {"product_name": "Stub Bar", "ingredients": "sugar, milk, salt"}}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_other_workers_see_a_running_ai_phase_as_pending(client, monkeypatch):
+    release = asyncio.Event()
+    analyzer = app.state.ai_analyzer
+
+    async def slow_ai(product_data, health_profile, packed=False):
+        await release.wait()
+        return analyzer._get_default_ai_response()
+
+    monkeypatch.setattr(analyzer, "_ai_comprehensive_analysis", slow_ai)
+    analysis_id = client.post("/api/analysis/analyze?two_phase=true", json=REQUEST).json()["analysis_id"]
+
+    # A worker that does not hold the job only has the stored row
+    job = app.state.ai_jobs._jobs.pop(analysis_id)
+    assert client.get(f"/api/analysis/analysis/{analysis_id}/ai").json()["status"] == "pending"
+
+    app.state.ai_jobs._jobs[analysis_id] = job
+    client.portal.call(release.set)
+    client.portal.call(job.done.wait)
+    app.state.ai_jobs._jobs.pop(analysis_id)
+    status = client.get(f"/api/analysis/analysis/{analysis_id}/ai").json()
+    assert status["status"] == "complete"
+    assert status["result"]["ai_summary"] == analyzer._get_default_ai_response()["summary"]
+
+
+def test_ai_phases_cancelled_at_shutdown_are_marked_failed(monkeypatch):
+    with TestClient(app) as client:
+        analyzer = app.state.ai_analyzer
+
+        async def hang(product_data, health_profile, packed=False):
+            await asyncio.Event().wait()
+
+        monkeypatch.setattr(analyzer, "_ai_comprehensive_analysis", hang)
+        monkeypatch.setenv("AI_JOBS_SHUTDOWN_TIMEOUT", "0.1")
+        analysis_id = client.post("/api/analysis/analyze?two_phase=true", json=REQUEST).json()["analysis_id"]
+
+    with TestClient(app) as client:
+        status = client.get(f"/api/analysis/analysis/{analysis_id}/ai").json()
+    assert status["status"] == "failed"
+
+
+def test_two_phase_response_identifies_the_stored_analysis(client):
+    body = client.post("/api/analysis/analyze?two_phase=true", json=REQUEST).json()
+    assert body["analysis"]["analysis_id"] == body["analysis_id"]
+    assert body["analysis"]["created_at"]
+
+    stored = client.get(f"/api/analysis/analysis/{body['analysis_id']}").json()["analysis"]
+    assert stored["id"] == body["analysis_id"]
+    assert stored["allergen_risk"] == {"score": body["analysis"]["allergen_risk"]["score"],
+                                       "allergens": body["analysis"]["identified_allergens"]}
@@ -0,0 +1,39 @@
+import asyncio
+
+import numpy as np
+
+from backend.ai_analyzer import AIRiskAnalyzer
+from backend.llm_cache import LLMResponseCache
+from backend.vectorized_scoring import VectorizedScorer
+
+
+def score_scalar(analyzer: AIRiskAnalyzer, frame):
+    """The analyzer's own per-product scoring for every row of ``frame``"""
+    nutrition_scores, severities, overall_scores, levels = [], [], [], []
+    for row in frame.itertuples(index=False):
+        nutrition = asyncio.run(analyzer._analyze_nutrition(row.nutrition_facts))
+        overall = analyzer._calculate_overall_risk(
+            {"score": row.allergen_risk}, {"score": row.additive_risk}, nutrition,
+            {"score": row.contamination_risk}, {"score": row.interaction_risk}
+        )
+        nutrition_scores.append(nutrition["score"])
+        severities.append(nutrition["severity"])
+        overall_scores.append(overall)
+        levels.append(analyzer._determine_risk_level(overall))
+    return nutrition_scores, severities, overall_scores, levels
+
+
+def test_vectorized_scores_match_scalar_scoring(scoring_frame):
+    analyzer = AIRiskAnalyzer(response_cache=LLMResponseCache())
+
+    nutrition_scores, severities, overall_scores, levels = score_scalar(analyzer, scoring_frame)
+    scored = VectorizedScorer.from_analyzer(analyzer).score_frame(scoring_frame)
+
+    assert scored["nutritional_risk"].tolist() == nutrition_scores
+    assert scored["nutrition_severity"].tolist() == severities
+    # Floats compared bit for bit
+    assert np.array_equal(
+        scored["overall_risk_score"].to_numpy(dtype=np.float64).view(np.uint64),
+        np.array(overall_scores, dtype=np.float64).view(np.uint64)
+    )
+    assert scored["risk_level"].tolist() == levels